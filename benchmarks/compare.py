@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Compares a benchmark run against a baseline and flags regressions.
+
+Both files are written by benchmarks/suite.py. Every measurement is lower-is-better; one that grew
+by more than the threshold is a regression and one that shrank by more than it an improvement.
+Timings of sub-millisecond calls vary by tens of percent between runs on a shared machine, so the
+default threshold is 25%, and the baseline should be regenerated on the machine that checks it.
+Run from the repository root with
+
+    python benchmarks/compare.py benchmarks/baseline.json results.json --threshold 0.25
+
+The exit status is 1 if any measurement regressed, so the comparison can gate a CI job.
+"""
+
+import argparse
+import json
+import sys
+
+def load(path):
+    """Returns the results of a benchmark report, {name: {'value', 'unit'}}."""
+    with open(path) as f:
+        return json.load(f)['results']
+
+def compare(baseline, current, threshold=0.25):
+    """Compares every measurement of two runs.
+
+    Parameters
+    ======
+    baseline, current : dict
+        The results of both runs
+    threshold : float
+        The relative change beyond which a measurement regressed or improved
+
+    Returns
+    =======
+    list of tuple
+        The name, baseline value, current value, ratio and status of every measurement, the
+        status being 'regression', 'improvement', 'ok', 'new' or 'missing'
+    """
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        if name not in current:
+            rows.append((name, baseline[name]['value'], None, None, 'missing'))
+            continue
+        if name not in baseline:
+            rows.append((name, None, current[name]['value'], None, 'new'))
+            continue
+        old = baseline[name]['value']
+        new = current[name]['value']
+        ratio = new / old if old > 0 else float('inf') if new > 0 else 1.0
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append((name, old, new, ratio, status))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline', help='JSON report of the baseline run')
+    parser.add_argument('current', help='JSON report of the run to check')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative change counted as a regression, 0.25 by default')
+    parser.add_argument('--all', action='store_true', help='also list unchanged and missing measurements')
+    args = parser.parse_args(argv)
+    rows = compare(load(args.baseline), load(args.current), args.threshold)
+    fmt = lambda value: '-' if value is None else f'{value:.3f}'
+    print(f"{'measurement':<40}{'baseline':>14}{'current':>14}{'ratio':>8}  status")
+    # Measurements of groups left out of the current run are only listed on request
+    for name, old, new, ratio, status in rows:
+        if status not in ('ok', 'missing') or args.all:
+            print(f"{name:<40}{fmt(old):>14}{fmt(new):>14}{fmt(ratio):>8}  {status}")
+    regressions = sum(row[4] == 'regression' for row in rows)
+    missing = sum(row[4] == 'missing' for row in rows)
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%} in {len(rows) - missing} measurements"
+          + (f", {missing} baseline measurements not in the current run" if missing else ''))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
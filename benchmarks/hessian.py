@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Second order benchmark: forward-over-reverse Hessians against finite differenced gradients.
+
+The Hessian of an extended Rosenbrock function is computed from Hessian-vector products and by
+central differences of Reverse_AD.grad, which needs two gradients per input. The time of one
+Hessian-vector product is reported as well, together with the largest difference between the
+two Hessians. Run from the repository root with
+
+    python benchmarks/hessian.py
+"""
+
+import argparse
+import sys
+import timeit
+
+import numpy as np
+from autoDiff_team15_2022 import *
+from autoDiff_team15_2022.hessian import hessian, hvp
+
+# Numbers of inputs measured
+SIZES = (10, 30, 100)
+
+def rosenbrock(*x):
+    """Extended Rosenbrock function with a coupling term, so its Hessian is banded but not diagonal."""
+    total = 0
+    for a, b in zip(x[:-1], x[1:]):
+        total = total + 100 * (b - a ** 2) ** 2 + (1 - a) ** 2 + sin(a) * b
+    return total
+
+def finite_difference_hessian(fn, args, step=1e-5):
+    """Returns the Hessian by central differences of reverse mode gradients."""
+    ad = Reverse_AD(fn)
+    args = np.asarray(args, dtype=float)
+    columns = []
+    for e in np.eye(len(args)):
+        forward = ad.grad((args + step * e).tolist())
+        backward = ad.grad((args - step * e).tolist())
+        columns.append((forward - backward) / (2 * step))
+    return np.array(columns)
+
+def best(stmt, number, repeat=3):
+    """Returns the best time of one call of stmt in milliseconds."""
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e3
+
+def run(sizes=SIZES):
+    """Returns the timings and errors of every method for every number of inputs.
+
+    Returns
+    =======
+    dict
+        Maps each number of inputs to {'hvp', 'hessian', 'finite difference'} in milliseconds
+        and 'max difference' between the Hessians
+    """
+    report = {}
+    for n in sizes:
+        args = np.linspace(-1, 1, n).tolist()
+        v = np.ones(n)
+        number = max(1, 200 // n)
+        exact = hessian(rosenbrock, args)
+        approx = finite_difference_hessian(rosenbrock, args)
+        report[n] = {
+            'hvp': best(lambda: hvp(rosenbrock, args, v), number),
+            'hessian': best(lambda: hessian(rosenbrock, args), number),
+            'finite difference': best(lambda: finite_difference_hessian(rosenbrock, args), number),
+            'max difference': float(np.abs(exact - approx).max()),
+        }
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES, help='numbers of inputs to run')
+    args = parser.parse_args(argv)
+    report = run(args.sizes)
+    columns = ['hvp', 'hessian', 'finite difference', 'max difference']
+    print(f"{'inputs':<8}" + ''.join(f"{name:>20}" for name in columns))
+    for n, row in report.items():
+        print(f"{n:<8}" + ''.join(f"{row[name]:>17.3f} ms" for name in columns[:3]) + f"{row[columns[3]]:>20.2e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Per-operation latency benchmark for scalars, forward mode and reverse mode.
+
+Every elementary function and operator is timed on a Python float, a DualNumber and a Node
+input and the best per-call latency is reported in nanoseconds. Run from the repository root with
+
+    python benchmarks/latency.py
+"""
+
+import argparse
+import sys
+import timeit
+
+from autoDiff_team15_2022 import *
+
+# Operations measured, each taking one input and returning a new value
+OPERATIONS = {
+    'add': lambda x: x + 1.5,
+    'mul': lambda x: x * 1.5,
+    'div': lambda x: x / 1.5,
+    'pow': lambda x: x ** 2,
+    'sin': sin,
+    'cos': cos,
+    'tan': tan,
+    'arcsin': arcsin,
+    'arctan': arctan,
+    'tanh': tanh,
+    'exp': exp,
+    'log': log,
+    'logistic': logistic,
+}
+
+# Constructors for the input of each mode
+MODES = {
+    'float': lambda: 0.5,
+    'DualNumber': lambda: DualNumber(0.5, 1.0),
+    'Node': lambda: Node(0.5),
+}
+
+def latency(make_input, op, number=20000, repeat=5):
+    """Returns the best per-call latency of an operation in nanoseconds.
+
+    Parameters
+    ======
+    make_input : function
+        Returns the input the operation is applied to
+    op : function
+        The operation timed
+    number : int
+        Calls per timing run
+    repeat : int
+        Timing runs, the fastest is reported
+
+    Returns
+    =======
+    float
+        Nanoseconds per call
+    """
+    # Reverse mode inputs accumulate children, so every timing run starts from a fresh input
+    timings = []
+    for _ in range(repeat):
+        x = make_input()
+        timings.append(timeit.timeit(lambda: op(x), number=number))
+    return min(timings) / number * 1e9
+
+def run(number=20000):
+    """Returns the per-call latency in nanoseconds of every operation in every mode.
+
+    Returns
+    =======
+    dict
+        Maps each mode to {operation: nanoseconds}
+    """
+    return {mode: {name: latency(make_input, op, number) for name, op in OPERATIONS.items()}
+            for mode, make_input in MODES.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help='calls per timing of an operation')
+    args = parser.parse_args(argv)
+    report = run(args.number)
+    modes = list(report)
+    print(f"{'ns per op':<10}" + ''.join(f"{mode:>12}" for mode in modes))
+    for name in OPERATIONS:
+        print(f"{name:<10}" + ''.join(f"{report[mode][name]:>12.0f}" for mode in modes))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Memory benchmark for the objects allocated by forward and reverse mode.
+
+Every elementary function and operator is applied many times, keeping all results (and, for
+reverse mode, the graph edges they create) alive, and tracemalloc reports the bytes allocated
+per operation. Run from the repository root with
+
+    python benchmarks/memory.py
+"""
+
+import argparse
+import sys
+import tracemalloc
+
+from autoDiff_team15_2022 import *
+
+# Operations measured, each taking one traced value and returning a new one
+OPERATIONS = {
+    'add': lambda x: x + 1.5,
+    'sub': lambda x: x - 1.5,
+    'mul': lambda x: x * 1.5,
+    'div': lambda x: x / 1.5,
+    'pow': lambda x: x ** 2,
+    'neg': lambda x: -x,
+    'sin': sin,
+    'cos': cos,
+    'tan': tan,
+    'arcsin': arcsin,
+    'arccos': arccos,
+    'arctan': arctan,
+    'sinh': sinh,
+    'cosh': cosh,
+    'tanh': tanh,
+    'exp': exp,
+    'log': log,
+    'logistic': logistic,
+}
+
+# Constructors for the traced input of each mode
+MODES = {
+    'DualNumber': lambda: DualNumber(0.5, 1.0),
+    'Node': lambda: Node(0.5),
+    'TapeNode': lambda: Tape(capacity=1).variable(0.5),
+}
+
+def bytes_per_op(make_input, op, repeat=20000):
+    """Returns the bytes allocated per application of an operation.
+
+    Parameters
+    ======
+    make_input : function
+        Returns a fresh traced input
+    op : function
+        The operation applied to the input
+    repeat : int
+        The number of applications measured
+
+    Returns
+    =======
+    float
+        Bytes allocated per application, including graph edges and tape growth
+    """
+    x = make_input()
+    results = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(repeat):
+        results.append(op(x))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the results is not part of the cost of an operation
+    return (after - before) / repeat - 8
+
+def bytes_per_object(make_input, repeat=20000):
+    """Returns the bytes held by one traced input object, without any graph attached."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [make_input() for _ in range(repeat)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / repeat - 8
+
+def run(repeat=20000):
+    """Returns the bytes per object and per operation of every mode.
+
+    Returns
+    =======
+    dict
+        Maps each mode to {'object': bytes, 'ops': {operation: bytes}}
+    """
+    report = {}
+    for mode, make_input in MODES.items():
+        report[mode] = {
+            'object': bytes_per_object(make_input, repeat),
+            'ops': {name: bytes_per_op(make_input, op, repeat) for name, op in OPERATIONS.items()},
+        }
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20000, help='applications of every operation')
+    args = parser.parse_args(argv)
+    report = run(args.repeat)
+    modes = list(report)
+    print(f"{'bytes per':<10}" + ''.join(f"{mode:>12}" for mode in modes))
+    print(f"{'object':<10}" + ''.join(f"{report[mode]['object']:>12.1f}" for mode in modes))
+    for name in OPERATIONS:
+        print(f"{name:<10}" + ''.join(f"{report[mode]['ops'][name]:>12.1f}" for mode in modes))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
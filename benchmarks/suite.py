@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""Standard benchmark suite, writing every measurement to one JSON file.
+
+Covers the per-operation cost of floats, DualNumbers and Nodes, the scaling of gradient with the
+number of inputs and of jacobian with the number of outputs and inputs, reverse mode on deep
+chains, the memory per operation and per traced object, the overhead of a driver call and Newton's
+method from examples/rootfinding.py. Run from the repository root with
+
+    python benchmarks/suite.py --output results.json
+
+and compare two runs with benchmarks/compare.py. --quick uses smaller sizes and fewer repeats.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+import autoDiff_team15_2022
+from autoDiff_team15_2022 import *
+
+import latency
+import memory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'examples'))
+from rootfinding import newton_root
+
+# Sizes of every group, full and quick
+SIZES = {
+    'gradient': ((10, 100, 1000), (10, 100)),
+    'jacobian': (((10, 10), (10, 100), (100, 10), (100, 100)), ((10, 10), (10, 50), (50, 10))),
+    'chain': ((1000, 10000, 100000), (1000, 10000)),
+}
+
+def best(stmt, number, repeat=5):
+    """Returns the best time of one call of stmt in milliseconds."""
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e3
+
+def calls(seconds):
+    """Returns the number of calls per timing run for an operation taking about seconds."""
+    return max(1, int(0.1 / max(seconds, 1e-7)))
+
+def timed(stmt, repeat=5):
+    """Returns the best time of stmt in milliseconds, with enough calls per run for small timings."""
+    start = time.perf_counter()
+    stmt()
+    return best(stmt, calls(time.perf_counter() - start), repeat)
+
+def sum_of_sines(*x):
+    """Scalar function of any number of inputs, one elementary function and one sum per input."""
+    total = 0
+    for xi in x:
+        total = total + sin(xi) * xi
+    return total
+
+def coupled(m):
+    """Returns a function of any number of inputs with m outputs, each depending on every input."""
+    def fn(*x):
+        s = sum_of_sines(*x)
+        return [s * (k + 1) + exp(x[k % len(x)]) for k in range(m)]
+    return fn
+
+def chain(depth):
+    """Returns a scalar function of one input applying depth elementary functions in sequence."""
+    def fn(x):
+        for _ in range(depth):
+            x = sin(x) * 0.5 + x
+        return x
+    return fn
+
+def per_op(quick):
+    """Nanoseconds per elementary operation on floats, DualNumbers and Nodes."""
+    report = latency.run(2000 if quick else 20000)
+    return {f'per_op/{mode}/{name}': (ns, 'ns') for mode, ops in report.items() for name, ns in ops.items()}
+
+def gradient_scaling(quick):
+    """Milliseconds per gradient of a scalar function with n inputs, in both modes."""
+    results = {}
+    for n in SIZES['gradient'][quick]:
+        args = np.linspace(0.1, 1, n).tolist()
+        results[f'gradient/forward/n={n}'] = (timed(lambda: Forward_AD(sum_of_sines).grad(args)), 'ms')
+        results[f'gradient/reverse/n={n}'] = (timed(lambda: Reverse_AD(sum_of_sines).grad(args)), 'ms')
+    return results
+
+def jacobian_scaling(quick):
+    """Milliseconds per jacobian of m outputs and n inputs, in both modes."""
+    results = {}
+    for m, n in SIZES['jacobian'][quick]:
+        fn = coupled(m)
+        args = np.linspace(0.1, 1, n).tolist()
+        results[f'jacobian/forward/m={m},n={n}'] = (timed(lambda: jacobian([fn], args)), 'ms')
+        results[f'jacobian/reverse/m={m},n={n}'] = (timed(lambda: Reverse_AD(fn).grad(args)), 'ms')
+    return results
+
+def deep_chain(quick):
+    """Milliseconds per reverse mode derivative of a chain of elementary functions."""
+    results = {}
+    for depth in SIZES['chain'][quick]:
+        fn = chain(depth)
+        for backend in ('node', 'tape'):
+            ad = Reverse_AD(fn, backend=backend)
+            results[f'chain/{backend}/depth={depth}'] = (timed(lambda: ad.grad([0.5]), repeat=2), 'ms')
+    return results
+
+def memory_use(quick):
+    """Bytes per traced object and per elementary operation, including graph edges."""
+    report = memory.run(2000 if quick else 20000)
+    results = {}
+    for mode, row in report.items():
+        results[f'memory/{mode}/object'] = (row['object'], 'B')
+        for name, size in row['ops'].items():
+            results[f'memory/{mode}/{name}'] = (size, 'B')
+    return results
+
+def driver_overhead(quick):
+    """Microseconds per driver call on a function of two inputs, against the function alone."""
+    fn = lambda x, y: x * y
+    number = 2000 if quick else 20000
+    results = {'driver/function': (best(lambda: fn(2.0, 3.0), number) * 1e3, 'us')}
+    for name, ad in (('forward', Forward_AD(fn)), ('reverse', Reverse_AD(fn)),
+                     ('reverse tape', Reverse_AD(fn, backend='tape'))):
+        results[f'driver/{name}/values'] = (best(lambda: ad.values([2.0, 3.0]), number) * 1e3, 'us')
+        results[f'driver/{name}/grad'] = (best(lambda: ad.grad([2.0, 3.0]), number) * 1e3, 'us')
+    return results
+
+def rootfinding(quick):
+    """Milliseconds per root found by Newton's method from examples/rootfinding.py in both modes."""
+    fi = lambda x: x ** 3 + sin(x)
+    number = 20 if quick else 200
+    results = {}
+    for name, ad in (('forward', Forward_AD(fi)), ('reverse', Reverse_AD(fi))):
+        results[f'rootfinding/{name}'] = (best(lambda: newton_root(ad.value_and_grad, 2, 1.e-20, 100), number), 'ms')
+    return results
+
+# Benchmark groups, run in this order
+GROUPS = {
+    'per_op': per_op,
+    'gradient': gradient_scaling,
+    'jacobian': jacobian_scaling,
+    'chain': deep_chain,
+    'memory': memory_use,
+    'driver': driver_overhead,
+    'rootfinding': rootfinding,
+}
+
+def run(groups=None, quick=False):
+    """Runs the benchmark groups and returns the report.
+
+    Parameters
+    ======
+    groups : list of str, optional
+        The groups to run, all of them by default
+    quick : bool
+        Use smaller sizes and fewer repeats
+
+    Returns
+    =======
+    dict
+        'meta' describes the machine and the run, 'results' maps every measurement to its value
+        and unit, lower being better for all of them
+    """
+    results = {}
+    for name in groups or GROUPS:
+        for key, (value, unit) in GROUPS[name](quick).items():
+            results[key] = {'value': float(value), 'unit': unit}
+    meta = {
+        'package': autoDiff_team15_2022.__name__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'quick': quick,
+    }
+    return {'meta': meta, 'results': results}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', '-o', help='JSON file to write, printed to stdout if omitted')
+    parser.add_argument('--groups', nargs='+', choices=list(GROUPS), help='groups to run, all by default')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes and fewer repeats')
+    args = parser.parse_args(argv)
+    report = run(args.groups, args.quick)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        for key, result in report['results'].items():
+            print(f"{key:<40}{result['value']:>14.3f} {result['unit']}")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
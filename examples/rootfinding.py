@@ -1,17 +1,14 @@
 #!/usr/bin/env python
 
-import timeit
 from autoDiff_team15_2022 import *
 
-def newton_root(f, df, x0, epsilon, max_iter: int = 10000):
+def newton_root(fdf, x0, epsilon, max_iter: int = 10000):
     """Implementation of Newton's Method for root finding using automatic differentiation
 
     Parameters
     ======
-    f : function
-        Input function for root finding
-    df : function
-        Derivative of input function
+    fdf : function
+        Returns the value and the derivative of the input function, evaluated together
     x0 : int, float
         Initial guess for root
     epsilon : int, float
@@ -31,13 +28,9 @@ def newton_root(f, df, x0, epsilon, max_iter: int = 10000):
     >>> def fi(x):
     >>>    return x**3 + sin(x)
 
-    # Value of function
-    >>> def fx(x):
-    >>>    return ad.values(x)
-
-    # Derivative of function
-    >>> def dfx(x):
-    >>>    return ad.grad(x)
+    # Value and derivative of function from one evaluation
+    >>> def fdfx(x):
+    >>>    return ad.value_and_grad(x)
 
     # Find root with forward mode
     >>> forward = Forward_AD(fi)
@@ -50,7 +43,7 @@ def newton_root(f, df, x0, epsilon, max_iter: int = 10000):
     >>> max_iter = 100
 
     # Find root
-    >>> iterations, root = newton_root(fx, dfx, x_guess, epsilon, max_iter)
+    >>> iterations, root = newton_root(fdfx, x_guess, epsilon, max_iter)
     >>> print("Number of iterations to successfully find root:", iterations)
     >>> print("Root found:", root)
     >>> print("Real root:", real_root)
@@ -64,11 +57,8 @@ def newton_root(f, df, x0, epsilon, max_iter: int = 10000):
 
     # Attempt to find root by looping until maximum number of iterations reached
     while i <= max_iter:
-        # Evaluate function at current input value
-        fx = f(x)
-        
-        # Evaluate derivative of function at current input value
-        dfx = df(x)
+        # Evaluate function and its derivative at current input value
+        fx, dfx = fdf(x)
 
         if abs(fx) < epsilon:
             # Return iteration count and root once root is found
@@ -94,18 +84,12 @@ if __name__ == "__main__":
     def fi(x):
         return x**3 + sin(x)
 
-    # Value of function
-    def fx(x):
-        return ad.values(x)
-
-    # Derivative of function
-    def dfx(x):
-        return ad.grad(x)
+    # Value and derivative of function from one evaluation
+    def fdfx(x):
+        return ad.value_and_grad(x)
 
     # Find root with forward mode
-    forward = Forward_AD(fi)
-    reverse = Reverse_AD(fi)
-    ad = forward
+    ad = Forward_AD(fi)
 
     # Parameters
     x_guess = 3
@@ -114,33 +98,9 @@ if __name__ == "__main__":
     max_iter = 100
 
     # Find root
-    iterations, root = newton_root(fx, dfx, x_guess, epsilon, max_iter)
+    iterations, root = newton_root(fdfx, x_guess, epsilon, max_iter)
     print("Number of iterations to successfully find root:", iterations)
     print("Root found:", root)
     print("Real root:", real_root)
 
-    # Helper function for benchmarking
-    def root_wrap_for_benchmark():
-        return newton_root(fx, dfx, 2, 1.e-20, 100)
-
-    # Number of function calls for benchmarking
-    loops = 50000
-
-    # Benchmark forward and reverse modes if a root exists
-    if root == None:
-        print("No roots to benchmark.")
-    else:
-        # Benchmark forward mode
-        forward_benchmark = timeit.timeit(stmt='root_wrap_for_benchmark()',globals=globals(), number=loops)
-        print(f"Forward mode time to find root {loops} times: {forward_benchmark} seconds.")
-    
-        # Benchmark reverse mode
-        ad = reverse
-        reverse_benchmark = timeit.timeit(stmt='root_wrap_for_benchmark()',globals=globals(), number=loops)
-        print(f"Reverse mode time to find root {loops} times: {reverse_benchmark} seconds.")
-
-        # Percent difference in performance between forward and reverse modes
-        if reverse_benchmark > forward_benchmark:
-            print(f"Forward mode faster than reverse mode by {round(100*((reverse_benchmark - forward_benchmark)/ reverse_benchmark) - 1, 2)}%.")
-        else:
-            print(f"Reverse mode faster than forward mode by {round(100*((forward_benchmark - reverse_benchmark)/ forward_benchmark) - 1, 2)}%.")    
+    # Forward and reverse mode are timed on this example by benchmarks/suite.py --groups rootfinding
@@ -1,8 +1,18 @@
-from autoDiff_team15_2022.differentiation import jacobian, gradient, derivative, get_values
+from autoDiff_team15_2022.differentiation import jacobian, gradient, derivative, get_values, jacobian_batch, values_batch, value_and_jacobian, jacobian_blocks, jvp, vjp
 from autoDiff_team15_2022.dualNum import DualNumber
-from autoDiff_team15_2022.node import Node
+from autoDiff_team15_2022.node import Node, Trace
+from autoDiff_team15_2022.tape import Tape, TapeNode
 from autoDiff_team15_2022.elemFunctions import sin, cos, tan, cosh, sinh, tanh, arccos, arcsin, arctan, logistic, log, exp
-from autoDiff_team15_2022.driver import Forward_AD, Reverse_AD
+from autoDiff_team15_2022.compiler import CompiledFunction
+from autoDiff_team15_2022.cache import ResultCache
+from autoDiff_team15_2022.hessian import hvp, hvp_batch, hessian
+from autoDiff_team15_2022.checkpoint import checkpointed_grad
+from autoDiff_team15_2022.parallel import ParallelJacobian, BatchResult
+from autoDiff_team15_2022.service import GradientService, GradientClient
+from autoDiff_team15_2022.stats import DriverStats
+from autoDiff_team15_2022.profiler import Profiler
+from autoDiff_team15_2022.sparse import SparseJacobian, sparsity_pattern, color_columns, sparse_jacobian
+from autoDiff_team15_2022.driver import Forward_AD, Reverse_AD, Auto_AD, CostModel
 
-__all__ = ['jacobian', 'gradient', 'derivative','get_values','sin','sinh','arcsin','cos','cosh','arccos','tan',
-'tanh','arctan','logistic','log','exp','DualNumber','Node','Forward_AD','Reverse_AD']
+__all__ = ['jacobian', 'gradient', 'derivative','get_values','jacobian_batch','values_batch','value_and_jacobian','jacobian_blocks','jvp','vjp','hvp','hvp_batch','hessian','checkpointed_grad','sparsity_pattern','color_columns','sparse_jacobian','sin','sinh','arcsin','cos','cosh','arccos','tan',
+'tanh','arctan','logistic','log','exp','DualNumber','Node','Trace','Tape','TapeNode','CompiledFunction','ResultCache','SparseJacobian','ParallelJacobian','BatchResult','GradientService','GradientClient','DriverStats','Profiler','Forward_AD','Reverse_AD','Auto_AD','CostModel']
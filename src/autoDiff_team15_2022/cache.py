@@ -0,0 +1,167 @@
+from collections import OrderedDict
+import numpy as np
+
+_supported_types = (int, float, np.int32, np.int64, np.float32, np.float64)
+
+class ResultCache:
+    """A bounded least recently used cache of driver results.
+
+    Results are keyed by the requested quantity and the exact input point. Cached arrays are made
+    read-only, so callers cannot change a result that later calls return again.
+
+    Attributes
+    ======
+        max_entries : int or None
+            The largest number of results kept, unbounded if None
+        max_bytes : int or None
+            The largest total size of the cached arrays in bytes, unbounded if None
+        hits : int
+            The number of lookups answered from the cache
+        misses : int
+            The number of lookups that had to be computed
+        nbytes : int
+            The total size of the cached arrays in bytes
+
+    Methods
+    ======
+        key(quantity, inputs)
+            Returns the key of a quantity at an input point, or None if the point cannot be cached
+        get(key)
+            Returns a cached result and marks it as recently used, or None
+        put(key, result)
+            Caches a result, evicting the least recently used results beyond the budgets
+        clear()
+            Discards every cached result
+    """
+
+    def __init__(self, max_entries=128, max_bytes=None):
+        """Constructor for the ResultCache class.
+
+        Parameters
+        ======
+        max_entries : int or None
+            The largest number of results kept, unbounded if None
+        max_bytes : int or None
+            The largest total size of the cached arrays in bytes, unbounded if None
+
+        Raises
+        =======
+        ValueError: Cache budgets must be positive
+        """
+        for budget in (max_entries, max_bytes):
+            if budget is not None and budget < 1:
+                raise ValueError(f"Cache budgets must be positive, got {budget}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """Returns the number of cached results."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Returns whether a result is cached, without counting a lookup."""
+        return key in self._entries
+
+    @staticmethod
+    def key(quantity, inputs):
+        """Returns the key of a quantity at an input point.
+
+        Parameters
+        ======
+        quantity : str
+            The requested quantity, such as 'values' or 'value_and_grad'
+        inputs : list, int, float
+            The input point
+
+        Returns
+        =======
+        tuple or None
+            The key, or None if an input is not a number, e.g. an array, so the point is not cached
+        """
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+        for x in inputs:
+            if not isinstance(x, _supported_types):
+                return None
+        return (quantity,) + tuple(inputs)
+
+    def get(self, key):
+        """Returns a cached result and marks it as the most recently used.
+
+        Parameters
+        ======
+        key : tuple
+            A key returned by key()
+
+        Returns
+        =======
+        numpy array, tuple of numpy arrays or None
+            The cached result, or None if the key is not cached
+        """
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def peek(self, key):
+        """Returns a cached result without marking it as used or counting a lookup."""
+        return self._entries.get(key)
+
+    def put(self, key, result):
+        """Caches a result, evicting the least recently used results beyond the budgets.
+
+        Parameters
+        ======
+        key : tuple
+            A key returned by key()
+        result : numpy array or tuple of numpy arrays
+            The result to cache, its arrays are made read-only
+
+        Returns
+        =======
+        numpy array or tuple of numpy arrays
+            The result, with read-only arrays
+
+        Examples
+        =======
+        >>> cache = ResultCache(max_entries=1)
+        >>> key = cache.key('values', [1.0])
+        >>> result = cache.put(key, np.array([2.0]))
+        >>> print(cache.get(key), result.flags.writeable)
+        [2.] False
+        """
+        arrays = result if isinstance(result, tuple) else (result,)
+        size = 0
+        for array in arrays:
+            if isinstance(array, np.ndarray):
+                array.setflags(write=False)
+                size += array.nbytes
+        # A result larger than the whole budget is returned without being cached
+        if self.max_bytes is not None and size > self.max_bytes:
+            return result
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = result
+        self.nbytes += size
+        while (self.max_entries is not None and len(self._entries) > self.max_entries) or \
+                (self.max_bytes is not None and self.nbytes > self.max_bytes):
+            self._discard(next(iter(self._entries)))
+        return result
+
+    def _discard(self, key):
+        """Removes one result and its bytes from the cache."""
+        result = self._entries.pop(key)
+        arrays = result if isinstance(result, tuple) else (result,)
+        self.nbytes -= sum(array.nbytes for array in arrays if isinstance(array, np.ndarray))
+
+    def clear(self):
+        """Discards every cached result, keeping the hit and miss counters."""
+        self._entries.clear()
+        self.nbytes = 0
@@ -0,0 +1,254 @@
+import math
+import sys
+import numpy as np
+from .node import Node, Trace, _topological_order, vector_jacobian_product
+from .differentiation import _outputs
+
+# Bytes of one traced operation: about 200 for the Node and its edges (benchmarks/memory.py), and
+# as much again for its entries in the topological order and adjoints of the backward sweep
+_NODE_BYTES = 400
+# Bytes of the tuple holding a checkpoint in the schedules, besides the array itself
+_ENTRY_BYTES = 80
+
+def _advance(step, state, steps):
+    """Applies the step function to a state without tracing it.
+
+    Parameters
+    ==========
+    step : function
+        The step function
+    state : numpy array
+        The state before the steps
+    steps : int
+        The number of steps applied
+
+    Returns
+    ==========
+    numpy array
+        The state after the steps
+    """
+    for _ in range(steps):
+        state = np.array(_outputs(step(*state.tolist())), dtype=float)
+    return state
+
+def _reverse_steps(step, state, steps, adjoint, loss=None):
+    """Traces consecutive steps from a state and pulls the adjoint of their last state back to the first.
+
+    Parameters
+    ==========
+    step : function
+        The step function
+    state : numpy array
+        The state before the steps
+    steps : int
+        The number of steps traced
+    adjoint : numpy array
+        The adjoint of the state after the steps, of shape (n_state, k), or of the value of the
+        loss at that state, of shape (1, k), if a loss is given
+    loss : function, optional
+        Scalar function of the state after the steps
+
+    Returns
+    ==========
+    tuple
+        The values after the steps, the loss or the state, and the adjoint of the state before the
+        steps, of shape (n_state, k)
+    """
+    with Trace() as trace:
+        nodes = trace.variables(state.tolist())
+        outputs = nodes
+        for _ in range(steps):
+            outputs = _outputs(step(*outputs))
+        if loss is not None:
+            outputs = _outputs(loss(*outputs))
+        values = np.array([out.value if isinstance(out, Node) else out for out in outputs], dtype=float)
+        # Outputs that do not depend on the state contribute nothing
+        traced = [(out, seed) for out, seed in zip(outputs, adjoint) if isinstance(out, Node)]
+        if not traced:
+            return values, np.zeros((len(nodes), adjoint.shape[1]))
+        product = vector_jacobian_product([out for out, _ in traced], nodes, [seed for _, seed in traced])
+    return values, product
+
+def _step_bytes(step, state):
+    """Estimates the bytes of the graph of one traced step from the number of its operations."""
+    with Trace() as trace:
+        outputs = [out for out in _outputs(step(*trace.variables(state.tolist()))) if isinstance(out, Node)]
+        operations = len(_topological_order(outputs)) - len(state)
+    return max(operations, 1) * _NODE_BYTES
+
+def _binomial(slots, steps):
+    """Returns the smallest number of sweeps t such that slots checkpoints reverse steps steps.
+
+    With s checkpoints and t sweeps, the binomial schedule of revolve reverses C(s + t, s) steps.
+    """
+    sweeps = 1
+    while math.comb(slots + sweeps, slots) < steps:
+        sweeps += 1
+    return sweeps
+
+def _stride(steps, state_bytes, step_bytes, memory_budget):
+    """Returns the longest segment whose trace and checkpoints fit in the memory budget.
+
+    Longer segments mean fewer checkpoints and fewer steps recomputed, since the last segment is
+    traced without a recomputation.
+
+    Raises
+    =======
+    ValueError: The memory budget cannot hold one traced step and its checkpoints
+    """
+    memory = lambda stride: -(-steps // stride) * state_bytes + stride * step_bytes
+    # memory(stride) <= budget holds up to the larger root of step_bytes s^2 - budget s + steps state_bytes
+    discriminant = memory_budget ** 2 - 4 * step_bytes * steps * state_bytes
+    stride = int((memory_budget + math.sqrt(max(discriminant, 0))) / (2 * step_bytes)) if discriminant >= 0 else 0
+    stride = min(stride, steps)
+    while stride > 0 and memory(stride) > memory_budget:
+        stride -= 1
+    if stride == 0:
+        raise ValueError(f"A memory budget of {memory_budget} bytes cannot hold one traced step of about "
+                         f"{step_bytes} bytes and {steps} checkpoints of {state_bytes} bytes")
+    return stride
+
+def checkpointed_grad(step, x0, n_steps, loss=None, schedule='binomial', slots=None, stride=None,
+                      memory_budget=None):
+    """Differentiates a long iterative computation in reverse mode, storing only checkpoints of its state.
+
+    The computation applies step n_steps times to the state x0, optionally followed by a scalar
+    loss. Tracing all of it would keep every intermediate Node alive at once, memory growing with
+    n_steps. Instead, only the states at checkpoints are stored during a plain forward evaluation,
+    and the steps between them are traced again during the backward sweep, one segment at a time,
+    each trace being released as soon as its adjoint is pulled back.
+
+    The binomial schedule (revolve) stores up to slots states besides x0 and traces a single step
+    at a time: with s slots, each step is evaluated at most t + 1 times, for the smallest t with
+    C(s + t, s) >= n_steps, so a handful of slots already reverses long loops with few
+    recomputations. The stride schedule stores the state every stride steps and traces a whole
+    segment at a time: every step is evaluated twice, except the last segment.
+
+    Parameters
+    ==========
+    step : function
+        Function of the state entries returning the next state, with as many entries
+    x0 : list of int, float
+        The initial state
+    n_steps : int
+        The number of steps
+    loss : function, optional
+        Scalar function of the final state entries. If omitted, the Jacobian of the final state is
+        computed, with one column of adjoints per state entry.
+    schedule : str
+        'binomial' or 'stride'
+    slots : int, optional
+        The number of states the binomial schedule stores besides x0, the square root of n_steps by
+        default
+    stride : int, optional
+        The number of steps between the checkpoints of the stride schedule, the square root of
+        n_steps by default
+    memory_budget : int, optional
+        Approximate bytes the checkpoints and the trace of one segment may take. The most slots, or
+        the longest stride, fitting the budget are used, estimating the trace from the number of
+        operations of one step.
+
+    Returns
+    ==========
+    tuple
+        The value of the loss (float) and its gradient with respect to x0 (numpy array), or the
+        final state (numpy array) and its Jacobian with respect to x0 (numpy array) without a loss
+
+    Raises
+    =======
+    ValueError: Schedule `[schedule]` is not supported
+    ValueError: The memory budget cannot hold one traced step and its checkpoints
+
+    Examples
+    ==========
+    >>> def step(x, v):
+    >>>     return [x + 0.01 * v, v - 0.01 * sin(x)]
+    >>> value, grad = checkpointed_grad(step, [1.0, 0.0], 1000, loss=lambda x, v: x, slots=5)
+    >>> print(round(value, 6), grad.round(6))
+    -1.044621 [-0.939745  0.085244]
+    """
+    if schedule not in ('binomial', 'stride'):
+        raise ValueError(f"Schedule `{schedule}` is not supported, choose 'binomial' or 'stride'")
+    state = np.array(x0 if isinstance(x0, (list, tuple, np.ndarray)) else [x0], dtype=float).ravel()
+    n = len(state)
+    # Adjoints carry one column per seeded output: the loss, or every entry of the final state
+    adjoint = np.ones((1, 1)) if loss is not None else np.eye(n)
+    if n_steps <= 0:
+        values, adjoint = _reverse_steps(step, state, 0, adjoint, loss)
+        return _result(values, adjoint, loss)
+    if memory_budget is not None:
+        step_bytes = _step_bytes(step, state)
+        # Every checkpoint is one small array, and its entry in the list of checkpoints or tasks
+        state_bytes = sys.getsizeof(state) + _ENTRY_BYTES
+        if schedule == 'stride':
+            stride = _stride(n_steps, state_bytes, step_bytes, memory_budget)
+        else:
+            slots = (memory_budget - step_bytes) // state_bytes - 1
+            if slots < 0:
+                raise ValueError(f"A memory budget of {memory_budget} bytes cannot hold one traced step of "
+                                 f"about {step_bytes} bytes and the initial state")
+    if schedule == 'stride':
+        stride = max(1, min(stride or math.isqrt(n_steps), n_steps))
+        values, adjoint = _stride_schedule(step, state, n_steps, stride, adjoint, loss)
+    else:
+        slots = max(0, min(math.isqrt(n_steps) if slots is None else slots, n_steps - 1))
+        values, adjoint = _binomial_schedule(step, state, n_steps, slots, adjoint, loss)
+    return _result(values, adjoint, loss)
+
+def _result(values, adjoint, loss):
+    """Returns the value and gradient of a loss, or the final state and its Jacobian."""
+    if loss is not None:
+        return float(values[0]), adjoint[:, 0]
+    return values, adjoint.T
+
+def _stride_schedule(step, state, n_steps, stride, adjoint, loss):
+    """Reverses the steps with a checkpoint every stride steps, tracing a segment at a time."""
+    checkpoints = []
+    for start in range(0, n_steps, stride):
+        checkpoints.append((start, state))
+        # The last segment is traced straight away, its state is never needed again
+        if start + stride < n_steps:
+            state = _advance(step, state, stride)
+    values = None
+    for start, state in reversed(checkpoints):
+        steps = min(stride, n_steps - start)
+        last = start + steps == n_steps
+        segment_values, adjoint = _reverse_steps(step, state, steps, adjoint, loss if last else None)
+        if last:
+            values = segment_values
+    return values, adjoint
+
+def _binomial_schedule(step, state, n_steps, slots, adjoint, loss):
+    """Reverses the steps with the binomial schedule of revolve, tracing one step at a time.
+
+    Every task reverses the steps [start, stop) from the state at start with a number of free
+    slots. A task of several steps advances to a split point, stores its state in one slot and
+    becomes two tasks, the later one first, so the steps are reversed from the last one backwards
+    and at most slots states besides x0 are alive at once.
+    """
+    values = None
+    tasks = [(state, 0, n_steps, slots)]
+    while tasks:
+        state, start, stop, free = tasks.pop()
+        steps = stop - start
+        if steps == 1:
+            last = stop == n_steps
+            step_values, adjoint = _reverse_steps(step, state, 1, adjoint, loss if last else None)
+            if last:
+                values = step_values
+        elif free == 0:
+            # Without slots, every step is reached again from the start of the task
+            for k in range(steps - 1, -1, -1):
+                last = start + k + 1 == n_steps
+                step_values, adjoint = _reverse_steps(step, _advance(step, state, k), 1, adjoint,
+                                                      loss if last else None)
+                if last:
+                    values = step_values
+        else:
+            sweeps = _binomial(free, steps)
+            # The earlier part was swept once by the advance, the later part lost a slot
+            first = min(math.comb(free + sweeps - 1, free), steps - 1)
+            middle = _advance(step, state, first)
+            tasks.append((state, start, start + first, free))
+            tasks.append((middle, start + first, stop, free - 1))
+    return values, adjoint
@@ -0,0 +1,453 @@
+import math
+import numpy as np
+from . import elemFunctions as ef
+from .differentiation import _outputs, _is_scalar
+from .ufuncs import NumpyOperand
+
+_supported_types = (int, float, np.int32, np.int64, np.float32, np.float64)
+_math_errors = (ValueError, OverflowError, ZeroDivisionError)
+
+# Generated code calls these names, bound to numpy for arrays and to the math module for python scalars
+_NUMPY_NAMES = {
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'arcsin': np.arcsin, 'arccos': np.arccos, 'arctan': np.arctan,
+    'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'exp': np.exp, 'log': np.log, 'sqrt': np.sqrt,
+    'inf': math.inf, 'nan': math.nan,
+}
+_MATH_NAMES = {
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+    'arcsin': math.asin, 'arccos': math.acos, 'arctan': math.atan,
+    'sinh': math.sinh, 'cosh': math.cosh, 'tanh': math.tanh,
+    'exp': math.exp, 'log': math.log, 'sqrt': math.sqrt,
+    'inf': math.inf, 'nan': math.nan,
+}
+
+# Value and local partial derivative of each unary operation, {0} is the operand and {z} the result
+_UNARY = {
+    'neg': ('-{0}', '-1'),
+    'sin': ('sin({0})', 'cos({0})'),
+    'cos': ('cos({0})', '-sin({0})'),
+    'tan': ('tan({0})', '1 / cos({0}) ** 2'),
+    'arcsin': ('arcsin({0})', '1 / sqrt(1 - {0} ** 2)'),
+    'arccos': ('arccos({0})', '-1 / sqrt(1 - {0} ** 2)'),
+    'arctan': ('arctan({0})', '1 / (1 + {0} ** 2)'),
+    'sinh': ('sinh({0})', 'cosh({0})'),
+    'cosh': ('cosh({0})', 'sinh({0})'),
+    'tanh': ('tanh({0})', '1 - {z} ** 2'),
+    'exp': ('exp({0})', '{z}'),
+    'logistic': ('1 / (1 + exp(-{0}))', '{z} * (1 - {z})'),
+}
+
+def _literal(c):
+    """Returns the source of a constant, in parentheses when negative."""
+    c = c.item() if isinstance(c, np.generic) else c
+    text = repr(c)
+    return f'({text})' if text.startswith('-') else text
+
+
+class _Entry:
+    """One operation of a trace: its value expression and the partial derivative expression of each operand."""
+    __slots__ = ('index', 'value', 'partials')
+
+    def __init__(self, index, value, partials):
+        self.index = index
+        self.value = value
+        self.partials = partials
+
+
+class _Symbol(NumpyOperand):
+    """Stands for a scalar while a function is traced, recording every operation applied to it.
+
+    Operations with constants are folded into the recorded expressions, so only operations that
+    depend on the inputs are recorded.
+    """
+    __slots__ = ('trace', 'name')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def _push(self, value, *partials):
+        """Records an operation and returns the symbol holding its result."""
+        return self.trace._push(value, partials)
+
+    def _operand(self, other, name):
+        """Returns the source of another operand and whether it is a symbol.
+
+        Raises
+        =======
+        TypeError: Type `[input type]` is not supported for [operation]
+        """
+        if isinstance(other, _Symbol):
+            if other.trace is not self.trace:
+                raise ValueError("Cannot combine symbols from different traces")
+            return other.name, True
+        elif not isinstance(other, _supported_types):
+            raise TypeError(
+                f"Type `{type(other)}` is not supported for {name} in compiled functions"
+            )
+        return _literal(other), False
+
+    def __add__(self, other):
+        b, symbol = self._operand(other, 'addition')
+        # Adding zero records nothing
+        if not symbol and other == 0:
+            return self
+        return self._push(f'{self.name} + {b}', (self, '1'), (other, '1') if symbol else None)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        b, symbol = self._operand(other, 'subtraction')
+        if not symbol and other == 0:
+            return self
+        return self._push(f'{self.name} - {b}', (self, '1'), (other, '-1') if symbol else None)
+
+    def __rsub__(self, other):
+        b, _ = self._operand(other, 'subtraction')
+        return self._push(f'{b} - {self.name}', (self, '-1'))
+
+    def __mul__(self, other):
+        b, symbol = self._operand(other, 'multiplication')
+        if not symbol and other == 1:
+            return self
+        if symbol:
+            return self._push(f'{self.name} * {b}', (self, b), (other, self.name))
+        return self._push(f'{self.name} * {b}', (self, b))
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        b, symbol = self._operand(other, 'division')
+        if not symbol and other == 1:
+            return self
+        if symbol:
+            return self._push(f'{self.name} / {b}', (self, f'1 / {b}'), (other, f'-{{z}} / {b}'))
+        # Dividing by a constant is multiplying by its folded reciprocal
+        return self._push(f'{self.name} / {b}', (self, _literal(1 / other)))
+
+    def __rtruediv__(self, other):
+        b, _ = self._operand(other, 'division')
+        return self._push(f'{b} / {self.name}', (self, f'-{{z}} / {self.name}'))
+
+    def __pow__(self, other):
+        b, symbol = self._operand(other, 'powers')
+        a = self.name
+        if symbol:
+            return self._push(f'{a} ** {b}', (self, f'{b} * {a} ** ({b} - 1)'), (other, f'{{z}} * log({a})'))
+        if other == 1:
+            return self
+        # The exponent of the derivative is folded, squares need no power at all
+        if other == 2:
+            return self._push(f'{a} * {a}', (self, f'2 * {a}'))
+        if other == 0.5:
+            return self._push(f'sqrt({a})', (self, '0.5 / {z}'))
+        return self._push(f'{a} ** {b}', (self, f'{b} * {a} ** {_literal(other - 1)}'))
+
+    def __rpow__(self, other):
+        b, _ = self._operand(other, 'powers')
+        # Powers of zero are constant, powers of a negative base have no real derivative in the exponent
+        if other <= 0:
+            return self._push(f'{b} ** {self.name}', (self, 'nan') if other < 0 else None)
+        # The log of the base is folded into a constant
+        return self._push(f'{b} ** {self.name}', (self, f'{{z}} * {_literal(math.log(other))}'))
+
+    def __neg__(self):
+        return self._unary('neg')
+
+    def __pos__(self):
+        return self
+
+    def _unary(self, op):
+        value, partial = _UNARY[op]
+        return self._push(value.format(self.name), (self, partial.format(self.name, z='{z}')))
+
+    def _log(self, base):
+        log_base = math.log(base)
+        # Natural logarithms need no division by the log of the base
+        if log_base == 1:
+            return self._push(f'log({self.name})', (self, f'1 / {self.name}'))
+        return self._push(f'log({self.name}) / {_literal(log_base)}',
+                          (self, f'1 / ({self.name} * {_literal(log_base)})'))
+
+    def _primal(self):
+        """Symbols stand for scalars."""
+        return 0.0
+
+    @classmethod
+    def _constant(cls, value):
+        raise TypeError("Compiled functions only support scalar constants")
+
+    @classmethod
+    def _pack(cls, array):
+        return None
+
+    def _expand(self, shape):
+        return self
+
+    def _sum(self):
+        return self
+
+
+class _Trace:
+    """The straight-line record of a traced function.
+
+    Attributes
+    ======
+        entries : list
+            The recorded operations in the order they were applied
+        inputs : list
+            The symbols standing for the inputs
+    """
+
+    def __init__(self, n_inputs):
+        self.entries = []
+        self.inputs = [_Symbol(self, f'x{j}') for j in range(n_inputs)]
+
+    def _push(self, value, partials):
+        """Records an operation, partials are (operand, expression) pairs or None for constant operands."""
+        entry = _Entry(len(self.entries), value, [(s.name, p) for s, p in filter(None, partials)])
+        self.entries.append(entry)
+        return _Symbol(self, f'v{entry.index}')
+
+    def source(self, outputs):
+        """Generates the source of a function evaluating the outputs and their gradients.
+
+        The generated function takes the inputs, an array for the values and an array of zeros for the
+        Jacobian, and fills both in straight-line code: the recorded operations reaching an output,
+        then one adjoint sweep per output with the seed and trivial partials folded away.
+
+        Parameters
+        ======
+        outputs : list
+            The output symbols, or constants for outputs that do not depend on the inputs
+
+        Returns
+        =======
+        str
+            The source of the function `compiled`
+        """
+        entries = {f'v{e.index}': e for e in self.entries}
+        # Only the operations some output depends on are emitted
+        needed = set()
+        for z in outputs:
+            if isinstance(z, _Symbol):
+                needed |= self._reached(z.name, entries)
+        args = ''.join(f'{x.name}, ' for x in self.inputs)
+        lines = [f'def compiled({args}values, jacobian):']
+        for e in self.entries:
+            if f'v{e.index}' in needed:
+                lines.append(f'    v{e.index} = {e.value}')
+        inputs = {x.name: j for j, x in enumerate(self.inputs)}
+        for k, z in enumerate(outputs):
+            if not isinstance(z, _Symbol):
+                lines.append(f'    values[{k}] = {_literal(z)}')
+                continue
+            lines.append(f'    values[{k}] = {z.name}')
+            lines.extend(self._adjoint(k, z.name, entries, inputs))
+        return '\n'.join(lines) + '\n'
+
+    def _adjoint(self, k, output, entries, inputs):
+        """Generates the reverse sweep of one output, returning its lines of source."""
+        lines = []
+        # Adjoints are expressions, the seed of the output is the literal 1
+        adjoint = {output: '1'}
+        order = sorted((entries[name].index for name in self._reached(output, entries)), reverse=True)
+        for i in order:
+            name = f'v{i}'
+            a = adjoint.get(name)
+            if a is None:
+                continue
+            for operand, partial in entries[name].partials:
+                partial = partial.format(z=name)
+                term = _product(a, partial)
+                if operand in adjoint:
+                    term = f'{adjoint[operand]} + {term}'
+                # Names and literals are passed on as they are, anything else is bound to a name
+                elif _simple(term) or term == '-1':
+                    adjoint[operand] = term
+                    continue
+                target = f'a{k}_{operand}'
+                lines.append(f'    {target} = {term}')
+                adjoint[operand] = target
+        for name, j in inputs.items():
+            if name in adjoint:
+                lines.append(f'    jacobian[{k}, {j}] = {adjoint[name]}')
+        return lines
+
+    @staticmethod
+    def _reached(output, entries):
+        """Returns the names of the recorded operations the output depends on."""
+        reached = set()
+        stack = [output]
+        while stack:
+            name = stack.pop()
+            if name in reached or name not in entries:
+                continue
+            reached.add(name)
+            stack.extend(operand for operand, _ in entries[name].partials)
+        return reached
+
+def _product(adjoint, partial):
+    """Returns the source of an adjoint times a partial derivative, folding factors of one."""
+    if adjoint == '1':
+        return partial if _simple(partial) or partial == '-1' else f'({partial})'
+    if partial == '1':
+        return adjoint
+    if adjoint == '-1':
+        return f'-{partial}' if _simple(partial) else f'-({partial})'
+    if partial == '-1':
+        return f'-{adjoint}'
+    return f'{adjoint} * ({partial})' if not _simple(partial) else f'{adjoint} * {partial}'
+
+def _simple(expression):
+    """True for names and non-negative literals, which need no parentheses."""
+    return expression.replace('_', '').replace('.', '').isalnum()
+
+
+class CompiledFunction:
+    """A function and its gradient or Jacobian compiled into straight-line code.
+
+    Calling it evaluates the generated code, with the math module when every input is a python
+    scalar and with numpy otherwise, so arrays of input points are evaluated in one vectorized call.
+
+    Attributes
+    ======
+        source : str
+            The generated source code
+        n_inputs : int
+            The number of inputs of the function(s)
+        n_outputs : int
+            The number of outputs of the function(s)
+        scalar : bool
+            True when a single scalar function was compiled
+
+    Methods
+    ======
+        __call__(inputs)
+            Returns the values and the gradient or Jacobian at the input point(s)
+    """
+
+    def __init__(self, source, n_inputs, n_outputs, scalar):
+        """Constructor for the CompiledFunction class.
+
+        Parameters
+        ======
+        source : str
+            The source of a function `compiled`, as generated from a trace
+        n_inputs, n_outputs : int
+            The number of inputs and outputs
+        scalar : bool
+            True when a single scalar function was compiled
+        """
+        self.source = source
+        self.n_inputs = n_inputs
+        self.n_outputs = n_outputs
+        self.scalar = scalar
+        code = compile(source, '<compiled autodiff function>', 'exec')
+        math_namespace = dict(_MATH_NAMES)
+        numpy_namespace = dict(_NUMPY_NAMES)
+        exec(code, math_namespace)
+        exec(code, numpy_namespace)
+        self._scalar_fn = math_namespace['compiled']
+        self._array_fn = numpy_namespace['compiled']
+
+    def __call__(self, inputs):
+        """Evaluates the function(s) and their derivatives.
+
+        Parameters
+        ======
+        inputs : list
+            The input point, numbers or numpy arrays of points which are broadcast against each other
+
+        Returns
+        =======
+        tuple
+            The value(s) and the gradient or Jacobian. For a single scalar function the value and the
+            gradient of shape (n_inputs,), otherwise the values of shape (n_outputs,) and the Jacobian
+            of shape (n_outputs, n_inputs). Array inputs add their broadcast shape as trailing axes.
+
+        Raises
+        =======
+        ValueError: The compiled function takes [n] inputs
+
+        Examples
+        =======
+        >>> f = Reverse_AD(lambda x, y: x * y + sin(x)).compile([1, 2])
+        >>> value, grad = f([0, 3])
+        >>> print(value, grad)
+        0.0 [4. 0.]
+        """
+        if not isinstance(inputs, (list, tuple, np.ndarray)):
+            inputs = [inputs]
+        if len(inputs) != self.n_inputs:
+            raise ValueError(f"The compiled function takes {self.n_inputs} inputs, got {len(inputs)}")
+        m, n = self.n_outputs, self.n_inputs
+        # Python scalars take the math module fast path, falling back to numpy outside its domain
+        if all(type(x) in (float, int) for x in inputs):
+            values = np.empty(m)
+            jacobian = np.zeros((m, n))
+            try:
+                self._scalar_fn(*inputs, values, jacobian)
+                return self._result(values, jacobian)
+            except _math_errors:
+                pass
+        inputs = [np.asarray(x, dtype=float) for x in inputs]
+        shape = np.broadcast_shapes(*(x.shape for x in inputs))
+        values = np.empty((m,) + shape)
+        jacobian = np.zeros((m, n) + shape)
+        self._array_fn(*inputs, values, jacobian)
+        return self._result(values, jacobian)
+
+    def _result(self, values, jacobian):
+        """Drops the output axis for a single scalar function."""
+        if self.scalar:
+            return values[0], jacobian[0]
+        return values, jacobian
+
+def _register():
+    """Adds symbols to the dispatch tables of the elementary functions."""
+    for table, op in [(ef._SIN, 'sin'), (ef._COS, 'cos'), (ef._TAN, 'tan'),
+                      (ef._ARCSIN, 'arcsin'), (ef._ARCCOS, 'arccos'), (ef._ARCTAN, 'arctan'),
+                      (ef._SINH, 'sinh'), (ef._COSH, 'cosh'), (ef._TANH, 'tanh'),
+                      (ef._EXP, 'exp'), (ef._LOGISTIC, 'logistic')]:
+        table[_Symbol] = lambda x, op=op: x._unary(op)
+    ef._LOG[_Symbol] = lambda x, base: x._log(base)
+
+_register()
+
+def compile_function(fn, n_inputs):
+    """Traces function(s) once and compiles their values and derivatives into straight-line code.
+
+    Parameters
+    ======
+    fn : function or list of functions
+        The function(s) to compile. Every operation must be an operator or elementary function of the
+        package applied to the inputs and scalar constants, without branching on their values.
+    n_inputs : int
+        The number of inputs of the function(s)
+
+    Returns
+    =======
+    CompiledFunction
+        The compiled function, returning the value(s) and the gradient or Jacobian
+
+    Raises
+    =======
+    TypeError: The function applies an operation that cannot be compiled
+    """
+    fns = fn if isinstance(fn, list) else [fn]
+    trace = _Trace(n_inputs)
+    outputs = []
+    scalar = True
+    for f in fns:
+        result = f(*trace.inputs)
+        scalar = _is_scalar(fns, result)
+        outputs.extend(_outputs(result))
+    for z in outputs:
+        if not isinstance(z, (_Symbol,) + _supported_types):
+            raise TypeError(f"Type `{type(z)}` is not supported as the output of a compiled function")
+    return CompiledFunction(trace.source(outputs), n_inputs, len(outputs), scalar)
@@ -1,7 +1,8 @@
 from .elemFunctions import * 
 from .dualNum import DualNumber
+from .node import Node, Trace, backward_jacobian, vector_jacobian_product
 
-_supported_types = (int, float, np.int32, np.int64)
+_supported_types = (int, float, np.int32, np.int64, np.float32, np.float64)
 
 def derivative(fn, x, args=None):
     """Returns derivative of a function.
@@ -39,20 +40,96 @@ def derivative(fn, x, args=None):
 
     return fn(*fn_args)
 
-def gradient(fn, args):
+def _outputs(result):
+    """Returns the outputs of one function evaluation as a list.
+
+    A function may return a single value or a list, tuple or numpy array of values, in which case
+    all of its outputs are traced together by the same evaluation.
+
+    Parameters
+    ==========
+    result : DualNumber, Node, int, float, list, tuple or numpy array
+        The value returned by a function
+
+    Returns
+    ==========
+    list
+        The outputs of the function, one entry per output
+    """
+    if isinstance(result, (list, tuple)):
+        return list(result)
+    elif isinstance(result, np.ndarray):
+        return list(result.ravel())
+    return [result]
+
+def _is_scalar(fn, result):
+    """Returns whether a list of functions describes a single scalar function, given its first result."""
+    return len(fn) == 1 and not isinstance(result, (list, tuple, np.ndarray))
+
+def _seed(args, start, stop):
+    """Returns DualNumber inputs whose dual parts carry a block of tangent directions.
+
+    Parameters
+    ==========
+    args : list of int, float, np.int32, np.int64
+        Values at which the partial derivatives are evalauted at
+    start : int
+        Index of the first input seeded in this block
+    stop : int
+        Index one past the last input seeded in this block
+
+    Returns
+    ==========
+    list of DualNumber
+        Inputs i in [start, stop) carry the unit vector e_(i-start) of length stop-start
+        as their dual part, all other inputs carry a zero dual part
+
+    Examples
+    ==========
+    >>> x, y = _seed([1, 2], 0, 2)
+    >>> print(x.dual, y.dual)
+    [1. 0.] [0. 1.]
+    """
+    directions = np.eye(stop - start)
+    return [DualNumber(arg, directions[i - start]) if start <= i < stop else DualNumber(arg, 0.0)
+            for i, arg in enumerate(args)]
+
+def _check_out(out, shape):
+    """Checks that an output array can hold a result of the given shape in place.
+
+    Raises
+    =======
+        TypeError: out must be a float64 numpy array
+        ValueError: out must have the shape of the result and be writeable
+    """
+    if not isinstance(out, np.ndarray) or out.dtype != np.float64:
+        raise TypeError(f"out must be a float64 numpy array, got {getattr(out, 'dtype', type(out).__name__)}")
+    if out.shape != tuple(shape):
+        raise ValueError(f"out must have shape {tuple(shape)}, got {out.shape}")
+    if not out.flags.writeable:
+        raise ValueError("out must be writeable")
+
+def gradient(fn, args, chunk_size=None, out=None):
     """Returns directional derivative for multivariate functions.
 
+    All partial derivatives are propagated together as a vector of tangents, so the
+    function is evaluated once per chunk of inputs rather than once per input.
+
     Parameters
     ==========
     fn : function
         Defined mulivariable function
     args : int, float, np.int32, np.int64
         Values at which the partial derivatives are evalauted at
+    chunk_size : int, optional
+        Number of partial derivatives propagated per evaluation of fn. Defaults to all of them.
+    out : numpy array, optional
+        Float64 array of shape (n_inputs,) the partial derivatives are written into
 
     Returns
     ==========  
     vector
-        Partial derivatves of function fn -> [df/dx,df/dy]
+        Partial derivatves of function fn -> [df/dx,df/dy], out itself if given
 
     Examples
     ========== 
@@ -60,30 +137,45 @@ def gradient(fn, args):
     >>> def fn(x,y):
     >>>    return x**2 + 3*y
     >>> print(gradient(fn,[1,2]))
-    [2,3]
+    [2.0, 3.0]
 
     """
-    # Initialize empty list which holds gradients of one function 
-    grad = []
-    # For each variable in function, find the derivative at a given value 
-    for i, _ in enumerate(args):
-        grad.append(derivative(fn, i, args).dual)
-    return grad
+    n = len(args)
+    chunk_size = max(n, 1) if chunk_size is None else chunk_size
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+    # Initialize array which holds gradients of one function 
+    if out is not None:
+        _check_out(out, (n,))
+    grad = np.zeros(n) if out is None else out
+    # For each chunk of variables, find all of its partial derivatives in one evaluation 
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        grad[start:stop] = fn(*_seed(args, start, stop)).dual
+    return grad.tolist() if out is None else out
 
-def jacobian(fn, args):
+def jacobian(fn, args, chunk_size=None, out=None):
     """Returns jacobian vector matrix for multivariate functions.
 
+    Functions returning a list of values contribute one row per value, and all of their outputs
+    are differentiated by the same evaluation.
+
     Parameters
     ==========
     fn : function
         Defined mulivariable function(s)
     args : int, float, np.int32, np.int64
         Values at which the partial derivatives are evalauted at
+    chunk_size : int, optional
+        Number of partial derivatives propagated per evaluation of each function. Defaults to all of them.
+    out : numpy array, optional
+        Float64 array of shape (n_outputs, n_inputs) the partial derivatives are written into
 
     Returns
     ==========  
     matrix (numpy array)
-        First order partial derivatves of function(s) fn -> [df1/dx,df1/dy],[df2/dx,df2/dy]
+        First order partial derivatves of function(s) fn -> [df1/dx,df1/dy],[df2/dx,df2/dy], out
+        itself if given
 
     Examples
     ========== 
@@ -94,16 +186,433 @@ def jacobian(fn, args):
     >>> print(jacobian([fn1,fn2],[0,0]))
     [[1. 2.]
     [2. 0.]]
+    >>> def fn3(x,y):
+    >>>     return [x + 2*y, 2*x + cos(y)]
+    >>> print(jacobian([fn3],[0,0]))
+    [[1. 2.]
+    [2. 0.]]
     
     """
-    # Initialize jacobian which holds gradients of each function provided 
-    jacob = []
-    # For each function, calculate the gradiant and append to the jacobian matrix 
-    for i in fn:
-        jacob.append(gradient(i, args))
-    return np.array(jacob)
+    return _jacobian(fn, args, chunk_size, out, check=True)[1]
+
+def value_and_jacobian(fn, args, chunk_size=None):
+    """Returns the values and the jacobian of function(s) from the same evaluations.
+
+    The real parts of the seeded evaluation are the values of the functions, so they are not
+    evaluated a second time as get_values followed by jacobian would.
+
+    Parameters
+    ==========
+    fn : list of functions
+        Defined mulivariable function(s)
+    args : int, float, np.int32, np.int64
+        Values at which the functions and their partial derivatives are evalauted at
+    chunk_size : int, optional
+        Number of partial derivatives propagated per evaluation of each function. Defaults to all of them.
+
+    Returns
+    ==========
+    tuple
+        Values of the function(s) (numpy array) and their first order partial derivatives (numpy array)
+
+    Examples
+    ==========
+    >>> def fn(x,y):
+    >>>     return [x * y, x + y]
+    >>> values, jacob = value_and_jacobian([fn], [2, 3])
+    >>> print(values, jacob)
+    [6. 5.] [[3. 2.]
+     [1. 1.]]
+    """
+    values, jacob, _ = _jacobian(fn, args, chunk_size)
+    return values, jacob
+
+def jacobian_blocks(fn, args, block_size=64, mode='forward'):
+    """Returns a generator of the jacobian of function(s) in blocks, each computed when requested.
+
+    Forward mode yields blocks of columns, one evaluation of the function(s) with block_size
+    tangents each. Reverse mode traces the function(s) once and yields blocks of rows, one
+    backward sweep per row, releasing the trace once the generator is exhausted or closed. Only
+    one block exists at a time, so consumers can reduce the blocks or write them out without
+    ever holding the whole matrix.
+
+    Parameters
+    ==========
+    fn : function or list of functions
+        Defined mulivariable function(s)
+    args : list of int, float, np.int32, np.int64
+        Values at which the partial derivatives are evalauted at
+    block_size : int
+        Number of columns (forward mode) or rows (reverse mode) per block
+    mode : str
+        'forward' or 'reverse'
+
+    Returns
+    ==========
+    generator of tuple
+        The first column or row of the block, one past its last one, and the block (numpy array),
+        of shape (n_outputs, columns) in forward mode or (rows, n_inputs) in reverse mode
+
+    Raises
+    =======
+    ValueError: Block size must be positive
+    ValueError: Mode `[mode]` is not supported
+
+    Examples
+    ==========
+    >>> def fn(x, y, z):
+    >>>     return [x * y, y * z]
+    >>> for start, stop, block in jacobian_blocks(fn, [1, 2, 3], block_size=2):
+    >>>     print(start, stop, block.tolist())
+    0 2 [[2.0, 1.0], [0.0, 3.0]]
+    2 3 [[0.0], [2.0]]
+    """
+    if block_size < 1:
+        raise ValueError(f"Block size must be positive, got {block_size}")
+    if mode not in ('forward', 'reverse'):
+        raise ValueError(f"Mode `{mode}` is not supported, choose 'forward' or 'reverse'")
+    blocks = _column_blocks if mode == 'forward' else _row_blocks
+    return blocks(_fns(fn), list(args), block_size)
+
+def _column_blocks(fn, args, block_size):
+    """Yields blocks of columns of the jacobian, one evaluation of the function(s) per block."""
+    n = len(args)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        seeds = _seed(args, start, stop)
+        outputs = [out for f in fn for out in _outputs(f(*seeds))]
+        block = np.zeros((len(outputs), stop - start))
+        for k, out in enumerate(outputs):
+            # Outputs that do not depend on the inputs have rows of zeros
+            if isinstance(out, DualNumber):
+                block[k] = out.dual
+        yield start, stop, block
+
+def _row_blocks(fn, args, block_size):
+    """Yields blocks of rows of the jacobian from one trace, one backward sweep per row."""
+    with Trace() as trace:
+        inputs = trace.variables(args)
+        outputs = [out for f in fn for out in _outputs(f(*inputs))]
+        for start in range(0, len(outputs), block_size):
+            stop = min(start + block_size, len(outputs))
+            block = np.zeros((stop - start, len(inputs)))
+            # Outputs that do not depend on the inputs have rows of zeros
+            rows = [k for k in range(start, stop) if isinstance(outputs[k], Node)]
+            if rows:
+                block[[k - start for k in rows]] = backward_jacobian([outputs[k] for k in rows], inputs)
+            yield start, stop, block
+
+def _seeded_outputs(fn, args, start, stop):
+    """Evaluates the function(s) with the inputs [start, stop) seeded, returning every output and
+    whether fn is a single function returning a single value."""
+    seeds = _seed(args, start, stop)
+    outputs = []
+    scalar = True
+    for f in fn:
+        result = f(*seeds)
+        scalar = _is_scalar(fn, result)
+        outputs.extend(_outputs(result))
+    return outputs, scalar
+
+def _jacobian(fn, args, chunk_size=None, out=None, check=False):
+    """Returns the values and jacobian of function(s) and whether they describe a single scalar function.
+
+    Parameters
+    ==========
+    fn : list of functions
+        Defined mulivariable function(s)
+    args : int, float, np.int32, np.int64
+        Values at which the partial derivatives are evalauted at
+    chunk_size : int, optional
+        Number of partial derivatives propagated per evaluation of each function
+    out : numpy array, optional
+        Float64 array of shape (n_outputs, n_inputs) the jacobian is written into, trusted to fit
+        unless check is set
+    check : bool
+        Check out against the jacobian once the first chunk gives the number of outputs
+
+    Returns
+    ==========
+    tuple
+        The values (numpy array), the jacobian (numpy array) and True if fn is a single function
+        returning a single value
+    """
+    n = len(args)
+    chunk_size = max(n, 1) if chunk_size is None else chunk_size
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+    # Every function is evaluated once per chunk of seeded inputs, without inputs only for its values
+    first = min(chunk_size, n)
+    outputs, scalar = _seeded_outputs(fn, args, 0, first)
+    # The real parts are the same for every chunk, they are read from the first one
+    values = np.array([output.real if isinstance(output, DualNumber) else output for output in outputs],
+                      dtype=float)
+    if out is None:
+        jacob = np.zeros((len(outputs), n))
+    else:
+        if check:
+            _check_out(out, (len(outputs), n))
+        jacob = out
+    # Outputs that do not depend on the inputs have rows of zeros
+    for k, output in enumerate(outputs):
+        jacob[k, :first] = output.dual if isinstance(output, DualNumber) else 0.0
+    for start in range(first, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        outputs, scalar = _seeded_outputs(fn, args, start, stop)
+        for k, output in enumerate(outputs):
+            jacob[k, start:stop] = output.dual if isinstance(output, DualNumber) else 0.0
+    return values, jacob, scalar
+
+def _fns(fn):
+    """Returns a function or list of functions as a list."""
+    return fn if isinstance(fn, list) else [fn]
+
+def _vector(v, length, name):
+    """Returns a vector as a float array, checking it has the expected length.
+
+    Raises
+    =======
+        ValueError: The vector must have [length] entries
+    """
+    v = np.asarray(v, dtype=float).reshape(-1)
+    if v.shape != (length,):
+        raise ValueError(f"The {name} must have {length} entries, got {v.shape[0]}")
+    return v
+
+def jvp(fn, args, v):
+    """Returns the product of the jacobian of function(s) with a vector, without forming the jacobian.
+
+    The dual parts of the inputs are seeded with v, so every function is evaluated once.
+
+    Parameters
+    ==========
+    fn : function or list of functions
+        Defined mulivariable function(s)
+    args : int, float, np.int32, np.int64
+        Values at which the partial derivatives are evalauted at
+    v : array-like
+        The vector, one entry per input
+
+    Returns
+    ==========
+    float or numpy array
+        The directional derivative of a single scalar function, otherwise one entry per output
+
+    Raises
+    =======
+        ValueError: The tangent vector must have one entry per input
+
+    Examples
+    ==========
+    >>> def fn(x, y):
+    >>>     return [x * y, x + 2*y]
+    >>> print(jvp(fn, [2, 3], [1, 1]))
+    [5. 3.]
+    """
+    fns = _fns(fn)
+    v = _vector(v, len(args), 'tangent vector')
+    seeds = [DualNumber(arg, v[i]) for i, arg in enumerate(args)]
+    duals = []
+    scalar = True
+    for f in fns:
+        result = f(*seeds)
+        scalar = _is_scalar(fns, result)
+        # Outputs that do not depend on the inputs have no dual part
+        duals.extend(out.dual if isinstance(out, DualNumber) else 0.0 for out in _outputs(result))
+    product = np.array(duals, dtype=float)
+    return product[0] if scalar else product
+
+def vjp(fn, args, u):
+    """Returns the product of a vector with the jacobian of function(s), without forming the jacobian.
+
+    Every function is traced once through Node objects and the adjoints of the outputs are seeded
+    with u, so a single reverse sweep gives the product.
+
+    Parameters
+    ==========
+    fn : function or list of functions
+        Defined mulivariable function(s)
+    args : int, float, np.int32, np.int64
+        Values at which the partial derivatives are evalauted at
+    u : array-like
+        The vector, one entry per output
+
+    Returns
+    ==========
+    numpy array
+        The product, one entry per input
+
+    Raises
+    =======
+        ValueError: The adjoint vector must have one entry per output
+
+    Examples
+    ==========
+    >>> def fn(x, y):
+    >>>     return [x * y, x + 2*y]
+    >>> print(vjp(fn, [2, 3], [1, 1]))
+    [4. 4.]
+    """
+    with Trace() as trace:
+        inputs = trace.variables(args)
+        outputs = [out for f in _fns(fn) for out in _outputs(f(*inputs))]
+        u = _vector(u, len(outputs), 'adjoint vector')
+        # Outputs that do not depend on the inputs contribute nothing
+        traced = [(out, seed) for out, seed in zip(outputs, u) if isinstance(out, Node)]
+        return vector_jacobian_product([out for out, _ in traced], inputs, [seed for _, seed in traced])
+
+def _as_points(points):
+    """Returns batched input points as a float array of shape (n_points, n_inputs).
+
+    Parameters
+    ==========
+    points : array-like
+        Input points, one row per point. A one dimensional input is read as one input per point.
+
+    Returns
+    ==========
+    numpy array
+        Input points of shape (n_points, n_inputs)
+
+    Raises
+    =======
+        ValueError: Points must be a one or two dimensional array
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim == 1:
+        points = points.reshape(-1, 1)
+    elif points.ndim != 2:
+        raise ValueError(
+            f"Points must be a one or two dimensional array, got {points.ndim} dimensions"
+            )
+    return points
+
+def values_batch(fn, points):
+    """Get values of input function(s) evaluated at many input points at once.
+
+    Each function is called once with DualNumber inputs whose real parts hold every point,
+    so the elementary functions run as single vectorized numpy calls.
+
+    Parameters
+    ==========
+    fn : list of functions
+        Defined mulivariable variable function(s)
+    points : array-like
+        Input points of shape (n_points, n_inputs)
+
+    Returns
+    ==========
+    numpy array
+        Values of shape (n_points, n_outputs)
+
+    Examples
+    ==========
+    >>> def fn(x, y):
+    >>>     return x * y
+    >>> print(values_batch([fn], [[1, 2], [3, 4]]))
+    [[ 2.]
+     [12.]]
+    """
+    points = _as_points(points)
+    inputs = [DualNumber(points[:, i], 0.0) for i in range(points.shape[1])]
+    outputs = [out for f in fn for out in _outputs(f(*inputs))]
+    vals = np.empty((points.shape[0], len(outputs)))
+    for k, out in enumerate(outputs):
+        vals[:, k] = out.real if isinstance(out, DualNumber) else out
+    return vals
+
+def jacobian_batch(fn, points):
+    """Returns the jacobian of input function(s) at many input points at once.
+
+    The real parts of the inputs hold every point and the dual parts hold one tangent per
+    input, laid out as (n_inputs, n_points), so each function is evaluated a single time.
+
+    Parameters
+    ==========
+    fn : list of functions
+        Defined mulivariable function(s)
+    points : array-like
+        Input points of shape (n_points, n_inputs)
+
+    Returns
+    ==========
+    numpy array
+        First order partial derivatives of shape (n_points, n_outputs, n_inputs)
+
+    Examples
+    ==========
+    >>> def fn(x, y):
+    >>>     return x * y
+    >>> print(jacobian_batch([fn], [[1, 2], [3, 4]]))
+    [[[2. 1.]]
+     [[4. 3.]]]
+    """
+    return _batch_forward(fn, points)[1]
+
+def _batch_forward(fn, points):
+    """Returns the values and the jacobian of function(s) at many input points from one evaluation.
+
+    Parameters
+    ==========
+    fn : list of functions
+        Defined mulivariable function(s)
+    points : array-like
+        Input points of shape (n_points, n_inputs)
+
+    Returns
+    ==========
+    tuple
+        Values of shape (n_points, n_outputs) and first order partial derivatives of shape
+        (n_points, n_outputs, n_inputs)
+    """
+    points = _as_points(points)
+    n_points, n = points.shape
+    # Tangents broadcast against the points, so each seed only stores one column
+    directions = np.eye(n)[:, :, np.newaxis]
+    inputs = [DualNumber(points[:, i], directions[i]) for i in range(n)]
+    outputs = [out for f in fn for out in _outputs(f(*inputs))]
+    vals = np.empty((n_points, len(outputs)))
+    jacob = np.empty((n_points, len(outputs), n))
+    for k, out in enumerate(outputs):
+        if not isinstance(out, DualNumber):
+            # Outputs that do not depend on the inputs have rows of zeros
+            vals[:, k], jacob[:, k, :] = out, 0.0
+            continue
+        vals[:, k] = out.real
+        jacob[:, k, :] = np.broadcast_to(out.dual, (n, n_points)).T
+    return vals, jacob
+
+def _batch_reverse(fn, points):
+    """Returns the values and the jacobian of function(s) at many input points from one trace.
+
+    Every Node holds a numpy array with one value per point, so one graph and one reverse pass per
+    output cover the whole batch.
+
+    Parameters
+    ==========
+    fn : list of functions
+        Defined mulivariable function(s)
+    points : array-like
+        Input points of shape (n_points, n_inputs)
+
+    Returns
+    ==========
+    tuple
+        Values of shape (n_points, n_outputs) and first order partial derivatives of shape
+        (n_points, n_outputs, n_inputs)
+    """
+    points = _as_points(points)
+    n_points, n = points.shape
+    with Trace() as trace:
+        input_nodes = trace.variables(points[:, i] for i in range(n))
+        outputs = [z for f in fn for z in _outputs(f(*input_nodes))]
+        vals = np.empty((n_points, len(outputs)))
+        for k, out in enumerate(outputs):
+            vals[:, k] = out.value
+        jacob = backward_jacobian(outputs, input_nodes, np.ones(n_points))
+    return vals, jacob.transpose(2, 0, 1)
 
-def get_values(fn, args):
+def get_values(fn, args, out=None):
     """Get values of input function(s) evaluated at input args.
     Parameters
     ==========
@@ -111,11 +620,13 @@ def get_values(fn, args):
         Defined mulivariable variable function(s)
     args : int, float, np.int32, np.int64
         Values at which the partial derivatives are evalauted at
+    out : numpy array, optional
+        Array of shape (n_outputs,) the values are written into, trusted to fit
 
     Returns
     ==========  
     numpy array
-        Values of input function(s) fn evaluated at input args
+        Values of input function(s) fn evaluated at input args, out itself if given
     
     Examples
     ==========
@@ -147,12 +658,18 @@ def get_values(fn, args):
     else:
         # Initialize empty list which holds values
         v = []
-        # For each function, append the evaluated function into v
+        k = 0
+        # For each function, append the evaluated function into v, or write it into out
         for f in fn:
             if not callable(f):
                 raise TypeError(
                 f"Type `{type(f)}` is not supported for non-function type"
                 )
-            v.append(f(*args))
-        return np.array(v)
+            results = _outputs(f(*args))
+            if out is None:
+                v.extend(results)
+            else:
+                out[k:k + len(results)] = results
+                k += len(results)
+        return np.array(v) if out is None else out
 
@@ -1,7 +1,17 @@
 from .elemFunctions import *
 from .dualNum import DualNumber
-from .node import Node
+from .node import Node, Trace, backward_jacobian
+from .tape import Tape, TapeNode
+from .compiler import compile_function
+from .cache import ResultCache
+from .parallel import ParallelJacobian, BatchResult
+from .stats import DriverStats
+from .sparse import sparsity_pattern, color_columns, sparse_jacobian
 from .differentiation import *
+from .differentiation import _as_points, _jacobian, _outputs, _is_scalar, _batch_reverse, _check_out
+import time
+import weakref
+from collections import deque
 import numpy as np
 
 class Forward_AD():
@@ -17,6 +27,14 @@ class Forward_AD():
             The input points at which to evaluate the function(s)
         der : matrix (numpy array)
             The gradient or Jacobian of the function(s) at the input points
+        chunk_size : int or None
+            Number of partial derivatives propagated per function evaluation (all of them if None)
+        cache : ResultCache or None
+            The cache of recent results, None unless a cache budget is given
+        workers : int or None
+            The number of worker processes the Jacobian is split across, computed serially if None
+        stats : DriverStats or None
+            Counters, graph statistics and latencies of the calls, None unless stats are enabled
 
     Methods
     ======
@@ -28,17 +46,66 @@ class Forward_AD():
             Calculates the function values stored in the class instance at the input values. Calls set_inputs.
         grad(inputs)
             Calculates the gradient or Jacobian of the function stored in the class instance at the input values. Calls set_inputs.
+        value_and_grad(inputs)
+            Calculates the function values and the gradient or Jacobian from a single evaluation. Calls set_inputs.
+        jvp(inputs, v)
+            Calculates the product of the Jacobian with a vector from one forward pass.
+        vjp(inputs, u)
+            Calculates the product of a vector with the Jacobian from one reverse sweep.
+        values_batch(points)
+            Calculates the function values at many input points in one vectorized evaluation.
+        grad_batch(points)
+            Calculates the Jacobian at many input points in one vectorized evaluation.
+        evaluate_batch(points)
+            Calculates the values and Jacobians at many input points in chunks on a pool of workers.
+        sparse_grad(inputs)
+            Calculates a sparse Jacobian with one forward pass per column color, in CSR format.
+        jacobian_blocks(inputs, block_size)
+            Yields the Jacobian in blocks of columns as they are computed.
+        close()
+            Shuts down the worker processes, if any.
+        enable_stats(), disable_stats()
+            Starts and stops counting operations, evaluations and latencies in stats.
     """
+    # The mode of the batch evaluation on workers
+    _mode = 'forward'
 
-    def __init__(self, fn):
+    def __init__(self, fn, chunk_size=None, cache_size=None, cache_bytes=None, workers=None, stats=False):
         """Constructor for the Forward_AD class.
 
         Parameters
         ======
         fn : (function or list of functions)
             The function or list of functions to differentiate
+        chunk_size : int, optional
+            Number of partial derivatives propagated per function evaluation. By default every
+            partial derivative is carried in one vector of tangents, so each function is evaluated once.
+        cache_size : int, optional
+            Keep the results at this many recently used input points. No results are cached unless
+            cache_size or cache_bytes is given.
+        cache_bytes : int, optional
+            Keep recently used results up to this many bytes of arrays
+        workers : int, optional
+            Split the columns of the Jacobian across this many worker processes, for functions
+            expensive enough to outweigh sending the inputs and results between processes
+        stats : bool
+            Count operations, evaluations and latencies of every call in the stats attribute. The
+            operations are only hooked while stats are enabled, and cost nothing otherwise.
         """
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self._pool = None
+        self.stats = None
+        self.cache = None
+        if cache_size is not None or cache_bytes is not None:
+            self.cache = ResultCache(cache_size, cache_bytes)
+        # Sparsity pattern and column colors, for every number of inputs seen by sparse_grad
+        self._sparsity = {}
+        # Output arrays already checked, by quantity and number of inputs
+        self._outs = {}
         self.set_fn(fn)
+        if stats:
+            self.enable_stats()
 
     # setter method for functions
     def set_fn(self, fn):
@@ -53,6 +120,17 @@ class Forward_AD():
             self.fn = [fn]
         else:
             self.fn = fn
+        # Evaluations are counted by wrappers of the functions while stats are enabled
+        self._plain_fn = self.fn
+        if self.stats is not None:
+            self.fn = self.stats._counting(self.fn)
+        # results of the previous function are no longer valid
+        if self.cache is not None:
+            self.cache.clear()
+        self._sparsity.clear()
+        self._outs.clear()
+        # The workers hold the previous function, new ones are started on the next call
+        self.close()
 
     # setter method for inputs values 
     def set_inputs(self, input_vals):
@@ -75,49 +153,446 @@ class Forward_AD():
         return self.inputs
 
     # getter method for evaluated function using input values 
-    def values(self, inputs):
+    def values(self, inputs, out=None):
         """Get the values of the function(s) evaluated at the input points.
         
         Parameters
         ======
         inputs : list
             The input points at which to evaluate the function(s).
+        out : numpy array, optional
+            Float64 array of shape (n_outputs,) the values are written into. It is checked on its
+            first use only, later calls with the same array write into it directly.
         
         Returns
         =======
         numpy array
-            The values of the function(s) evaluated at the input points
+            The values of the function(s) evaluated at the input points, out itself if given
         """
-        self.val = [] # reset values after previous use of class instance
-        self.val = np.asarray(get_values(self.fn, self.set_inputs(inputs)))
+        if out is not None:
+            return self._into('values', inputs, out)
+        if self.stats is not None:
+            return self.stats._measure(self._cached_values, inputs)
+        return self._cached_values(inputs)
+
+    def _cached_values(self, inputs):
+        """Evaluates the function(s) at the input points, answering from the cache when possible."""
+        key = self._lookup('values', inputs)
+        if key is None:
+            return self.val
+        self.val = self._values(inputs)
+        if key is not True:
+            self.val = self.cache.put(key, self.val)
         return self.val
 
+    def _values(self, inputs, out=None):
+        """Evaluates the function(s) at the input points, without the cache, into out if given."""
+        self.val = [] # reset values after previous use of class instance
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+        values = np.asarray(get_values(self.fn, self.set_inputs(inputs), out))
+        if stats is not None:
+            stats._phase('forward', time.perf_counter() - start)
+        return values
+
     # getter method for derivatives using forward mode 
-    def grad(self, inputs):
+    def grad(self, inputs, out=None):
         """Get the derivatives of the function(s) at the input point(s) using forward mode.
         
         Parameters
         ======
         inputs : list
             The input points at which to evaluate the derivatives of the function(s).
+        out : numpy array, optional
+            Float64 array of the shape of the gradient or Jacobian it is written into. It is
+            checked on its first use only, later calls with the same array write into it directly.
         
         Returns
         =======
         matrix (numpy array)
-            The values of the first order partial derivatves of the function(s) evaluated at the input points
+            The values of the first order partial derivatves of the function(s) evaluated at the input points,
+            out itself if given
         """
         self.der = []
         # If no function provided, return index error 
         if len(self.fn) == 0:
             return IndexError('Need at least one function input') 
-        # If single function, return gradient of list type 
-        elif len(self.fn) == 1: 
-            self.der = np.asarray(gradient(self.fn[0], self.set_inputs(inputs)))
-            return self.der
-        # If vector of functions, return jacobian of numpy array type 
+        if out is not None:
+            return self._into('grad', inputs, out)
+        return self.value_and_grad(inputs)[1]
+
+    def value_and_grad(self, inputs):
+        """Get the values and the derivatives of the function(s) from a single evaluation using forward mode.
+
+        Parameters
+        ======
+        inputs : list
+            The input points at which to evaluate the function(s) and their derivatives.
+
+        Returns
+        =======
+        tuple
+            The values of the function(s) (numpy array) and the gradient or Jacobian (numpy array)
+
+        Examples
+        =======
+        >>> ad = Forward_AD(lambda x: x**3 + sin(x))
+        >>> value, der = ad.value_and_grad([0])
+        >>> print(value, der)
+        [0.] [1.]
+        """
+        if self.stats is not None:
+            return self.stats._measure(self._cached_value_and_grad, inputs)
+        return self._cached_value_and_grad(inputs)
+
+    def _cached_value_and_grad(self, inputs):
+        """Differentiates the function(s) at the input points, answering from the cache when possible."""
+        key = self._lookup('value_and_grad', inputs)
+        if key is None:
+            return self.val, self.der
+        result = self._value_and_grad(inputs)
+        if key is not True:
+            result = self.cache.put(key, result)
+        self.val, self.der = result
+        return result
+
+    def _value_and_grad(self, inputs, out=None):
+        """Differentiates the function(s) at the input points, without the cache, into out if given."""
+        if self.workers is not None:
+            return self._parallel_value_and_grad('forward', inputs)
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+        # A gradient is written into the single row of a Jacobian viewing it
+        jacob_out = out if out is None or out.ndim == 2 else out[np.newaxis]
+        # Every output of every function is differentiated by one evaluation per chunk of inputs
+        values, jacob, scalar = _jacobian(self.fn, self.set_inputs(inputs), self.chunk_size, jacob_out)
+        if stats is not None:
+            stats._phase('forward', time.perf_counter() - start)
+        if out is not None:
+            return values, out
+        # If single scalar function, return gradient, otherwise return jacobian of numpy array type 
+        return values, jacob[0] if scalar else jacob
+
+    def _into(self, quantity, inputs, out):
+        """Writes the values or the derivatives at the input points into an output array.
+
+        The first call with an array checks it against a result computed as usual. Later calls with
+        the same array and number of inputs skip the checks and, without a cache, evaluate straight
+        into it.
+
+        Parameters
+        ======
+        quantity : str
+            'values' or 'grad'
+        inputs : list
+            The input points
+        out : numpy array
+            The output array
+
+        Returns
+        =======
+        numpy array
+            out
+
+        Raises
+        =======
+        TypeError: out must be a float64 numpy array
+        ValueError: out must have the shape of the result and be writeable
+        """
+        key = (quantity, len(inputs) if isinstance(inputs, list) else 1)
+        checked = self._outs.get(key) is out
+        if checked and self.cache is None:
+            method = self._values if quantity == 'values' else self._value_and_grad
+            if self.stats is not None:
+                result = self.stats._measure(method, inputs, out)
+            else:
+                result = method(inputs, out)
+            result = result if quantity == 'values' else result[1]
+            # Worker processes and timed modes return their own arrays
+            if result is not out:
+                np.copyto(out, result)
+        else:
+            result = self.values(inputs) if quantity == 'values' else self.value_and_grad(inputs)[1]
+            if not checked:
+                _check_out(out, np.shape(result))
+                self._outs[key] = out
+            np.copyto(out, result)
+        if quantity == 'values':
+            self.val = out
         else:
-            self.der = jacobian(self.fn, self.set_inputs(inputs))
-            return self.der
+            self.der = out
+        return out
+
+    def _parallel_value_and_grad(self, mode, inputs):
+        """Differentiates the function(s) on the worker processes, starting them on the first call."""
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+        self.inputs = inputs
+        if self._pool is None:
+            self._pool = ParallelJacobian(self.fn, self.workers, mode)
+        values, jacob, scalar = self._pool.value_and_jacobian(inputs)
+        return values, jacob[0] if scalar else jacob
+
+    def close(self):
+        """Shuts down the worker processes started for workers, they are started again when needed."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def enable_stats(self):
+        """Starts counting the operations, evaluations, graphs and latencies of every call in stats.
+
+        The elementary functions and operators are hooked until the stats of every driver are
+        disabled, or their drivers are garbage collected.
+
+        Returns
+        =======
+        DriverStats
+            The stats, kept if they were already enabled
+        """
+        if self.stats is None:
+            self.stats = DriverStats()
+            self.stats._attach()
+            self._stats_finalizer = weakref.finalize(self, self.stats._detach)
+            self.fn = self.stats._counting(self._plain_fn)
+        return self.stats
+
+    def disable_stats(self):
+        """Stops counting, removing the hooks unless another driver still has its stats enabled.
+
+        Returns
+        =======
+        DriverStats or None
+            The final stats, None if they were not enabled
+        """
+        stats = self.stats
+        if stats is not None:
+            self._stats_finalizer()
+            self.stats = None
+            self.fn = self._plain_fn
+        return stats
+
+    def jvp(self, inputs, v):
+        """Get the product of the Jacobian with a vector from one forward pass, without forming the Jacobian.
+
+        Parameters
+        ======
+        inputs : list
+            The input points at which to evaluate the derivatives of the function(s).
+        v : array-like
+            The vector, one entry per input
+
+        Returns
+        =======
+        float or numpy array
+            The directional derivative of a single scalar function, otherwise one entry per output
+
+        Examples
+        =======
+        >>> ad = Forward_AD(lambda x, y: [x * y, x + y])
+        >>> print(ad.jvp([2, 3], [1, 0]))
+        [3. 1.]
+        """
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+        return jvp(self.fn, inputs, v)
+
+    def vjp(self, inputs, u):
+        """Get the product of a vector with the Jacobian from one reverse sweep, without forming the Jacobian.
+
+        Parameters
+        ======
+        inputs : list
+            The input points at which to evaluate the derivatives of the function(s).
+        u : array-like
+            The vector, one entry per output
+
+        Returns
+        =======
+        numpy array
+            The product, one entry per input
+
+        Examples
+        =======
+        >>> ad = Forward_AD(lambda x, y: [x * y, x + y])
+        >>> print(ad.vjp([2, 3], [1, 0]))
+        [3. 2.]
+        """
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+        return vjp(self.fn, inputs, u)
+
+    def _lookup(self, quantity, inputs):
+        """Looks up a quantity at an input point in the cache.
+
+        Cached values are also answered from a cached value and gradient at the same point.
+
+        Parameters
+        ======
+        quantity : str
+            'values' or 'value_and_grad'
+        inputs : list
+            The input point
+
+        Returns
+        =======
+        tuple, bool or None
+            None if the result was found and stored in val and der, otherwise the key to cache the
+            computed result under, or True if the result is not cached
+        """
+        if self.cache is None:
+            return True
+        key = self.cache.key(quantity, inputs)
+        if key is None:
+            return True
+        if quantity == 'values':
+            both = self.cache.peek(self.cache.key('value_and_grad', inputs))
+            if both is not None:
+                self.cache.hits += 1
+                self.val = both[0]
+                return None
+        result = self.cache.get(key)
+        if result is None:
+            return key
+        if quantity == 'values':
+            self.val = result
+        else:
+            self.val, self.der = result
+        return None
+
+    def values_batch(self, points):
+        """Get the values of the function(s) evaluated at many input points at once.
+
+        Parameters
+        ======
+        points : array-like
+            The input points, of shape (n_points, n_inputs)
+
+        Returns
+        =======
+        numpy array
+            The values of the function(s), of shape (n_points, n_outputs)
+        """
+        return values_batch(self.fn, points)
+
+    def grad_batch(self, points):
+        """Get the derivatives of the function(s) at many input points at once using forward mode.
+
+        Parameters
+        ======
+        points : array-like
+            The input points, of shape (n_points, n_inputs)
+
+        Returns
+        =======
+        numpy array
+            The first order partial derivatives, of shape (n_points, n_outputs, n_inputs)
+        """
+        return jacobian_batch(self.fn, points)
+
+    def evaluate_batch(self, points, chunk_size=1024, workers=None, executor='thread', callback=None):
+        """Get the values and derivatives of the function(s) at many input points on a pool of workers.
+
+        The points are split into chunks of chunk_size, every chunk is evaluated by the vectorized
+        batch path of this driver's mode, and the results are written into preallocated arrays,
+        through shared memory when the workers are processes. The call returns as soon as the chunks
+        are submitted.
+
+        Parameters
+        ======
+        points : array-like
+            The input points, of shape (n_points, n_inputs)
+        chunk_size : int
+            The number of points evaluated together by one task
+        workers : int, optional
+            The number of workers, the number of CPUs by default
+        executor : str
+            'thread' for functions spending their time in numpy, 'process' for functions spending
+            it in Python
+        callback : function, optional
+            Called with the BatchResult whenever a chunk has finished
+
+        Returns
+        =======
+        BatchResult
+            The values and Jacobians, with the progress and throughput of the evaluation
+
+        Examples
+        =======
+        >>> ad = Forward_AD(lambda x, y: x * y)
+        >>> with ad.evaluate_batch(np.random.rand(10 ** 6, 2), executor='process') as batch:
+        >>>     batch.wait()
+        >>>     print(batch.jacobians.shape, batch.points_per_second)
+        (1000000, 1, 2) ...
+        """
+        return BatchResult(self.fn, points, self._mode, chunk_size, workers, executor, callback)
+
+    def sparse_grad(self, inputs, retrace=False):
+        """Get the Jacobian of function(s) with a sparse structure using compressed forward passes.
+
+        The sparsity pattern is traced and its columns are colored on the first call with a given
+        number of inputs, later calls reuse them and only evaluate the function(s) once with one
+        tangent per color.
+
+        Parameters
+        ======
+        inputs : list
+            The input points at which to evaluate the derivatives of the function(s).
+        retrace : bool
+            Trace the pattern again, for functions whose pattern changes with the inputs
+
+        Returns
+        =======
+        SparseJacobian
+            The first order partial derivatives in compressed sparse row format
+
+        Examples
+        =======
+        >>> ad = Forward_AD(lambda x, y, z: [x * y, z ** 2])
+        >>> print(ad.sparse_grad([1, 2, 3]).toarray())
+        [[2. 1. 0.]
+         [0. 0. 6.]]
+        """
+        inputs = self.set_inputs(inputs)
+        structure = self._sparsity.get(len(inputs))
+        if structure is None or retrace:
+            pattern = sparsity_pattern(self.fn, inputs)
+            structure = self._sparsity[len(inputs)] = (pattern, color_columns(pattern))
+        jac = sparse_jacobian(self.fn, inputs, *structure)
+        self.der = jac
+        return jac
+
+    def jacobian_blocks(self, inputs, block_size=64):
+        """Get the Jacobian of the function(s) in blocks, each computed when the generator reaches it.
+
+        Forward mode yields blocks of columns, reverse mode blocks of rows from a single trace, so
+        a Jacobian too large for memory can be reduced or written out one block at a time.
+
+        Parameters
+        ======
+        inputs : list
+            The input points at which to evaluate the derivatives of the function(s).
+        block_size : int
+            Number of columns (forward mode) or rows (reverse mode) per block
+
+        Returns
+        =======
+        generator of tuple
+            The first column or row of every block, one past its last one, and the block (numpy
+            array)
+
+        Examples
+        =======
+        >>> ad = Reverse_AD(lambda x, y: [x * y, x + y, x - y])
+        >>> norms = [np.linalg.norm(block, axis=1) for _, _, block in ad.jacobian_blocks([2, 3], block_size=2)]
+        >>> print(np.concatenate(norms))
+        [3.60555128 1.41421356 1.41421356]
+        """
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+        return jacobian_blocks(self.fn, inputs, block_size, self._mode)
 
 class Reverse_AD(Forward_AD):
     """A class for performing reverse mode automatic differentiation.
@@ -132,6 +607,12 @@ class Reverse_AD(Forward_AD):
             The input points at which to evaluate the function(s)
         der : matrix (numpy array)
             The gradient or Jacobian of the function(s) at the input points
+        cache : ResultCache or None
+            The cache of recent results, None unless a cache budget is given
+        workers : int or None
+            The number of worker processes the Jacobian is split across, computed serially if None
+        stats : DriverStats or None
+            Counters, graph statistics and latencies of the calls, None unless stats are enabled
 
     Methods
     ======
@@ -143,16 +624,64 @@ class Reverse_AD(Forward_AD):
             Calculates the function values stored in the class instance at the input values. Calls set_inputs.
         grad(inputs)
             Calculates the gradient or Jacobian of the function stored in the class instance at the input values. Calls set_inputs.
+        value_and_grad(inputs)
+            Calculates the function values and the gradient or Jacobian from a single evaluation. Calls set_inputs.
+        jvp(inputs, v)
+            Calculates the product of the Jacobian with a vector from one forward pass.
+        vjp(inputs, u)
+            Calculates the product of a vector with the Jacobian from one reverse sweep.
+        values_batch(points)
+            Calculates the function values at many input points in one vectorized evaluation.
+        grad_batch(points)
+            Calculates the Jacobian at many input points in one vectorized evaluation.
+        evaluate_batch(points)
+            Calculates the values and Jacobians at many input points in chunks on a pool of workers.
+        jacobian_blocks(inputs, block_size)
+            Yields the Jacobian in blocks of rows from a single trace as they are computed.
+        compile(example_inputs)
+            Traces the function(s) once and returns generated code for their values and derivatives.
+        close()
+            Shuts down the worker processes, if any.
+        enable_stats(), disable_stats()
+            Starts and stops counting operations, evaluations and latencies in stats.
     """
-    def __init__(self, fn):
+    _backends = ('node', 'tape')
+    _mode = 'reverse'
+
+    def __init__(self, fn, backend='node', cache_size=None, cache_bytes=None, workers=None, stats=False):
         """Constructor for the Reverse_AD class.
 
         Parameters
         ======
         fn : (function or list of functions)
             The function or list of functions to differentiate
+        backend : str
+            'node' records the computational graph as linked Node objects, 'tape' records it on a
+            flat, array-backed Tape, which needs far less memory for long traces
+        cache_size : int, optional
+            Keep the results at this many recently used input points. No results are cached unless
+            cache_size or cache_bytes is given.
+        cache_bytes : int, optional
+            Keep recently used results up to this many bytes of arrays
+        workers : int, optional
+            Split the rows of the Jacobian across this many worker processes, each tracing the
+            function(s) once with the node backend
+        stats : bool
+            Count operations, evaluations, graph sizes and latencies of every call in the stats
+            attribute. The operations are only hooked while stats are enabled.
+
+        Raises
+        =======
+        ValueError: Backend `[backend]` is not supported
         """
-        super().__init__(fn)
+        if backend not in self._backends:
+            raise ValueError(
+                f"Backend `{backend}` is not supported, choose one of {self._backends}"
+            )
+        self.backend = backend
+        # The graph traced by the current call, released as soon as the call has its results
+        self._trace = None
+        super().__init__(fn, cache_size=cache_size, cache_bytes=cache_bytes, workers=workers, stats=stats)
 
     # turn function into list if isn't already to be used with jacobian
     def set_inputs(self, input_vals):
@@ -165,7 +694,7 @@ class Reverse_AD(Forward_AD):
 
         Returns
         =======
-        list of Nodes
+        list of Nodes or TapeNodes
             The input point(s)
         """
         # reset values after previous use of class instance
@@ -173,12 +702,23 @@ class Reverse_AD(Forward_AD):
         # if inputs not in a list, put in list 
         if not isinstance(input_vals, list):
             input_vals = [input_vals]
-        # need to make each input of node type 
-        self.inputs = [Node(x) for x in input_vals]
+        # need to make each input of node type, or record it on a fresh tape
+        if self.backend == 'tape':
+            self.tape = Tape()
+            self.inputs = [self.tape.variable(x) for x in input_vals]
+        else:
+            self._trace = Trace()
+            self.inputs = self._trace.variables(input_vals)
         return self.inputs
+
+    def _release(self):
+        """Cuts the edges of the graph traced by the last call, so it is freed without the garbage collector."""
+        if self._trace is not None:
+            self._trace.release()
+            self._trace = None
     
-    def values(self, input_vals):
-        """Get the values of the function(s) evaluated at the input points.
+    def _values(self, input_vals, out=None):
+        """Evaluates the function(s) at the input points, without the cache, into out if given.
         
         Parameters
         ======
@@ -190,53 +730,485 @@ class Reverse_AD(Forward_AD):
         numpy array
             The values of the function(s) evaluated at the input points
         """
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
         input_nodes = self.set_inputs(input_vals)
-        values = np.empty([len(self.fn)])
-        #get value for each function provided and put in np.array 
-        for i, f in enumerate(self.fn):
-            z = f(*input_nodes)
+        try:
+            #get value for each output of each function provided and put in np.array 
+            outputs = [z for f in self.fn for z in _outputs(f(*input_nodes))]
+        finally:
+            self._release()
+        if stats is not None:
+            stats._phase('trace', time.perf_counter() - start)
+        values = np.empty([len(outputs)]) if out is None else out
+        for i, z in enumerate(outputs):
             values[i] = (z.value)
-        self.val = values
-        return self.val
+        return values
 
-    def grad(self, input_vals):
+    def _record(self, input_nodes):
+        """Trace every function once into a single graph shared by all of their outputs.
+
+        Parameters
+        ======
+        input_nodes : list of Nodes or TapeNodes
+            The inputs to trace the function(s) from
+
+        Returns
+        =======
+        tuple
+            The list of output Nodes or TapeNodes, and True if a single scalar function was traced
+        """
+        outputs = []
+        scalar = True
+        for f in self.fn:
+            result = f(*input_nodes)
+            scalar = _is_scalar(self.fn, result)
+            outputs.extend(_outputs(result))
+        return outputs, scalar
+
+    def grad(self, input_vals, out=None):
         """Get the derivatives of the function(s) at the input point(s) using reverse mode.
         
         Parameters
         ======
         inputs : list of Nodes
             The input points at which to evaluate the derivatives of the function(s).
+        out : numpy array, optional
+            Float64 array of the shape of the gradient or Jacobian it is written into. It is
+            checked on its first use only, later calls with the same array write into it directly.
         
         Returns
         =======
         matrix (numpy array)
-            The values of the first order partial derivatves of the function(s) evaluated at the input points
+            The values of the first order partial derivatves of the function(s) evaluated at the input points,
+            out itself if given
         """
-        input_nodes = self.set_inputs(input_vals)
         # If no function provided, return index error 
         if len(self.fn) == 0: 
             return IndexError('Need at least one function input') 
-        # If one function provided, return gradient of np.array type  
-        elif len(self.fn) == 1:
-            z = self.fn[0](*input_nodes)
-            z.gradient = 1
-            gradient_array = np.empty([len(input_nodes)])
-            for i, n in enumerate(input_nodes):
-                n.grad()
-                gradient_array[i] = n.gradient
-                n.clear()
-            self.der = gradient_array
-            return self.der
-        # If vector of functions provided, return jacobian of np.array type
+        if out is not None:
+            return self._into('grad', input_vals, out)
+        return self.value_and_grad(input_vals)[1]
+
+    def _value_and_grad(self, input_vals, out=None):
+        """Differentiates the function(s) from a single trace using reverse mode, without the cache.
+
+        Parameters
+        ======
+        input_vals : list
+            The input points at which to evaluate the function(s) and their derivatives.
+        out : numpy array, optional
+            Checked array of the shape of the gradient or Jacobian it is written into
+
+        Returns
+        =======
+        tuple
+            The values of the function(s) (numpy array) and the gradient or Jacobian (numpy array)
+
+        Examples
+        =======
+        >>> ad = Reverse_AD(lambda x, y: x * y)
+        >>> value, der = ad.value_and_grad([2, 3])
+        >>> print(value, der)
+        [6.] [3. 2.]
+        """
+        if self.workers is not None:
+            return self._parallel_value_and_grad('reverse', input_vals)
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+        input_nodes = self.set_inputs(input_vals)
+        try:
+            outputs, scalar = self._record(input_nodes)
+            if stats is not None:
+                stats._phase('trace', time.perf_counter() - start)
+                stats._graph(outputs)
+                start = time.perf_counter()
+            # The traced outputs already hold the values of the function(s)
+            values = np.array([z.value for z in outputs], dtype=float)
+            # A gradient is written into the single row of a Jacobian viewing it
+            jacob_out = out if out is None or out.ndim == 2 else out[np.newaxis]
+            # Record every output on the same tape and sweep it once per output
+            if self.backend == 'tape':
+                jacobian = self.tape.jacobian(outputs, [n.index for n in input_nodes], out=jacob_out)
+            # Sweep the shared graph once per output, reusing one adjoint buffer
+            else:
+                jacobian = backward_jacobian(outputs, input_nodes, out=jacob_out)
+        finally:
+            self._release()
+        if stats is not None:
+            stats._phase('backward', time.perf_counter() - start)
+        if out is not None:
+            return values, out
+        # If one scalar function provided, return gradient, otherwise return jacobian of np.array type
+        return values, jacobian[0] if scalar else jacobian
+
+    def vjp(self, input_vals, u):
+        """Get the product of a vector with the Jacobian from one reverse sweep, without forming the Jacobian.
+
+        The adjoints of the outputs are seeded with the entries of u, on the graph or the tape of the
+        chosen backend.
+
+        Parameters
+        ======
+        input_vals : list
+            The input points at which to evaluate the derivatives of the function(s).
+        u : array-like
+            The vector, one entry per output
+
+        Returns
+        =======
+        numpy array
+            The product, one entry per input
+
+        Raises
+        =======
+        ValueError: The adjoint vector must have one entry per output
+
+        Examples
+        =======
+        >>> ad = Reverse_AD(lambda x, y: [x * y, x + y], backend='tape')
+        >>> print(ad.vjp([2, 3], [1, 0]))
+        [3. 2.]
+        """
+        if self.backend != 'tape':
+            return super().vjp(input_vals, u)
+        input_nodes = self.set_inputs(input_vals)
+        outputs, _ = self._record(input_nodes)
+        u = np.asarray(u, dtype=float).reshape(-1)
+        if u.shape != (len(outputs),):
+            raise ValueError(f"The adjoint vector must have {len(outputs)} entries, got {u.shape[0]}")
+        # Outputs that do not depend on the inputs contribute nothing
+        traced = [(z, seed) for z, seed in zip(outputs, u) if isinstance(z, TapeNode)]
+        adjoint = self.tape.backward_many([z for z, _ in traced], [seed for _, seed in traced])
+        return adjoint[[n.index for n in input_nodes]]
+
+    def grad_batch(self, points):
+        """Get the derivatives of the function(s) at many input points at once using reverse mode.
+
+        Every Node holds a numpy array with one value per point, so one graph and one reverse
+        pass per function cover the whole batch.
+
+        Parameters
+        ======
+        points : array-like
+            The input points, of shape (n_points, n_inputs)
+
+        Returns
+        =======
+        numpy array
+            The first order partial derivatives, of shape (n_points, n_outputs, n_inputs)
+        """
+        return _batch_reverse(self.fn, points)[1]
+
+    def compile(self, example_inputs):
+        """Trace the function(s) once and compile their values and derivatives into straight-line code.
+
+        The returned function evaluates the recorded operations and one reverse sweep per output
+        without building a graph, which pays off when the same function is differentiated many times.
+        It also accepts numpy arrays of input points, which are evaluated in one vectorized call.
+
+        Parameters
+        ======
+        example_inputs : list
+            An input point of the function(s), which sets the number of inputs
+
+        Returns
+        =======
+        CompiledFunction
+            Takes a list of inputs and returns the value(s) and the gradient or Jacobian
+
+        Raises
+        =======
+        TypeError: The function applies an operation that cannot be compiled
+
+        Examples
+        =======
+        >>> f = Reverse_AD(lambda x, y: x * exp(y)).compile([1, 0])
+        >>> value, grad = f([2, 0])
+        >>> print(value, grad)
+        2.0 [1. 2.]
+        """
+        if not isinstance(example_inputs, list):
+            example_inputs = [example_inputs]
+        compiled = compile_function(self.fn, len(example_inputs))
+        # Evaluate once, so code that cannot run fails here rather than in the caller's loop
+        compiled(example_inputs)
+        return compiled
+
+class CostModel:
+    """A linear model of the cost of one elementary operation in forward and reverse mode.
+
+    Forward mode carries one tangent per input, so its cost grows with the number of inputs n.
+    Reverse mode traces the graph once and sweeps it once per output, so its cost grows with the
+    number of outputs m. The defaults were measured on chains of elementary functions.
+
+    Attributes
+    ======
+        forward_base, forward_per_input : float
+            Microseconds per operation in forward mode, fixed and for every input
+        reverse_base, reverse_per_output : float
+            Microseconds per operation in reverse mode, fixed and for every output
+
+    Methods
+    ======
+        estimate(n, m)
+            Returns the estimated cost of both modes
+        calibrate()
+            Returns a model fitted to timings on this machine
+    """
+
+    def __init__(self, forward_base=1.35, forward_per_input=0.0013, reverse_base=2.1, reverse_per_output=0.19):
+        """Constructor for the CostModel class.
+
+        Parameters
+        ======
+        forward_base, forward_per_input : float
+            Microseconds per operation in forward mode, fixed and for every input
+        reverse_base, reverse_per_output : float
+            Microseconds per operation in reverse mode, fixed and for every output
+        """
+        self.forward_base = forward_base
+        self.forward_per_input = forward_per_input
+        self.reverse_base = reverse_base
+        self.reverse_per_output = reverse_per_output
+
+    def estimate(self, n, m):
+        """Returns the estimated cost per operation of both modes.
+
+        Parameters
+        ======
+        n : int
+            The number of inputs
+        m : int
+            The number of outputs
+
+        Returns
+        =======
+        dict
+            Microseconds per operation, keyed by 'forward' and 'reverse'
+
+        Examples
+        =======
+        >>> model = CostModel()
+        >>> costs = model.estimate(2, 1)
+        >>> print(min(costs, key=costs.get))
+        forward
+        """
+        return {
+            'forward': self.forward_base + self.forward_per_input * n,
+            'reverse': self.reverse_base + self.reverse_per_output * m,
+        }
+
+    @classmethod
+    def calibrate(cls, depth=200, repeat=3):
+        """Fits a model to timings of a chain of elementary functions on this machine.
+
+        Each mode is timed at a small and a large number of inputs or outputs, and the line through
+        the two timings gives its fixed cost and its cost per input or output.
+
+        Parameters
+        ======
+        depth : int
+            Number of steps of the timed chain, each step applies three operations
+        repeat : int
+            Timing runs per measurement, the fastest is used
+
+        Returns
+        =======
+        CostModel
+            The fitted model
+        """
+        def chain(n, m):
+            def fn(*x):
+                s = x[0]
+                for i in range(depth):
+                    s = sin(s) * x[i % n] + 0.5
+                return [s * (k + 1) for k in range(m)] if m > 1 else s
+            return fn
+
+        def per_op(driver, n, m):
+            ad = driver(chain(n, m))
+            inputs = [0.3] * n
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                ad.grad(inputs)
+                timings.append(time.perf_counter() - start)
+            return min(timings) / (3 * depth) * 1e6
+
+        small, large = 1, 512
+        forward = [per_op(Forward_AD, n, 1) for n in (small, large)]
+        reverse = [per_op(Reverse_AD, 1, m) for m in (small, 16)]
+        forward_per_input = max((forward[1] - forward[0]) / (large - small), 0.0)
+        reverse_per_output = max((reverse[1] - reverse[0]) / (16 - small), 0.0)
+        return cls(forward[0] - forward_per_input * small, forward_per_input,
+                   reverse[0] - reverse_per_output * small, reverse_per_output)
+
+
+class Auto_AD(Forward_AD):
+    """A class for automatic differentiation that chooses forward or reverse mode on every call.
+
+    The choice follows a cost model of both modes for the number of inputs and outputs. With
+    time_first, both modes are timed on the first call with a given number of inputs and the faster
+    one is used for that function from then on. Every choice is recorded in decisions.
+
+    Attributes
+    ======
+        fn : function or list of functions
+            The function or list of functions to differentiate
+        val : numpy.ndarray
+            The values of the function(s) evaluated at the input points
+        der : matrix (numpy array)
+            The gradient or Jacobian of the function(s) at the input points
+        model : CostModel
+            The cost model the choices follow
+        time_first : bool
+            Whether both modes are timed on the first call with a given number of inputs
+        mode : str or None
+            The mode of the last call, 'forward' or 'reverse'
+        decisions : collections.deque
+            The most recent choices, each a dict with the number of inputs and outputs, the mode,
+            the reason and the estimated or timed cost of both modes
+
+    Methods
+    ======
+        set_fn(fn)
+            Sets the function attribute of the class instance and forgets the timed choices
+        values(inputs)
+            Calculates the function values at the input values.
+        grad(inputs)
+            Calculates the gradient or Jacobian at the input values in the chosen mode.
+        value_and_grad(inputs)
+            Calculates the function values and the gradient or Jacobian in the chosen mode.
+        choose(n, m)
+            Returns the mode the cost model prefers for n inputs and m outputs
+    """
+
+    def __init__(self, fn, time_first=False, model=None, backend='node', cache_size=None, cache_bytes=None,
+                 max_decisions=100, stats=False):
+        """Constructor for the Auto_AD class.
+
+        Parameters
+        ======
+        fn : (function or list of functions)
+            The function or list of functions to differentiate
+        time_first : bool
+            Time both modes on the first call with a given number of inputs and keep the faster one
+        model : CostModel, optional
+            The cost model, CostModel() by default. CostModel.calibrate() fits one to this machine.
+        backend : str
+            The backend of reverse mode, 'node' or 'tape'
+        cache_size, cache_bytes : int, optional
+            Budgets of the result cache, no results are cached unless one is given
+        max_decisions : int
+            The number of recent choices kept in decisions
+        stats : bool
+            Count operations, evaluations and latencies of every call in the stats attribute
+        """
+        self.model = CostModel() if model is None else model
+        self.time_first = time_first
+        self.mode = None
+        self.decisions = deque(maxlen=max_decisions)
+        self._forward = Forward_AD(fn)
+        self._reverse = Reverse_AD(fn, backend=backend)
+        # Number of outputs and timed winner, for every number of inputs seen
+        self._n_outputs = {}
+        self._winners = {}
+        super().__init__(fn, cache_size=cache_size, cache_bytes=cache_bytes, stats=stats)
+
+    def set_fn(self, fn):
+        """Set the function(s) to differentiate, forgetting what was learned about the previous one.
+
+        Parameters
+        ======
+        fn : function or list of functions
+            The function or list of functions to differentiate
+        """
+        super().set_fn(fn)
+        self._forward.set_fn(fn)
+        self._reverse.set_fn(fn)
+        self._n_outputs.clear()
+        self._winners.clear()
+        self._share_stats()
+
+    def _share_stats(self):
+        """Lets the drivers of both modes count into the stats of this driver, and evaluate its counted functions."""
+        for driver in (self._forward, self._reverse):
+            driver.stats = self.stats
+            driver.fn = self.fn
+
+    def enable_stats(self):
+        """Starts counting the operations, evaluations and latencies of every call in stats, in both modes."""
+        stats = super().enable_stats()
+        self._share_stats()
+        return stats
+
+    def disable_stats(self):
+        """Stops counting in both modes and returns the final stats."""
+        stats = super().disable_stats()
+        self._share_stats()
+        return stats
+
+    def choose(self, n, m):
+        """Returns the mode the cost model prefers.
+
+        Parameters
+        ======
+        n : int
+            The number of inputs
+        m : int
+            The number of outputs
+
+        Returns
+        =======
+        tuple
+            The mode, 'forward' or 'reverse', and the estimated cost of both modes
+        """
+        costs = self.model.estimate(n, m)
+        # Ties go to forward mode, which builds no graph
+        mode = 'reverse' if costs['reverse'] < costs['forward'] else 'forward'
+        return mode, costs
+
+    def _decide(self, n, m, mode, reason, costs=None):
+        """Records a choice and returns the driver of the chosen mode."""
+        self.mode = mode
+        self.decisions.append({'inputs': n, 'outputs': m, 'mode': mode, 'reason': reason, 'costs': costs})
+        return self._forward if mode == 'forward' else self._reverse
+
+    def _value_and_grad(self, inputs, out=None):
+        """Differentiates the function(s) in the chosen mode, without the cache, into out if given."""
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+        n = len(inputs)
+        m = self._n_outputs.get(n)
+        if n in self._winners:
+            driver = self._decide(n, m, *self._winners[n])
+        elif self.time_first:
+            return self._time_both(inputs)
+        elif m is None:
+            # The first call reveals the number of outputs
+            driver = self._decide(n, m, 'forward', 'number of outputs not known yet')
         else:
-            jacobian = np.empty([len(self.fn), len(input_nodes)])
-            for i, f in enumerate(self.fn):
-                z = f(*input_nodes)
-                z.gradient = 1 
-                for j, n in enumerate(input_nodes):
-                    n.grad()
-                    jacobian[i, j] = n.gradient
-                    n.clear()
-            self.der = jacobian
-            return self.der
+            mode, costs = self.choose(n, m)
+            driver = self._decide(n, m, mode, 'cost model', costs)
+        result = driver._value_and_grad(inputs, out)
+        self._n_outputs[n] = len(result[0])
+        return result
 
+    def _time_both(self, inputs):
+        """Times both modes at the input point and remembers the faster one for this number of inputs."""
+        n = len(inputs)
+        timings = {}
+        results = {}
+        for mode, driver in (('forward', self._forward), ('reverse', self._reverse)):
+            start = time.perf_counter()
+            results[mode] = driver._value_and_grad(inputs)
+            timings[mode] = (time.perf_counter() - start) * 1e6
+        mode = min(timings, key=timings.get)
+        m = len(results[mode][0])
+        self._n_outputs[n] = m
+        self._winners[n] = (mode, 'timed on the first call', timings)
+        self._decide(n, m, mode, 'timed both modes', timings)
+        return results[mode]
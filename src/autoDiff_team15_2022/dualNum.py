@@ -1,14 +1,28 @@
 import numpy as np
+from .ufuncs import NumpyOperand
 
-class DualNumber():
+# Looked up once, the operators check for array values on every call
+_ndarray = np.ndarray
+
+def _broadcast(a, b):
+    """Returns two DualNumbers whose dual parts broadcast against each other.
+
+    The binary operators call it when array values have different numbers of dimensions, to line
+    up the tangent axes of both dual parts.
+    """
+    shape = np.broadcast_shapes(np.shape(a.real), np.shape(b.real))
+    return a._expand(shape), b._expand(shape)
+
+class DualNumber(NumpyOperand):
     """Dual number object useful in the implementation of automatic differentiation packages.
 
     Attributes
     ======
     real: int, float, np.int32, np.int64
         Real part of a dual number
-    dual: int, float, np.int32, np.int64
-        Dual part of a dual number
+    dual: int, float, np.int32, np.int64, numpy array
+        Dual part of a dual number. A numpy array holds one tangent per entry, so that
+        several directional derivatives are propagated by a single evaluation (vector mode).
 
     Methods
     ======
@@ -34,8 +48,13 @@ class DualNumber():
         Enables raising a float/int to a DualNumber power
     __neg__()
         Enables negation of a DualNumber
+    __array_ufunc__(ufunc, method, *inputs, **kwargs)
+        Enables numpy ufuncs such as np.sin and np.multiply on DualNumbers. The operators return
+        NotImplemented for numpy array operands, so numpy calls it with the array as a constant.
     """
-    _supported_types = (int, float, np.int32,np.int64)
+    # Slots drop the per-instance __dict__, one DualNumber is allocated per operation
+    __slots__ = ('real', 'dual')
+    _supported_types = (int, float, np.int32, np.int64, np.float32, np.float64)
 
     def __init__(self, real, dual=1.0):
         """Constructor for the DualNumber class.
@@ -44,8 +63,8 @@ class DualNumber():
         ======
         real: int, float, np.int32, np.int64
             Real part of a dual number
-        dual: int, float, np.int32, np.int64
-            Dual part of a dual number
+        dual: int, float, np.int32, np.int64, numpy array
+            Dual part of a dual number, or a vector of tangents
         """
         self.real = real
         self.dual = dual
@@ -88,7 +107,11 @@ class DualNumber():
         """
         # Supported dual number type 
         if isinstance(other, DualNumber):
+            if (self.real.__class__ is _ndarray or other.real.__class__ is _ndarray) and np.ndim(self.real) != np.ndim(other.real):
+                self, other = _broadcast(self, other)
             return DualNumber(other.real + self.real, other.dual + self.dual)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a supported type 
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -169,7 +192,11 @@ class DualNumber():
         """
         # Supported dual number type 
         if isinstance(other, DualNumber):
+            if (self.real.__class__ is _ndarray or other.real.__class__ is _ndarray) and np.ndim(self.real) != np.ndim(other.real):
+                self, other = _broadcast(self, other)
             return DualNumber(self.real - other.real, self.dual - other.dual)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a supported type 
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -250,7 +277,11 @@ class DualNumber():
         """
         # Supported dual number type 
         if isinstance(other, DualNumber):
+            if (self.real.__class__ is _ndarray or other.real.__class__ is _ndarray) and np.ndim(self.real) != np.ndim(other.real):
+                self, other = _broadcast(self, other)
             return DualNumber(other.real * self.real, other.real * self.dual + other.dual * self.real)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a supported type 
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -331,7 +362,11 @@ class DualNumber():
         """
         # Supported dual number type 
         if isinstance(other, DualNumber):
+            if (self.real.__class__ is _ndarray or other.real.__class__ is _ndarray) and np.ndim(self.real) != np.ndim(other.real):
+                self, other = _broadcast(self, other)
             return DualNumber(self.real / other.real, (self.dual * other.real - self.real * other.dual)/(other.real**2))
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a supported type 
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -374,6 +409,8 @@ class DualNumber():
         # Supported dual number type 
         if isinstance(other, DualNumber):
             return other.__truediv__(self)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a supported type
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -421,9 +458,13 @@ class DualNumber():
         """
         # Supported dual number type
         if isinstance(other, DualNumber):
+            if (self.real.__class__ is _ndarray or other.real.__class__ is _ndarray) and np.ndim(self.real) != np.ndim(other.real):
+                self, other = _broadcast(self, other)
             return DualNumber(self.real**other.real, 
                              other.real*self.real**(other.real-1) * self.dual + np.log(self.real) * self.real ** other.real * other.dual)
                              #(self.real**other.real) * (other.dual * np.log(self.real) + (self.dual*(other.real / self.real))))
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a supported type
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -475,6 +516,8 @@ class DualNumber():
         # Supported dual number type
         if isinstance(other, DualNumber):
             return other.__pow__(self)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a supported type
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -506,3 +549,49 @@ class DualNumber():
         -1 -2
         """
         return DualNumber(self.real * (-1), self.dual * (-1))
+
+    def _primal(self):
+        """Returns the real part, used by the numpy protocols."""
+        return self.real
+
+    @classmethod
+    def _constant(cls, value):
+        """Returns a numeric array as a DualNumber with no dual part."""
+        return cls(value, 0.0)
+
+    @classmethod
+    def _pack(cls, array):
+        """Packs an object array of DualNumbers and numbers into one array-valued DualNumber.
+
+        The dual parts are laid out as (tangent shape, array shape), matching batched DualNumbers.
+        """
+        entries = array.ravel()
+        real = np.array([e.real if isinstance(e, DualNumber) else e for e in entries], dtype=float)
+        duals = [np.asarray(e.dual if isinstance(e, DualNumber) else 0.0) for e in entries]
+        if not duals:
+            return cls(real.reshape(array.shape), 0.0)
+        tangent = np.broadcast_shapes(*(d.shape for d in duals))
+        dual = np.stack([np.broadcast_to(d, tangent) for d in duals], axis=-1)
+        return cls(real.reshape(array.shape), dual.reshape(tangent + array.shape))
+
+    def _expand(self, shape):
+        """Returns the DualNumber with its tangent axes moved ahead of the value axes of a broadcast
+        shape, so it broadcasts against array-valued DualNumbers."""
+        ndim = len(shape)
+        value_ndim = np.ndim(self.real)
+        dual_shape = np.shape(self.dual)
+        if value_ndim >= ndim or not dual_shape:
+            return self
+        tangent = dual_shape[:max(len(dual_shape) - value_ndim, 0)]
+        values = dual_shape[len(tangent):]
+        return DualNumber(self.real, np.reshape(self.dual, tangent + (1,) * (ndim - value_ndim) + values))
+
+    def _sum(self):
+        """Returns the sum of every entry of an array-valued DualNumber."""
+        value_ndim = np.ndim(self.real)
+        if value_ndim == 0:
+            return self
+        shape = np.shape(self.dual)
+        tangent = shape[:max(len(shape) - value_ndim, 0)]
+        dual = np.broadcast_to(self.dual, tangent + np.shape(self.real))
+        return DualNumber(np.sum(self.real), np.sum(dual, axis=tuple(range(-value_ndim, 0))))
@@ -1,16 +1,190 @@
+import math
 import numpy as np
 from .dualNum import DualNumber
 from .node import Node
+from .tape import TapeNode
 
 
-_supported_types = (int, float, np.int32,np.int64) 
+_supported_types = (int, float, np.int32, np.int64, np.float32, np.float64)
+
+# Python scalars take the math module fast path, which is much cheaper than numpy on single values
+_python_scalars = (float, int)
+# Inputs outside the domain of a math function fall back to numpy, which returns nan or inf instead
+_math_errors = (ValueError, OverflowError, ZeroDivisionError)
+
+class _DispatchTable(dict):
+    """Maps exact input types to the implementation of one elementary function.
+
+    Looking up the type of an input resolves its implementation in one dictionary access.
+    Subclasses of registered types are resolved on their first lookup and cached.
+
+    Attributes
+    ======
+        name : str
+            Name used in the error raised for unsupported types
+
+    Raises
+    =======
+    TypeError: Type `[input type]` is not supported for [function]
+    """
+
+    def __init__(self, name, implementations):
+        super().__init__(implementations)
+        self.name = name
+
+    def __missing__(self, kind):
+        for registered, impl in list(self.items()):
+            if issubclass(kind, registered):
+                self[kind] = impl
+                return impl
+        raise TypeError(
+            f"Type `{kind}` is not supported for {self.name}"
+            )
+
+def _table(name, op, np_fn, math_fn, derivative, tangent=None):
+    """Builds the dispatch table of a unary elementary function.
+
+    Parameters
+    ======
+    name : str
+        Name used in the error raised for unsupported types
+    op : str
+        Name of the operation recorded on a Tape
+    np_fn, math_fn : function
+        The elementary function from numpy and from the math module
+    derivative : function
+        Takes a value and the module (numpy or math) to compute with and returns the derivative
+    tangent : function, optional
+        Takes a value, its dual part and the module and returns the dual part of the result.
+        Defaults to the derivative times the dual part.
+
+    Returns
+    =======
+    _DispatchTable
+        Implementations for dual numbers, nodes, tape entries, python and numpy scalars
+    """
+    def evaluate(v):
+        # Value and derivative, with the math module for python scalars and numpy otherwise
+        if type(v) in _python_scalars:
+            try:
+                return math_fn(v), derivative(v, math)
+            except _math_errors:
+                pass
+        return np_fn(v), derivative(v, np)
+
+    def dual(x):
+        v = x.real
+        if type(v) in _python_scalars:
+            try:
+                if tangent is None:
+                    return DualNumber(math_fn(v), derivative(v, math) * x.dual)
+                return DualNumber(math_fn(v), tangent(v, x.dual, math))
+            except _math_errors:
+                pass
+        if tangent is None:
+            return DualNumber(np_fn(v), derivative(v, np) * x.dual)
+        return DualNumber(np_fn(v), tangent(v, x.dual, np))
+
+    def node(x):
+        value, d = evaluate(x.value)
+        z = Node(value)
+        x._link(d, z)
+        return z
+
+    def tape(x):
+        value, d = evaluate(x.value)
+        return x._unary(op, value, d)
+
+    def python_scalar(x):
+        try:
+            return math_fn(x)
+        except _math_errors:
+            return np_fn(x)
+
+    return _DispatchTable(name, {
+        DualNumber: dual, Node: node, TapeNode: tape,
+        int: python_scalar, float: python_scalar,
+        np.int32: np_fn, np.int64: np_fn, np.float32: np_fn, np.float64: np_fn,
+        })
+
+def _np_logistic(x):
+    return 1 / (1 + np.exp(-x))
+
+def _math_logistic(x):
+    return 1 / (1 + math.exp(-x))
+
+_SIN = _table('sin', 'sin', np.sin, math.sin, lambda v, m: m.cos(v))
+_COS = _table('cos', 'cos', np.cos, math.cos, lambda v, m: -m.sin(v))
+_TAN = _table('tan', 'tan', np.tan, math.tan, lambda v, m: 1 / (m.cos(v) ** 2),
+               lambda v, t, m: t / (m.cos(v) ** 2))
+_ARCSIN = _table('arcsin', 'arcsin', np.arcsin, math.asin, lambda v, m: 1 / m.sqrt(1 - v ** 2),
+                 lambda v, t, m: t / m.sqrt(1 - v ** 2))
+_ARCCOS = _table('arccos', 'arccos', np.arccos, math.acos, lambda v, m: -1 / m.sqrt(1 - v ** 2),
+                 lambda v, t, m: -1 * t / m.sqrt(1 - v ** 2))
+_ARCTAN = _table('arctan', 'arctan', np.arctan, math.atan, lambda v, m: 1 / (1 + v ** 2),
+                 lambda v, t, m: t / (1 + v ** 2))
+_SINH = _table('sinh', 'sinh', np.sinh, math.sinh, lambda v, m: m.cosh(v))
+_COSH = _table('cosh', 'cosh', np.cosh, math.cosh, lambda v, m: m.sinh(v))
+_TANH = _table('tanh', 'tanh', np.tanh, math.tanh, lambda v, m: 1 / m.cosh(v) ** 2,
+                lambda v, t, m: t * (1 - m.tanh(v) ** 2))
+_EXP = _table('exponents', 'exp', np.exp, math.exp, lambda v, m: m.exp(v))
+_LOGISTIC = _table('logistic', 'logistic', _np_logistic, _math_logistic,
+                   lambda v, m: m.exp(v) / (1 + m.exp(v)) ** 2)
+
+def _log_table():
+    """Builds the dispatch table of the logarithm, whose implementations also take the base."""
+    def evaluate(v, base):
+        if type(v) in _python_scalars:
+            try:
+                log_base = math.log(base)
+                return math.log(v) / log_base, 1 / (v * log_base)
+            except _math_errors:
+                pass
+        return np.log(v) / np.log(base), 1 / (v * np.log(base))
+
+    def dual(x, base):
+        v = x.real
+        if type(v) in _python_scalars:
+            try:
+                log_base = math.log(base)
+                return DualNumber(math.log(v) / log_base, x.dual / (v * log_base))
+            except _math_errors:
+                pass
+        return DualNumber(np.log(v) / np.log(base), x.dual / (v * np.log(base)))
+
+    def node(x, base):
+        value, d = evaluate(x.value, base)
+        z = Node(value)
+        x._link(d, z)
+        return z
+
+    def tape(x, base):
+        value, d = evaluate(x.value, base)
+        return x._unary('log', value, d)
+
+    def python_scalar(x, base):
+        try:
+            return math.log(x) / math.log(base)
+        except _math_errors:
+            return np.log(x) / np.log(base)
+
+    def numpy_scalar(x, base):
+        return np.log(x) / np.log(base)
+
+    return _DispatchTable('logs', {
+        DualNumber: dual, Node: node, TapeNode: tape,
+        int: python_scalar, float: python_scalar,
+        np.int32: numpy_scalar, np.int64: numpy_scalar, np.float32: numpy_scalar, np.float64: numpy_scalar,
+        })
+
+_LOG = _log_table()
 
 def sin(x):
     """Calculates the sine of an int, float, DualNumber, or Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to a sine function
 
     Returns
@@ -29,29 +203,14 @@ def sin(x):
     =======
     TypeError: Type `[input type]` is not supported for sin
     """
-    # Support dual number type 
-    if isinstance(x, DualNumber):
-        return DualNumber(np.sin(x.real), np.cos(x.real) * x.dual)
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.sin(x.value))
-        x.children.append((np.cos(x.value), z))
-        return z
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for cos"
-            )
-    # Support scalar types 
-    else:
-        return np.sin(x)
+    return _SIN[type(x)](x)
 
 def cos(x):
     """Calculates the cosine of an int, float, DualNumber or Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to a cosine function
 
     Returns
@@ -70,29 +229,14 @@ def cos(x):
     =======
     TypeError: Type `[input type]` is not supported for cos
     """
-    # Support dual number type 
-    if isinstance(x, DualNumber):
-        return DualNumber(np.cos(x.real), -1 * np.sin(x.real) * x.dual)
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.cos(x.value))
-        x.children.append((-np.sin(x.value), z))
-        return z
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for cos"
-            )
-    # Support scalar types 
-    else:
-        return np.cos(x)
+    return _COS[type(x)](x)
 
 def tan(x):
     """Calculates the tangent of an int, float, DualNumber, or Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to a tangent function
 
     Returns
@@ -111,29 +255,14 @@ def tan(x):
     =======
     TypeError: Type `[input type]` is not supported for tan
     """
-    # Support dual number type
-    if isinstance(x, DualNumber):
-        return DualNumber(np.tan(x.real), x.dual / (np.cos(x.real)**2))
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.tan(x.value))
-        x.children.append((1 / (np.cos(x.value) ** 2), z))
-        return z
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for tan"
-            )
-    # Support scalar types 
-    else:
-        return np.tan(x)
+    return _TAN[type(x)](x)
 
 def arcsin(x):
     """Calculates the arcsine of an int, float, DualNumber, Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to an arcsine function
 
     Returns
@@ -152,29 +281,14 @@ def arcsin(x):
     =======
     TypeError: Type `[input type]` is not supported for arcsin
     """
-    # Support dual number type
-    if isinstance(x, DualNumber):
-        return DualNumber(np.arcsin(x.real), x.dual / np.sqrt(1 - (x.real)**2))
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.arcsin(x.value))
-        x.children.append((1 / np.sqrt(1 - x.value ** 2), z))
-        return z
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for arcsin"
-            )
-    # Support scalar types 
-    else:
-        return np.arcsin(x)
-        
+    return _ARCSIN[type(x)](x)
+
 def arccos(x):
     """Calculates the arccosine of an int, float, DualNumber, Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to an arccosine function
 
     Returns
@@ -193,29 +307,14 @@ def arccos(x):
     =======
     TypeError: Type `[input type]` is not supported for arccos
     """
-    # Support dual number type
-    if isinstance(x, DualNumber):
-        return DualNumber(np.arccos(x.real), -1 * x.dual / np.sqrt(1-(x.real)**2))
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.arccos(x.value))
-        x.children.append((-1 / np.sqrt(1 - x.value ** 2), z))
-        return z
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for arccos"
-            )
-    # Support scalar types 
-    else:
-        return np.arccos(x)
+    return _ARCCOS[type(x)](x)
 
 def arctan(x):
     """Calculates the arctangent of an int, float, DualNumber, Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to an arctangent function
 
     Returns
@@ -234,29 +333,14 @@ def arctan(x):
     =======
     TypeError: Type `[input type]` is not supported for arctan
     """
-    # Support dual number type
-    if isinstance(x, DualNumber):
-        return DualNumber(np.arctan(x.real), x.dual / (1+(x.real)**2))
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.arctan(x.value))
-        x.children.append((1 / (1 + x.value ** 2), z))
-        return z
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for arctan"
-            )
-    # Support scalar types 
-    else:
-        return np.arctan(x)
+    return _ARCTAN[type(x)](x)
 
 def sinh(x):
     """Calculates the hyperbolic sine of an int, float, DualNumber, Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to a hyperbolic sine function
 
     Returns
@@ -275,29 +359,14 @@ def sinh(x):
     =======
     TypeError: Type `[input type]` is not supported for sinh
     """
-    # Support dual number type
-    if isinstance(x, DualNumber):
-        return DualNumber(np.sinh(x.real), x.dual * np.cosh(x.real))
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.sinh(x.value))
-        x.children.append((np.cosh(x.value), z))
-        return z 
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for sinh"
-            )
-    # Support scalar types 
-    else:
-        return np.sinh(x)
+    return _SINH[type(x)](x)
 
 def cosh(x):
     """Calculates the hyperbolic cosine of an int, float, DualNumber, Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to a hyperbolic cosine function
 
     Returns
@@ -316,29 +385,14 @@ def cosh(x):
     =======
     TypeError: Type `[input type]` is not supported for cosh
     """
-    # Support dual number type 
-    if isinstance(x, DualNumber):
-        return DualNumber(np.cosh(x.real), x.dual * np.sinh(x.real))
-    # Support node type 
-    elif isinstance(x, Node):
-        z = Node(np.cosh(x.value))
-        x.children.append((np.sinh(x.value), z))
-        return z  
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for cosh"
-            )
-    # Support scalar types 
-    else:
-        return np.cosh(x)
+    return _COSH[type(x)](x)
 
 def tanh(x):
     """Calculates the hyperbolic tangent of an int, float, DualNumber, Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to a hyperbolic tangent function
 
     Returns
@@ -357,29 +411,14 @@ def tanh(x):
     =======
     TypeError: Type `[input type]` is not supported for tanh
     """
-    # Support dual number type
-    if isinstance(x, DualNumber):
-        return DualNumber(np.tanh(x.real), x.dual * (1 - np.tanh(x.real) ** 2)) 
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.tanh(x.value))
-        x.children.append((1 / np.cosh(x.value)**2, z))
-        return z 
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for tanh"
-            )
-    # Support scalar types 
-    else: 
-        return np.tanh(x)
+    return _TANH[type(x)](x)
 
 def exp(x):
     """Calculates the exponential of an int, float, DualNumber, Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to an exponential function
 
     Returns
@@ -398,29 +437,14 @@ def exp(x):
     =======
     TypeError: Type `[input type]` is not supported for exponents
     """
-    # Support dual number type
-    if isinstance(x, DualNumber):
-        return DualNumber(np.exp(x.real), np.exp(x.real) * x.dual)
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.exp(x.value))
-        x.children.append((np.exp(x.value), z)) 
-        return z 
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for exponents"
-            )
-    # Support scalar types 
-    else:
-        return np.exp(x)
+    return _EXP[type(x)](x)
 
 def log(x, base = 10):
     """Calculates the logarithm of an int, float, DualNumber, Node input with default base of 10.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to a logarithmic function
 
     Returns
@@ -439,29 +463,14 @@ def log(x, base = 10):
     =======
     TypeError: Type `[input type]` is not supported for logs
     """
-    # Support dual number type
-    if isinstance(x, DualNumber):
-        return DualNumber(np.log(x.real)/np.log(base), x.dual/(x.real*np.log(base)))
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(np.log(x.value)/np.log(base))
-        x.children.append((1 / (x.value * np.log(base)), z))
-        return z
-    # Return error if not a supported type
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for logs"
-            )
-    # Support scalar types 
-    else:
-        return np.log(x)/np.log(base)
+    return _LOG[type(x)](x, base)
 
 def logistic(x):
     """Calculates the logistic of an int, float, DualNumber, Node input.
 
     Parameters
     ======
-    x : int, float, DualNumber, Node
+    x : int, float, np.float64, DualNumber, Node, TapeNode
         The input to a logistic function
 
     Returns
@@ -480,20 +489,4 @@ def logistic(x):
     =======
     TypeError: Type `[input type]` is not supported for logistics
     """
-    # Support dual number type
-    if isinstance(x, DualNumber):
-        return DualNumber(1 / (1 + np.exp(-x.real)),
-                         np.exp(x.real) / ((1 + np.exp(x.real)) ** 2))
-    # Support node type
-    elif isinstance(x, Node):
-        z = Node(1 / (1 + np.exp(-x.value))) 
-        x.children.append((np.exp(x.value) / (1 + np.exp(x.value)) ** 2, z))
-        return z 
-    # Return error if not a supported type 
-    elif not isinstance(x, _supported_types):
-        raise TypeError(
-            f"Type `{type(x)}` is not supported for logistic"
-            )
-    # Support scalar types 
-    else: 
-        return 1 / (1 + np.exp(-x))
\ No newline at end of file
+    return _LOGISTIC[type(x)](x)
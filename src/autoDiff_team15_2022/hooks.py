@@ -0,0 +1,154 @@
+import threading
+import time
+from . import elemFunctions as _ef
+from .dualNum import DualNumber
+from .node import Node
+from .tape import TapeNode
+
+# The dispatch table of every elementary function, by the name ops are reported under
+_TABLES = {
+    'sin': _ef._SIN, 'cos': _ef._COS, 'tan': _ef._TAN,
+    'arcsin': _ef._ARCSIN, 'arccos': _ef._ARCCOS, 'arctan': _ef._ARCTAN,
+    'sinh': _ef._SINH, 'cosh': _ef._COSH, 'tanh': _ef._TANH,
+    'exp': _ef._EXP, 'log': _ef._LOG, 'logistic': _ef._LOGISTIC,
+}
+_CLASSES = (DualNumber, Node, TapeNode)
+_OPERATORS = ('__add__', '__radd__', '__sub__', '__rsub__', '__mul__', '__rmul__',
+              '__truediv__', '__rtruediv__', '__pow__', '__rpow__', '__neg__', '__pos__')
+
+# The registered listeners, and whether any of them times the operations
+_listeners = []
+_timed = False
+
+class _Local(threading.local):
+    """Per-thread state of the hooks, the hooks being installed for every thread at once."""
+    # Operations called by a hooked operation are part of it and are not reported on their own
+    depth = 0
+
+_local = _Local()
+# The original implementations replaced by hooks, to restore them when the last listener leaves
+_originals = []
+
+def _hook(op, kind, fn):
+    """Returns a wrapper of an elementary function or operator reporting every call to the listeners.
+
+    Only the outermost operation of a thread is reported, with its own result: the DualNumbers,
+    Nodes or TapeNodes an operation allocates internally, e.g. in Node.__pow__ with a Node
+    exponent, are not reported, so counts of allocated objects are lower bounds.
+
+    Parameters
+    ======
+    op : str
+        The name the operation is reported under, such as 'sin' or 'mul'
+    kind : str
+        The name of the type the operation is applied to
+    fn : function
+        The implementation wrapped
+
+    Returns
+    =======
+    function
+        The wrapper, with the implementation as its __wrapped__ attribute
+    """
+    def hooked(*args):
+        local = _local
+        if local.depth:
+            return fn(*args)
+        local.depth = 1
+        try:
+            if _timed:
+                start = time.perf_counter()
+                result = fn(*args)
+                elapsed = time.perf_counter() - start
+            else:
+                result = fn(*args)
+                elapsed = None
+        finally:
+            local.depth = 0
+        if result is not NotImplemented:
+            for listener in _listeners:
+                listener._op(op, kind, result, elapsed)
+        return result
+    hooked.__wrapped__ = fn
+    hooked.__name__ = getattr(fn, '__name__', op)
+    hooked.__doc__ = getattr(fn, '__doc__', None)
+    return hooked
+
+def _install():
+    """Replaces every elementary function and operator implementation with a hook."""
+    for op, table in _TABLES.items():
+        for kind, fn in list(table.items()):
+            _originals.append((table, kind, fn))
+            table[kind] = _hook(op, kind.__name__, fn)
+    for cls in _CLASSES:
+        for name in _OPERATORS:
+            fn = cls.__dict__.get(name)
+            if fn is not None:
+                _originals.append((cls, name, fn))
+                setattr(cls, name, _hook(name.strip('_'), cls.__name__, fn))
+
+def _restore():
+    """Puts the original implementations back in place of the hooks."""
+    for target, key, fn in reversed(_originals):
+        if isinstance(target, dict):
+            target[key] = fn
+        else:
+            setattr(target, key, fn)
+    _originals.clear()
+    # Subclasses resolved while hooked were cached with the hook of their base class
+    for table in _TABLES.values():
+        for kind, fn in list(table.items()):
+            if hasattr(fn, '__wrapped__'):
+                table[kind] = fn.__wrapped__
+
+def register(listener):
+    """Registers a listener of every elementary function and operator call, hooking them if needed.
+
+    Nothing is hooked while no listener is registered, so the operations then run exactly as
+    without instrumentation. A listener implements _op(op, kind, result, elapsed), called after
+    every operation that is not part of another one, and sets timed if elapsed should be measured.
+
+    Parameters
+    ======
+    listener : object
+        The listener
+    """
+    global _timed
+    if listener in _listeners:
+        return
+    if not _listeners:
+        _install()
+    _listeners.append(listener)
+    _timed = any(getattr(l, 'timed', False) for l in _listeners)
+
+def unregister(listener):
+    """Unregisters a listener, restoring the original implementations once no listener is left."""
+    global _timed
+    if listener not in _listeners:
+        return
+    _listeners.remove(listener)
+    _timed = any(getattr(l, 'timed', False) for l in _listeners)
+    if not _listeners:
+        _restore()
+
+def implementation(op, kind):
+    """Returns the original implementation of a hooked operation, or None if it is not hooked.
+
+    Parameters
+    ======
+    op : str
+        The name the operation is reported under, such as 'sin' or 'mul'
+    kind : str
+        The name of the type the operation is applied to
+    """
+    for target, key, fn in _originals:
+        if isinstance(target, dict):
+            if _TABLES.get(op) is target and key.__name__ == kind:
+                return fn
+        elif target.__name__ == kind and key.strip('_') == op:
+            return fn
+    return None
+
+def installed():
+    """Returns whether the elementary functions and operators are currently hooked."""
+    return bool(_originals)
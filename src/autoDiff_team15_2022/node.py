@@ -1,6 +1,27 @@
+import weakref
 import numpy as np
+from .ufuncs import NumpyOperand
 
-class Node:
+_ndarray = np.ndarray
+# Without a callback, the reference to a Node is created once and shared by all of its links
+_ref = weakref.ref
+
+
+class _Edges(list):
+    """A snapshot of the edges of a Node, which cannot be modified.
+
+    The edges live in flat lists inside the Node, so changes to a copy would be silently lost.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("The edges of a Node are read-only, they are recorded by the operations")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+
+class Node(NumpyOperand):
     """A class for representing a Node in a computational graph for reverse mode automatic differentiation.
 
     Attributes
@@ -11,11 +32,15 @@ class Node:
             The gradient of the Node with respect to the derivative and child Nodes
         children : list of Nodes
             A list of tuples (derivative, child) representing the derivative and children of the Node
+        parents : list of Nodes
+            A list of tuples (derivative, parent) representing the derivative of the Node with respect to each parent
 
     Methods
     ======
         grad()
             Calculates the gradient of a node
+        backward()
+            Calculates the gradient of every node an output node depends on in one iterative pass
         clear()
             Clears a node to a state of no children or gradient stored
         __add__(other)
@@ -42,8 +67,15 @@ class Node:
             Enables negating a node
         __pos__(other)
             Enables calculation of the positive of a node
+        __array_ufunc__(ufunc, method, *inputs, **kwargs)
+            Enables numpy ufuncs such as np.sin and np.multiply on nodes. The operators return
+            NotImplemented for numpy array operands, so numpy calls it with the array as a constant.
     """
-    _supported_types = (int, float, np.int32, np.int64)
+    # Slots drop the per-instance __dict__, and edges are kept in flat lists alternating
+    # derivative and Node, which avoids allocating one tuple per edge. Children are held through
+    # weak references, so a graph is owned by its outputs and holds no reference cycle.
+    __slots__ = ('value', 'gradient', '_children', '_parents', '__weakref__')
+    _supported_types = (int, float, np.int32, np.int64, np.float32, np.float64)
 
     def __init__(self, value):
         """Constructor for the Node class.
@@ -56,10 +88,48 @@ class Node:
                 The gradient of the Node with respect to the derivative and child Nodes
             children : list of Nodes
                 A list of tuples (derivative, child) representing the derivative and children of the Node
+            parents : list of Nodes
+                A list of tuples (derivative, parent) representing the derivative of the Node with respect to each parent
         """
         self.value = value
         self.gradient = None
-        self.children = []
+        # The shared empty tuple stands in for an edge list until the first edge is recorded
+        self._children = ()
+        self._parents = ()
+
+    @property
+    def children(self):
+        """Read-only list of tuples (derivative, child) representing the derivative and children of the Node.
+
+        Children no longer referenced anywhere else are left out.
+        """
+        edges = self._children
+        pairs = ((edges[i], edges[i + 1]()) for i in range(0, len(edges), 2))
+        return _Edges((d, child) for d, child in pairs if child is not None)
+
+    @property
+    def parents(self):
+        """Read-only list of tuples (derivative, parent) representing the derivative of the Node with respect to each parent."""
+        return _Edges(zip(self._parents[::2], self._parents[1::2]))
+
+    def _link(self, derivative, child):
+        """Record an edge of the computational graph from this Node to a child Node.
+
+        Parameters
+        ======
+        derivative : int, float
+            The derivative of the child with respect to this Node
+        child : Node
+            The Node computed from this Node
+        """
+        if self._children:
+            self._children += (derivative, _ref(child))
+        else:
+            self._children = [derivative, _ref(child)]
+        if child._parents:
+            child._parents += (derivative, self)
+        else:
+            child._parents = [derivative, self]
     
     def grad(self):
         """Calculate the gradient of a Node using the chain rule.
@@ -82,13 +152,47 @@ class Node:
         # Recursively find gradient if the gradient is none
         if self.gradient is None: 
             # Calculate derivative using chain rule
-            self.gradient = sum([derivative * child.grad() for derivative, child in self.children])
+            self.gradient = sum([d * child.grad() for d, child in self.children])
         return self.gradient
     
+    def backward(self, seed=1):
+        """Calculate the gradient of every Node this output Node depends on.
+
+        The graph is sorted topologically once, then adjoints are swept iteratively from this
+        Node towards the inputs, so arbitrarily deep graphs need no recursion.
+
+        Parameters
+        ======
+        seed : int, float
+            The gradient of this Node with respect to itself
+
+        Examples
+        =======
+        # Create an output Node, then populate the gradient of both inputs at once
+        >>> x = Node(2)
+        >>> y = Node(3)
+        >>> z = x**3 * y
+        >>> z.backward()
+        >>> print(x.gradient, y.gradient)
+        36 8
+        """
+        order = _topological_order([self])
+        for node in order:
+            node.gradient = 0
+        self.gradient = seed
+        # Nodes appear after all of their parents, so sweep the order from the output backwards
+        for node in reversed(order):
+            gradient = node.gradient
+            edges = node._parents
+            for i in range(0, len(edges), 2):
+                parent = edges[i + 1]
+                parent.gradient = parent.gradient + edges[i] * gradient
+
     def clear(self):
         """Clears a Node to a state of no children or gradient stored."""
         # Reset attributes of a Node object to re-use as an input in new function
-        self.children = []
+        self._children = ()
+        self._parents = ()
         self.gradient = None
 
     def __add__(self, other):
@@ -122,10 +226,14 @@ class Node:
         """
         # Support for Node type
         if isinstance(other, Node):
+            if self.value.__class__ is _ndarray or other.value.__class__ is _ndarray:
+                self, other = _broadcast(self, other)
             # Update children of nodes
             z = Node(self.value + other.value)
-            self.children.append((1, z))
-            other.children.append((1, z))
+            self._link(1, z)
+            other._link(1, z)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a support type
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -135,7 +243,7 @@ class Node:
         else:
             # Update children of node
             z = Node(self.value + other)
-            self.children.append((1, z))
+            self._link(1, z)
         return z 
 
     def __radd__(self, other):
@@ -194,10 +302,14 @@ class Node:
         """
         # Support for Node type
         if isinstance(other, Node):
+            if self.value.__class__ is _ndarray or other.value.__class__ is _ndarray:
+                self, other = _broadcast(self, other)
             # Update children of nodes
             z = Node(self.value - other.value)
-            self.children.append((1, z))
-            other.children.append((-1, z))
+            self._link(1, z)
+            other._link(-1, z)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a support type
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -207,7 +319,7 @@ class Node:
         else:
             # Update children of node
             z = Node(self.value - other)
-            self.children.append((1, z))
+            self._link(1, z)
         return z
 
     def __rsub__(self, other):
@@ -270,10 +382,14 @@ class Node:
         """        
         # Support for Node type
         if isinstance(other, Node):
+            if self.value.__class__ is _ndarray or other.value.__class__ is _ndarray:
+                self, other = _broadcast(self, other)
             z = Node(self.value * other.value)
             # Update children of nodes
-            self.children.append((other.value, z))
-            other.children.append((self.value, z))
+            self._link(other.value, z)
+            other._link(self.value, z)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a support type
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -283,7 +399,7 @@ class Node:
         else:
             # Update children of node
             z = Node(self.value * other)
-            self.children.append((other, z))
+            self._link(other, z)
         return z 
     
     def __rmul__(self, other):
@@ -347,10 +463,14 @@ class Node:
         """
         # Support for Node type
         if isinstance(other, Node):
+            if self.value.__class__ is _ndarray or other.value.__class__ is _ndarray:
+                self, other = _broadcast(self, other)
             # Update children of nodes
             z = Node(self.value ** other.value)
-            self.children.append((other.value * self.value ** (other.value - 1), z))
-            other.children.append((self.value ** other.value * np.log(self.value), z))
+            self._link(other.value * self.value ** (other.value - 1), z)
+            other._link(self.value ** other.value * np.log(self.value), z)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a support type
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -360,7 +480,7 @@ class Node:
         else:
             # Update children of node
             z = Node(self.value ** other)
-            self.children.append((other * self.value ** (other - 1), z))
+            self._link(other * self.value ** (other - 1), z)
         return z 
         
     def __rpow__(self, other):
@@ -390,7 +510,7 @@ class Node:
         """
         z = Node(other ** self.value)
         # Update children of node
-        self.children.append((other ** self.value * np.log(other), z))
+        self._link(_rpow_partial(other, z.value), z)
         return z 
 
     def __truediv__(self, other):
@@ -427,10 +547,14 @@ class Node:
         """
         # Support for Node type
         if isinstance(other, Node):
+            if self.value.__class__ is _ndarray or other.value.__class__ is _ndarray:
+                self, other = _broadcast(self, other)
             # Update children of nodes
             z = Node(self.value / other.value)
-            self.children.append((1 / other.value, z))
-            other.children.append((-self.value / (other.value)**2, z))
+            self._link(1 / other.value, z)
+            other._link(-self.value / (other.value)**2, z)
+        elif isinstance(other, np.ndarray):
+            return NotImplemented
         # Return error if not a support type
         elif not isinstance(other, self._supported_types):
             raise TypeError(
@@ -440,7 +564,7 @@ class Node:
         else:
             # Update children of node
             z = Node(self.value / other)
-            self.children.append((1 / other, z))
+            self._link(1 / other, z)
         return z 
 
     def __rtruediv__(self, other):
@@ -470,7 +594,7 @@ class Node:
         """
         z = Node(other / self.value)
         # Update children of node
-        self.children.append((-other / (self.value)**2, z))
+        self._link(-other / (self.value)**2, z)
         return z
 
     def __neg__(self):
@@ -495,7 +619,7 @@ class Node:
         """
         z = Node(-self.value)
         # Update children of node
-        self.children.append((-1, z))
+        self._link(-1, z)
         return z
     
     def __pos__(self):
@@ -520,6 +644,314 @@ class Node:
         """
         z = Node(self.value)
         # Update children of node
-        self.children.append((1, z))
+        self._link(1, z)
         return z 
     
+
+    def _primal(self):
+        """Returns the value, used by the numpy protocols."""
+        return self.value
+
+    @classmethod
+    def _constant(cls, value):
+        """Returns a numeric array as a Node that no input depends on."""
+        return cls(value)
+
+    @classmethod
+    def _pack(cls, array):
+        """Object arrays of Nodes keep one graph node per entry, so they cannot be packed."""
+        return None
+
+    def _expand(self, shape):
+        """Returns the Node broadcast to shape, recording the broadcast so adjoints are summed back."""
+        if np.shape(self.value) == shape:
+            return self
+        z = Node(np.broadcast_to(self.value, shape))
+        self._link(_Unbroadcast(np.shape(self.value)), z)
+        return z
+
+    def _sum(self):
+        """Returns the sum of every entry of an array-valued Node."""
+        if np.ndim(self.value) == 0:
+            return self
+        z = Node(np.sum(self.value))
+        self._link(np.ones(np.shape(self.value)), z)
+        return z
+
+
+def _rpow_partial(base, power):
+    """Returns the derivative of base ** x in x from the power, taking the log of the base only when it is defined.
+
+    Powers of zero are constant, powers of a negative base have no real derivative in the exponent.
+    """
+    if base > 0:
+        return power * np.log(base)
+    return power * (0.0 if base == 0 else np.nan)
+
+def _broadcast(a, b):
+    """Returns two Nodes broadcast to the shape of their combined values.
+
+    The binary operators call it for array values of different shapes, so that the adjoints keep
+    the shape of each operand.
+    """
+    a_shape, b_shape = np.shape(a.value), np.shape(b.value)
+    if a_shape == b_shape:
+        return a, b
+    shape = np.broadcast_shapes(a_shape, b_shape)
+    return a._expand(shape), b._expand(shape)
+
+
+class _Unbroadcast:
+    """Local derivative of a broadcast Node, multiplying by it sums an adjoint back to the original shape."""
+    __slots__ = ('shape',)
+    # Keeps numpy arrays from multiplying element-wise, so they defer to __rmul__
+    __array_ufunc__ = None
+
+    def __init__(self, shape):
+        self.shape = shape
+
+    def __mul__(self, adjoint):
+        adjoint = np.asarray(adjoint)
+        extra = adjoint.ndim - len(self.shape)
+        axes = tuple(range(extra)) + tuple(
+            extra + i for i, n in enumerate(self.shape) if n == 1 and adjoint.shape[extra + i] != 1
+        )
+        adjoint = np.sum(adjoint, axis=axes).reshape(self.shape)
+        return adjoint.item() if not self.shape else adjoint
+
+    __rmul__ = __mul__
+
+
+class Trace:
+    """An arena owning the computational graph traced from its input Nodes.
+
+    Every Node holds its parents, so an output Node kept after a computation keeps its whole graph
+    alive. Releasing a trace cuts every edge of the Nodes computed from its inputs at once, so
+    each Node is freed as soon as nothing else refers to it, and Nodes held afterwards no longer
+    pin the graph. Values and gradients are kept.
+
+    Attributes
+    ======
+        inputs : list of Nodes
+            The input Nodes of the trace, the graph is every Node computed from them
+
+    Methods
+    ======
+        variables(values)
+            Returns new input Nodes owned by the trace
+        watch(nodes)
+            Adds existing Nodes to the inputs of the trace
+        release()
+            Cuts every edge of the graph, also called when leaving a with block
+
+    Examples
+    =======
+    >>> with Trace() as trace:
+    ...     x, y = trace.variables([2, 3])
+    ...     z = x * y + x
+    ...     z.backward()
+    >>> print(x.gradient, y.gradient, z.parents)
+    4 2 []
+    """
+
+    def __init__(self):
+        """Constructor for the Trace class."""
+        self.inputs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def variables(self, values):
+        """Returns one new input Node owned by the trace per value.
+
+        Parameters
+        ======
+        values : iterable of int, float, numpy arrays or DualNumbers
+            The values of the input Nodes
+
+        Returns
+        =======
+        list of Nodes
+            The input Nodes
+        """
+        nodes = [Node(value) for value in values]
+        self.inputs.extend(nodes)
+        return nodes
+
+    def watch(self, nodes):
+        """Adds existing Nodes to the inputs of the trace, so the Nodes computed from them are released too.
+
+        Parameters
+        ======
+        nodes : list of Nodes
+            The Nodes
+        """
+        self.inputs.extend(nodes)
+
+    def release(self):
+        """Cuts every edge of the Nodes computed from the inputs, in one pass over the graph.
+
+        A Node from outside the trace used as an operand keeps its edges to the Nodes computed
+        from it unless it was added with watch, though they do not keep those Nodes alive.
+        """
+        stack = list(self.inputs)
+        # Every Node computed from the inputs is reachable from them through children, a Node
+        # reached again through another edge has no children left and costs one check
+        while stack:
+            node = stack.pop()
+            children = node._children
+            node._parents = ()
+            if children:
+                node._children = ()
+                stack += [child for child in (ref() for ref in children[1::2]) if child is not None]
+        self.inputs = []
+
+
+def _topological_order(outputs):
+    """Returns every Node the output Nodes depend on, each one after all of its parents.
+
+    Parameters
+    ======
+    outputs : list of Nodes
+        The Nodes whose ancestors are sorted
+
+    Returns
+    =======
+    list of Nodes
+        The output Nodes and their ancestors in topological order
+    """
+    order = []
+    visited = set()
+    for output in outputs:
+        if id(output) in visited:
+            continue
+        visited.add(id(output))
+        # Iterative depth first search, each stack entry remembers how far its parents were explored
+        stack = [(output, iter(output._parents[1::2]))]
+        while stack:
+            node, parents = stack[-1]
+            for parent in parents:
+                if id(parent) not in visited:
+                    visited.add(id(parent))
+                    stack.append((parent, iter(parent._parents[1::2])))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+    return order
+
+def backward_jacobian(outputs, inputs, seed=1, out=None):
+    """Returns the derivatives of several output Nodes traced into one shared graph.
+
+    The shared graph is sorted topologically once and stored as integer edge lists, then one
+    backward sweep per output reuses the same adjoint buffer, so no user code is re-executed.
+
+    Parameters
+    ======
+    outputs : list of Nodes
+        The output Nodes, all computed from the same input Nodes
+    inputs : list of Nodes
+        The input Nodes
+    seed : int, float, numpy array
+        The gradient of each output with respect to itself. An array seeds array-valued Nodes.
+    out : numpy array, optional
+        Array of the shape of the jacobian it is written into
+
+    Returns
+    =======
+    numpy array
+        The jacobian, of shape (len(outputs), len(inputs)) followed by the shape of the seed
+
+    Examples
+    =======
+    >>> x = Node(2)
+    >>> y = Node(3)
+    >>> w = x * y
+    >>> print(backward_jacobian([w + x, w * y], [x, y]))
+    [[ 4.  2.]
+     [ 9. 12.]]
+    """
+    order = _topological_order(outputs)
+    position = {id(node): k for k, node in enumerate(order)}
+    edges = [[(position[id(node._parents[i + 1])], node._parents[i]) for i in range(0, len(node._parents), 2)]
+             for node in order]
+    columns = [position.get(id(node)) for node in inputs]
+    if out is None:
+        jacobian = np.zeros((len(outputs), len(inputs)) + np.shape(seed))
+    else:
+        jacobian = out
+        jacobian.fill(0)
+    # None marks nodes no adjoint has reached yet, so they are skipped by the sweep
+    empty = [None] * len(order)
+    adjoint = list(empty)
+    for k, output in enumerate(outputs):
+        adjoint[:] = empty
+        start = position[id(output)]
+        adjoint[start] = seed
+        for i in range(start, -1, -1):
+            a = adjoint[i]
+            if a is None:
+                continue
+            for j, derivative in edges[i]:
+                update = derivative * a
+                adjoint[j] = update if adjoint[j] is None else adjoint[j] + update
+        for j, column in enumerate(columns):
+            if column is not None and adjoint[column] is not None:
+                jacobian[k, j] = adjoint[column]
+    return jacobian
+
+def vector_jacobian_product(outputs, inputs, seeds):
+    """Returns the vector-Jacobian product of output Nodes traced into one shared graph.
+
+    Every output starts with its entry of the vector as its adjoint, so a single backward sweep
+    gives the product without forming the Jacobian.
+
+    Parameters
+    ======
+    outputs : list of Nodes
+        The output Nodes, all computed from the same input Nodes
+    inputs : list of Nodes
+        The input Nodes
+    seeds : list of int, float or numpy arrays
+        The vector, one adjoint per output. Arrays of one shape give the products with several
+        vectors at once, one per entry of the arrays.
+
+    Returns
+    =======
+    numpy array
+        The sum of the gradients of the outputs weighted by the seeds, one entry per input
+        followed by the shape of the seeds
+
+    Examples
+    =======
+    >>> x = Node(2)
+    >>> y = Node(3)
+    >>> w = x * y
+    >>> print(vector_jacobian_product([w + x, w * y], [x, y], [1, 2]))
+    [22. 26.]
+    """
+    order = _topological_order(outputs)
+    position = {id(node): k for k, node in enumerate(order)}
+    adjoint = [None] * len(order)
+    for output, seed in zip(outputs, seeds):
+        k = position[id(output)]
+        adjoint[k] = seed if adjoint[k] is None else adjoint[k] + seed
+    # Nodes appear after all of their parents, so one sweep from the end covers every output
+    for i in range(len(order) - 1, -1, -1):
+        a = adjoint[i]
+        if a is None:
+            continue
+        edges = order[i]._parents
+        for e in range(0, len(edges), 2):
+            j = position[id(edges[e + 1])]
+            update = edges[e] * a
+            adjoint[j] = update if adjoint[j] is None else adjoint[j] + update
+    product = np.zeros((len(inputs),) + (np.shape(seeds[0]) if len(seeds) else ()))
+    for j, node in enumerate(inputs):
+        k = position.get(id(node))
+        if k is not None and adjoint[k] is not None:
+            product[j] = adjoint[k]
+    return product
@@ -0,0 +1,444 @@
+import os
+import time
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from .dualNum import DualNumber
+from .node import Trace, backward_jacobian
+from .differentiation import _seed, _outputs, _is_scalar, _fns, _as_points, _batch_forward, _batch_reverse
+
+# The function(s) a worker process differentiates, installed once when the worker starts
+_worker_fn = None
+
+def _install(fn):
+    """Initializer of the worker processes, keeps the function(s) for every later task."""
+    global _worker_fn
+    _worker_fn = fn
+
+def _forward_columns(args, start, stop):
+    """Computes the columns [start, stop) of the Jacobian in a worker with one seeded evaluation.
+
+    Returns
+    ==========
+    tuple
+        The values of the function(s), the block of columns and True if a single scalar function
+        was evaluated
+    """
+    seeds = _seed(args, start, stop)
+    outputs = []
+    scalar = True
+    for f in _worker_fn:
+        result = f(*seeds)
+        scalar = _is_scalar(_worker_fn, result)
+        outputs.extend(_outputs(result))
+    values = np.array([out.real if isinstance(out, DualNumber) else out for out in outputs], dtype=float)
+    block = np.zeros((len(outputs), stop - start))
+    for k, out in enumerate(outputs):
+        # Outputs that do not depend on the inputs have rows of zeros
+        if isinstance(out, DualNumber):
+            block[k] = out.dual
+    return values, block, scalar
+
+def _reverse_rows(args, start, stop):
+    """Computes the rows [start, stop) of the Jacobian in a worker from one trace.
+
+    Returns
+    ==========
+    tuple
+        The values of the function(s), the block of rows and True if a single scalar function was
+        traced
+    """
+    with Trace() as trace:
+        inputs = trace.variables(args)
+        outputs = []
+        scalar = True
+        for f in _worker_fn:
+            result = f(*inputs)
+            scalar = _is_scalar(_worker_fn, result)
+            outputs.extend(_outputs(result))
+        values = np.array([out.value for out in outputs], dtype=float)
+        block = backward_jacobian(outputs[start:stop], inputs)
+    return values, block, scalar
+
+def _evaluate_chunk(mode, arrays, start, stop, fn=None):
+    """Evaluates the points [start, stop) of a batch and writes their values and Jacobians in place.
+
+    Parameters
+    ==========
+    mode : str
+        'forward' or 'reverse'
+    arrays : list
+        The points, values and Jacobians of the whole batch, as numpy arrays in the same process or
+        as the names and shapes of shared memory blocks in a worker process
+    start, stop : int
+        The points of the chunk
+    fn : list of functions, optional
+        The function(s), those installed in the worker process by default
+
+    Returns
+    ==========
+    int
+        The number of points evaluated
+    """
+    from multiprocessing import shared_memory
+    fn = _worker_fn if fn is None else fn
+    blocks = []
+    # Worker processes attach to the shared memory by name, so neither points nor results are pickled
+    if isinstance(arrays[0], tuple):
+        blocks = [shared_memory.SharedMemory(name=name) for name, _ in arrays]
+        arrays = [np.ndarray(shape, buffer=block.buf) for block, (_, shape) in zip(blocks, arrays)]
+    points, values, jacob = arrays
+    evaluate = _batch_forward if mode == 'forward' else _batch_reverse
+    values[start:stop], jacob[start:stop] = evaluate(fn, points[start:stop])
+    # The views must be released before the blocks can be closed
+    del points, values, jacob, arrays
+    for block in blocks:
+        block.close()
+    return stop - start
+
+def _shutdown(pool, blocks=()):
+    """Shuts a pool down, waiting for its tasks, then unlinks shared memory blocks.
+
+    Unlinking removes the names of the blocks, their memory stays mapped while arrays over it exist.
+    """
+    pool.shutdown()
+    while blocks:
+        blocks.pop().unlink()
+
+
+class _SharedBuffer:
+    """Exposes a shared memory block to numpy, holding the block open as long as an array over it exists.
+
+    numpy keeps only the mapping alive as the base of arrays taken straight from a block, so
+    closing the block would unmap memory still in use. Arrays over a _SharedBuffer are based on it
+    instead: the block is closed, when garbage collected, after the last view is gone.
+    """
+
+    def __init__(self, block, shape):
+        self.block = block
+        self.__array_interface__ = np.ndarray(shape, buffer=block.buf).__array_interface__
+
+def _blocks(size, parts):
+    """Splits range(size) into at most parts contiguous blocks of nearly equal length."""
+    parts = max(min(parts, size), 1)
+    bounds = np.linspace(0, size, parts + 1).astype(int).tolist()
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class ParallelJacobian:
+    """Computes Jacobians of expensive functions on a persistent pool of worker processes.
+
+    The function(s) are shipped to every worker once, when the pool starts, and each call only sends
+    the input point. Forward mode gives every worker a block of columns, evaluated with one seeded
+    evaluation per worker; reverse mode gives every worker a block of rows, swept on one trace per
+    worker. The blocks are written into one preallocated Jacobian as they arrive.
+
+    On platforms that start workers by forking, any function can be used. With other start methods
+    the function(s) must be picklable, e.g. defined at the top level of a module. The workers are
+    shut down by close(), or when the instance is garbage collected.
+
+    Attributes
+    ======
+        workers : int
+            The number of worker processes
+        mode : str
+            'forward' splits the Jacobian by columns, 'reverse' by rows
+
+    Methods
+    ======
+        value_and_jacobian(args)
+            Returns the values and the Jacobian at an input point
+        close()
+            Shuts the worker processes down
+    """
+    _modes = ('forward', 'reverse')
+
+    def __init__(self, fn, workers=None, mode='forward', mp_context=None):
+        """Constructor for the ParallelJacobian class.
+
+        Parameters
+        ======
+        fn : function or list of functions
+            The function or list of functions to differentiate
+        workers : int, optional
+            The number of worker processes, the number of CPUs by default
+        mode : str
+            'forward' or 'reverse'
+        mp_context : multiprocessing context, optional
+            The context the workers are started with, the platform's default by default
+
+        Raises
+        =======
+        ValueError: Mode `[mode]` is not supported
+        ValueError: The number of workers must be positive
+        """
+        if mode not in self._modes:
+            raise ValueError(f"Mode `{mode}` is not supported, choose one of {self._modes}")
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        if workers < 1:
+            raise ValueError(f"The number of workers must be positive, got {workers}")
+        self.workers = workers
+        self.mode = mode
+        self._fn = _fns(fn)
+        # Number of outputs for every number of inputs, needed to split the rows in reverse mode
+        self._n_outputs = {}
+        self._pool = ProcessPoolExecutor(workers, mp_context=mp_context, initializer=_install,
+                                         initargs=(self._fn,))
+        # A dropped instance still shuts its workers down
+        self._finalizer = weakref.finalize(self, _shutdown, self._pool)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shuts the worker processes down, waiting for running tasks."""
+        self._finalizer()
+
+    def value_and_jacobian(self, args):
+        """Returns the values and the Jacobian of the function(s), computed by the workers.
+
+        Parameters
+        ======
+        args : list of int, float, np.int32, np.int64
+            Values at which the partial derivatives are evalauted at
+
+        Returns
+        =======
+        tuple
+            The values (numpy array), the Jacobian (numpy array) and True if a single scalar
+            function is differentiated
+
+        Examples
+        =======
+        >>> with ParallelJacobian(lambda x, y: [x * y, x + y], workers=2) as pool:
+        >>>     values, jac, scalar = pool.value_and_jacobian([2, 3])
+        >>> print(jac)
+        [[3. 2.]
+         [1. 1.]]
+        """
+        n = len(args)
+        if self.mode == 'forward':
+            task = _forward_columns
+            blocks = _blocks(n, self.workers)
+        else:
+            task = _reverse_rows
+            m = self._n_outputs.get(n)
+            # The first call with n inputs learns the number of outputs from one trace
+            if m is None:
+                values = self._pool.submit(_reverse_rows, args, 0, 0).result()[0]
+                m = self._n_outputs[n] = len(values)
+            blocks = _blocks(m, self.workers)
+        futures = [self._pool.submit(task, args, start, stop) for start, stop in blocks]
+        jacob = None
+        for (start, stop), future in zip(blocks, futures):
+            values, block, scalar = future.result()
+            if jacob is None:
+                self._n_outputs[n] = len(values)
+                jacob = np.empty((len(values), n))
+            if self.mode == 'forward':
+                jacob[:, start:stop] = block
+            else:
+                jacob[start:stop] = block
+        return values, jacob, scalar
+
+
+class BatchResult:
+    """The values and Jacobians of function(s) at many points, filled in by a pool of workers.
+
+    The points are split into chunks that the workers evaluate with the vectorized batch path and
+    write straight into the result arrays. With worker processes the arrays live in shared memory,
+    so the workers neither receive the points nor send results back through pickling. The result is
+    returned as soon as the chunks are submitted, and reports its progress while they run.
+
+    close(), leaving the with block or garbage collection shut the workers down and unlink the
+    shared memory. The memory itself is unmapped only once no view of the result arrays is left,
+    so arrays taken from the result stay valid afterwards.
+
+    Attributes
+    ======
+        values : numpy array
+            The values, of shape (n_points, n_outputs)
+        jacobians : numpy array
+            The first order partial derivatives, of shape (n_points, n_outputs, n_inputs)
+        n_points : int
+            The number of points
+        completed : int
+            The number of points evaluated so far
+        progress : float
+            The fraction of points evaluated so far
+        elapsed : float
+            Seconds since the evaluation started, until it finished
+        points_per_second : float
+            The throughput so far
+
+    Methods
+    ======
+        done()
+            Returns whether every chunk has finished
+        wait(timeout)
+            Waits for every chunk, raising the first error of a chunk
+        close(copy)
+            Waits for every chunk and releases the workers and the shared memory
+    """
+
+    def __init__(self, fn, points, mode='forward', chunk_size=1024, workers=None, executor='thread',
+                 callback=None):
+        """Constructor for the BatchResult class, starts evaluating the chunks.
+
+        Parameters
+        ======
+        fn : function or list of functions
+            The function or list of functions to differentiate
+        points : array-like
+            The input points, of shape (n_points, n_inputs)
+        mode : str
+            'forward' or 'reverse', the mode of the batch evaluation
+        chunk_size : int
+            The number of points evaluated together by one task
+        workers : int, optional
+            The number of workers, the number of CPUs by default
+        executor : str
+            'thread' for functions spending their time in numpy, which releases the GIL, and
+            'process' for functions spending it in Python
+        callback : function, optional
+            Called with this result whenever a chunk has finished, e.g. to report progress
+
+        Raises
+        =======
+        ValueError: Executor `[executor]` is not supported
+        ValueError: Mode `[mode]` is not supported
+        ValueError: Chunk size must be positive
+        """
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Executor `{executor}` is not supported, choose 'thread' or 'process'")
+        if mode not in ParallelJacobian._modes:
+            raise ValueError(f"Mode `{mode}` is not supported, choose one of {ParallelJacobian._modes}")
+        if chunk_size < 1:
+            raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+        fn = _fns(fn)
+        points = _as_points(points)
+        self.n_points, n = points.shape
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        # One point is evaluated up front to learn the number of outputs
+        m = _batch_forward(fn, points[:1])[0].shape[1] if self.n_points else 0
+        self.completed = 0
+        self._callback = callback
+        # Chunks whose done callback has not run yet, the lock guards the progress counters
+        self._lock = threading.Condition()
+        self._pending = 0
+        self._blocks = []
+        shapes = [points.shape, (self.n_points, m), (self.n_points, m, n)]
+        if executor == 'process':
+            from multiprocessing import shared_memory
+            arrays = []
+            for shape in shapes:
+                block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+                self._blocks.append(block)
+                arrays.append(np.asarray(_SharedBuffer(block, shape)))
+            arrays[0][:] = points
+            specs = [(block.name, shape) for block, shape in zip(self._blocks, shapes)]
+            self._pool = ProcessPoolExecutor(workers, initializer=_install, initargs=(fn,))
+            task_fn = None
+        else:
+            arrays = [points, np.empty(shapes[1]), np.empty(shapes[2])]
+            specs = arrays
+            self._pool = ThreadPoolExecutor(workers)
+            task_fn = fn
+        _, self.values, self.jacobians = arrays
+        self._finalizer = weakref.finalize(self, _shutdown, self._pool, self._blocks)
+        self._start = time.perf_counter()
+        self._stop = None
+        self._futures = []
+        for start in range(0, self.n_points, chunk_size):
+            stop = min(start + chunk_size, self.n_points)
+            future = self._pool.submit(_evaluate_chunk, mode, specs, start, stop, task_fn)
+            with self._lock:
+                self._pending += 1
+            future.add_done_callback(self._finished)
+            self._futures.append(future)
+        if not self._futures:
+            self._stop = self._start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _finished(self, future):
+        """Counts the points of a finished chunk and reports the progress."""
+        try:
+            if not future.cancelled() and future.exception() is None:
+                with self._lock:
+                    self.completed += future.result()
+                    if self.completed == self.n_points:
+                        self._stop = time.perf_counter()
+                if self._callback is not None:
+                    self._callback(self)
+        finally:
+            # A future is done before its callbacks run, waiting ends once they have
+            with self._lock:
+                self._pending -= 1
+                self._lock.notify_all()
+
+    @property
+    def progress(self):
+        """Returns the fraction of points evaluated so far."""
+        return self.completed / self.n_points if self.n_points else 1.0
+
+    @property
+    def elapsed(self):
+        """Returns the seconds since the evaluation started, until it finished."""
+        stop = time.perf_counter() if self._stop is None else self._stop
+        return stop - self._start
+
+    @property
+    def points_per_second(self):
+        """Returns the number of points evaluated per second so far."""
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def done(self):
+        """Returns whether every chunk has finished."""
+        return self._pending == 0
+
+    def wait(self, timeout=None):
+        """Waits for every chunk to finish.
+
+        Parameters
+        ======
+        timeout : float, optional
+            The longest time to wait in seconds, unbounded by default
+
+        Returns
+        =======
+        BatchResult
+            The result itself, with every value and Jacobian filled in unless the wait timed out
+
+        Raises
+        =======
+        Any error raised by the function(s) on a chunk
+        """
+        with self._lock:
+            self._lock.wait_for(lambda: self._pending == 0, timeout)
+        for future in self._futures:
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+        return self
+
+    def close(self, copy=True):
+        """Waits for every chunk, shuts the workers down and releases the shared memory.
+
+        Parameters
+        ======
+        copy : bool
+            Keep the values and Jacobians. Without it they are set to None, so the shared memory is
+            unmapped unless views of them are referenced elsewhere, which stay valid either way.
+        """
+        self._finalizer()
+        if not copy:
+            self.values = self.jacobians = None
@@ -0,0 +1,227 @@
+import json
+import marshal
+import os
+import sys
+import threading
+import time
+from . import hooks
+
+# Frames of the package are skipped when looking for the call site of an operation
+_PACKAGE = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+class Profiler:
+    """A context manager timing every elementary function and operator called inside it.
+
+    While active, every elementary function and operator of DualNumber, Node and TapeNode is
+    hooked (see hooks.register) and timed. Calls are aggregated per operation, e.g. 'sin' on a
+    DualNumber or 'pow' on a Node, and per call site, the first line outside the package on the
+    stack. Operations called by another operation, such as the log taken by Node.__pow__ with a
+    Node exponent, are part of the outer operation's time. The remaining time inside the context
+    is driver and user code overhead. Operations of every thread are recorded, each attributed to
+    the call site in its own thread.
+
+    Attributes
+    ======
+        timed : bool
+            Always True, asks the hooks to time every operation
+        total : float
+            Seconds spent inside the context
+        op_time : float
+            Seconds spent in the operations
+        events : list of tuple
+            The operations recorded for the trace, up to max_events
+
+    Methods
+    ======
+        by_op()
+            Returns the calls and time of every operation
+        by_site()
+            Returns the calls and time of every call site, broken down by operation
+        report(limit)
+            Returns both breakdowns as a table
+        dump_stats(path)
+            Writes the operations in the format of pstats
+        export_chrome_trace(path)
+            Writes the operations as Chrome trace events
+
+    Examples
+    =======
+    >>> with Profiler() as prof:
+    ...     Reverse_AD(lambda x, y: x ** y * sin(x)).grad([1.5, 2])
+    >>> print(sorted((row['op'], row['kind'], row['calls']) for row in prof.by_op()))
+    [('mul', 'Node', 1), ('pow', 'Node', 1), ('sin', 'Node', 1)]
+    """
+    timed = True
+
+    def __init__(self, max_events=100000):
+        """Constructor for the Profiler class.
+
+        Parameters
+        ======
+        max_events : int
+            The largest number of operations kept for the Chrome trace, later ones are only
+            aggregated
+        """
+        self.max_events = max_events
+        self.total = 0.0
+        self.op_time = 0.0
+        self.events = []
+        self._ops = {}
+        self._sites = {}
+        self._locations = {}
+        self._lock = threading.Lock()
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        hooks.register(self)
+        return self
+
+    def __exit__(self, *exc):
+        hooks.unregister(self)
+        self._end = time.perf_counter()
+        self.total += self._end - self._start
+
+    def _op(self, op, kind, result, elapsed):
+        """Records one operation with its call site."""
+        key = (op, kind)
+        site = _call_site(sys._getframe(2))
+        with self._lock:
+            self._record(key, site, elapsed)
+
+    def _record(self, key, site, elapsed):
+        """Adds one operation to the aggregates and the trace, holding the lock."""
+        stat = self._ops.get(key)
+        if stat is None:
+            stat = self._ops[key] = [0, 0.0, {}]
+            # The original implementation gives the file and line reported by pstats
+            fn = hooks.implementation(*key)
+            code = getattr(fn, '__code__', None)
+            self._locations[key] = (code.co_filename, code.co_firstlineno) if code else ('~', 0)
+        stat[0] += 1
+        stat[1] += elapsed
+        callers = stat[2]
+        callers[site] = callers.get(site, 0.0) + elapsed
+        per_site = self._sites.setdefault(site, {})
+        counts = per_site.setdefault(key, [0, 0.0])
+        counts[0] += 1
+        counts[1] += elapsed
+        self.op_time += elapsed
+        if len(self.events) < self.max_events:
+            self.events.append(key + (time.perf_counter() - elapsed, elapsed, site, threading.get_ident()))
+
+    def by_op(self):
+        """Returns the calls and time of every operation, the most expensive first.
+
+        Returns
+        =======
+        list of dict
+            The operation ('op'), the type it was applied to ('kind'), its number of calls, its
+            total and mean time in seconds and the number of call sites it was called from
+        """
+        rows = [{'op': op, 'kind': kind, 'calls': calls, 'time': seconds, 'mean': seconds / calls,
+                 'sites': len(callers)}
+                for (op, kind), (calls, seconds, callers) in self._ops.items()]
+        return sorted(rows, key=lambda row: -row['time'])
+
+    def by_site(self):
+        """Returns the calls and time of every call site, the most expensive first.
+
+        Returns
+        =======
+        list of dict
+            The file, line and function of the call site, its number of operation calls, their
+            total time in seconds and the calls and time of every operation under 'ops'
+        """
+        rows = []
+        for (filename, line, function), ops in self._sites.items():
+            rows.append({
+                'file': filename, 'line': line, 'function': function,
+                'calls': sum(calls for calls, _ in ops.values()),
+                'time': sum(seconds for _, seconds in ops.values()),
+                'ops': {f'{op}[{kind}]': {'calls': calls, 'time': seconds}
+                        for (op, kind), (calls, seconds) in sorted(ops.items(), key=lambda item: -item[1][1])},
+            })
+        return sorted(rows, key=lambda row: -row['time'])
+
+    def report(self, limit=10):
+        """Returns the operations and call sites taking the most time as a table.
+
+        Parameters
+        ======
+        limit : int
+            The number of operations and call sites listed
+
+        Returns
+        =======
+        str
+            The table, with the overhead outside the operations on its first line
+        """
+        lines = [f"{self.total * 1e3:.3f} ms profiled, {self.op_time * 1e3:.3f} ms in operations, "
+                 f"{max(self.total - self.op_time, 0.0) * 1e3:.3f} ms overhead",
+                 f"{'operation':<28}{'calls':>10}{'total ms':>12}{'mean us':>12}"]
+        for row in self.by_op()[:limit]:
+            lines.append(f"{row['op'] + '[' + row['kind'] + ']':<28}{row['calls']:>10}"
+                         f"{row['time'] * 1e3:>12.3f}{row['mean'] * 1e6:>12.3f}")
+        lines.append(f"{'call site':<50}{'calls':>10}{'total ms':>12}")
+        for row in self.by_site()[:limit]:
+            site = f"{os.path.basename(row['file'])}:{row['line']}({row['function']})"
+            lines.append(f"{site:<50}{row['calls']:>10}{row['time'] * 1e3:>12.3f}")
+        return '\n'.join(lines)
+
+    def _pstats(self):
+        """Returns the operations in the format pstats.Stats loads, with the call sites as callers."""
+        stats = {}
+        for key, (calls, seconds, callers) in self._ops.items():
+            filename, line = self._locations[key]
+            name = f'{key[0]}[{key[1]}]'
+            stats[(filename, line, name)] = (calls, calls, seconds, seconds, {
+                site: (self._sites[site][key][0], self._sites[site][key][0], site_time, site_time)
+                for site, site_time in callers.items()})
+        return stats
+
+    def dump_stats(self, path):
+        """Writes the operations to a file that pstats.Stats(path) loads.
+
+        Every operation is one function entry, named after the operation and its type, e.g.
+        'sin[DualNumber]', at the file and line of its implementation; its callers are the call
+        sites, so print_callers gives the breakdown by call site.
+
+        Parameters
+        ======
+        path : str
+            The file written
+        """
+        with open(path, 'wb') as f:
+            marshal.dump(self._pstats(), f)
+
+    def export_chrome_trace(self, path):
+        """Writes the recorded operations as Chrome trace events, viewable in chrome://tracing or Perfetto.
+
+        Every operation is one complete event named after the operation, with its type as its
+        category and its call site as an argument. The whole context is one enclosing event.
+
+        Parameters
+        ======
+        path : str
+            The file written
+        """
+        pid = os.getpid()
+        origin = self._start if self._start is not None else 0.0
+        events = [{'name': 'profile', 'cat': 'autodiff', 'ph': 'X', 'ts': 0.0,
+                   'dur': self.total * 1e6, 'pid': pid, 'tid': threading.get_ident()}]
+        for op, kind, start, elapsed, (filename, line, function), tid in self.events:
+            events.append({'name': op, 'cat': kind, 'ph': 'X', 'ts': (start - origin) * 1e6,
+                           'dur': elapsed * 1e6, 'pid': pid, 'tid': tid,
+                           'args': {'site': f'{filename}:{line}', 'function': function}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def _call_site(frame):
+    """Returns the file, line and function of the first frame outside the package."""
+    while frame is not None and frame.f_code.co_filename.startswith(_PACKAGE):
+        frame = frame.f_back
+    if frame is None:
+        return ('~', 0, '<package>')
+    return (frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
@@ -0,0 +1,392 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+import numpy as np
+from .differentiation import _fns, _batch_forward, _batch_reverse
+
+class GradientService:
+    """An asyncio service answering derivative queries at single points in micro-batches.
+
+    Functions are registered once under a name. Every query is one point, and the queries arriving
+    for the same function within a short window are evaluated together by one vectorized batch
+    evaluation, so many tiny requests become a few array operations. Clients connect over localhost
+    TCP or a Unix socket and exchange one JSON object per line:
+
+        {"id": 1, "fn": "name", "x": [1.0, 2.0]}
+        {"id": 1, "values": [...], "jacobian": [[...], ...]}
+
+    A query may set "op" to "values" to skip the derivatives in the reply, or to "stats" to get the
+    statistics of the service. Errors are answered as {"id": 1, "error": "message"}.
+
+    Attributes
+    ======
+        window : float
+            Seconds a batch waits for more queries after its first one
+        max_batch : int
+            The largest number of points evaluated together
+        mode : str
+            'forward' or 'reverse', the mode of the batch evaluations
+        address : tuple or str or None
+            The host and port or the socket path the service listens on, once started
+
+    Methods
+    ======
+        register(name, fn)
+            Registers function(s) under a name
+        start(host, port, path)
+            Starts listening on localhost TCP, or on a Unix socket if a path is given
+        evaluate(name, x)
+            Queues a query and returns its values and Jacobian once its batch is evaluated
+        stats()
+            Returns the queue depth, the histogram of batch sizes and the latency percentiles
+        close()
+            Stops listening and waits for the queued queries
+    """
+
+    def __init__(self, window=0.002, max_batch=1024, mode='forward', max_latencies=10000):
+        """Constructor for the GradientService class.
+
+        Parameters
+        ======
+        window : float
+            Seconds a batch waits for more queries after its first one
+        max_batch : int
+            The largest number of points evaluated together
+        mode : str
+            'forward' or 'reverse', the mode of the batch evaluations
+        max_latencies : int
+            The number of recent latencies the percentiles are computed from
+
+        Raises
+        =======
+        ValueError: Mode `[mode]` is not supported
+        ValueError: The largest batch must be positive
+        """
+        if mode not in ('forward', 'reverse'):
+            raise ValueError(f"Mode `{mode}` is not supported, choose 'forward' or 'reverse'")
+        if max_batch < 1:
+            raise ValueError(f"The largest batch must be positive, got {max_batch}")
+        self.window = window
+        self.max_batch = max_batch
+        self.mode = mode
+        self.address = None
+        self.requests = 0
+        self.batches = 0
+        self._evaluate = _batch_forward if mode == 'forward' else _batch_reverse
+        self._fns = {}
+        self._queues = {}
+        self._batchers = {}
+        self._sizes = {}
+        self._latencies = deque(maxlen=max_latencies)
+        self._server = None
+
+    def register(self, name, fn):
+        """Registers function(s) under a name, replacing any registered before.
+
+        Parameters
+        ======
+        name : str
+            The name queries refer to the function(s) by
+        fn : function or list of functions
+            The function or list of functions to differentiate
+        """
+        self._fns[name] = _fns(fn)
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """Starts listening for clients.
+
+        Parameters
+        ======
+        host : str
+            The host of the TCP socket, localhost by default
+        port : int
+            The port of the TCP socket, any free port by default
+        path : str, optional
+            Listen on a Unix socket at this path instead of TCP
+
+        Returns
+        =======
+        GradientService
+            The service itself, with address set
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._serve, path=path)
+            self.address = path
+        else:
+            self._server = await asyncio.start_server(self._serve, host, port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        return self
+
+    async def close(self):
+        """Stops listening and waits for the queued queries to be answered."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for queue in self._queues.values():
+            await queue.join()
+        for batcher in self._batchers.values():
+            batcher.cancel()
+        self._batchers.clear()
+        self._queues.clear()
+
+    async def evaluate(self, name, x):
+        """Queues a query and waits for the evaluation of its batch.
+
+        Parameters
+        ======
+        name : str
+            The name the function(s) were registered under
+        x : list of int, float
+            The point
+
+        Returns
+        =======
+        tuple of numpy arrays
+            The values, of shape (n_outputs,), and the Jacobian, of shape (n_outputs, n_inputs)
+
+        Raises
+        =======
+        KeyError: No function is registered under the name
+        """
+        if name not in self._fns:
+            raise KeyError(f"No function is registered under `{name}`")
+        point = np.asarray(x, dtype=float).ravel()
+        # Points with a different number of inputs cannot share a batch
+        key = (name, len(point))
+        if key not in self._queues:
+            self._queues[key] = asyncio.Queue()
+            self._batchers[key] = asyncio.ensure_future(self._batch(name, self._queues[key]))
+        future = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        await self._queues[key].put((point, future, time.perf_counter()))
+        return await future
+
+    async def _batch(self, name, queue):
+        """Collects the queries of one function and number of inputs into batches and evaluates them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            queries = [await queue.get()]
+            # Wait out the window for more queries, unless enough for a full batch are queued
+            if queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.window)
+            while len(queries) < self.max_batch and not queue.empty():
+                queries.append(queue.get_nowait())
+            points = np.array([point for point, _, _ in queries])
+            try:
+                # The thread keeps the service reading new queries while the batch is evaluated
+                values, jacob = await loop.run_in_executor(None, self._evaluate, self._fns[name], points)
+            except Exception as error:
+                for _, future, _ in queries:
+                    if not future.done():
+                        future.set_exception(error)
+            else:
+                now = time.perf_counter()
+                for k, (_, future, start) in enumerate(queries):
+                    self._latencies.append(now - start)
+                    if not future.done():
+                        future.set_result((values[k], jacob[k]))
+            self.batches += 1
+            # Batch sizes are counted in power of two buckets: 1, 2-3, 4-7, ...
+            bucket = 1 << (len(queries).bit_length() - 1)
+            self._sizes[bucket] = self._sizes.get(bucket, 0) + 1
+            for _ in queries:
+                queue.task_done()
+
+    def stats(self):
+        """Returns the statistics of the service.
+
+        Returns
+        =======
+        dict
+            The number of queued queries (queue_depth), of queries and of batches, the number of
+            batches in every power of two bucket of sizes (batch_sizes, keyed by the bucket's lower
+            bound), the mean batch size and the p50, p90 and p99 latencies in milliseconds
+        """
+        latencies = np.array(self._latencies) * 1e3
+        percentiles = {f'p{q}': float(np.percentile(latencies, q)) if len(latencies) else None
+                       for q in (50, 90, 99)}
+        return {
+            'queue_depth': sum(queue.qsize() for queue in self._queues.values()),
+            'requests': self.requests,
+            'batches': self.batches,
+            'batch_sizes': dict(sorted(self._sizes.items())),
+            'mean_batch_size': self.requests / self.batches if self.batches else None,
+            'latency_ms': percentiles,
+        }
+
+    async def _serve(self, reader, writer):
+        """Answers the queries of one client, each as soon as its batch is evaluated."""
+        pending = set()
+        lock = asyncio.Lock()
+
+        async def reply(message):
+            async with lock:
+                writer.write(json.dumps(message).encode() + b'\n')
+                await writer.drain()
+
+        async def answer(query):
+            id_ = query.get('id') if isinstance(query, dict) else None
+            try:
+                op = query.get('op', 'grad')
+                if op == 'stats':
+                    return await reply({'id': id_, 'stats': self.stats()})
+                values, jacob = await self.evaluate(query['fn'], query['x'])
+                message = {'id': id_, 'values': values.tolist()}
+                if op != 'values':
+                    message['jacobian'] = jacob.tolist()
+            except Exception as error:
+                message = {'id': id_, 'error': f'{type(error).__name__}: {error}'}
+            await reply(message)
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    query = json.loads(line)
+                except ValueError as error:
+                    await reply({'id': None, 'error': f'Invalid query: {error}'})
+                    continue
+                # Queries of one client are answered concurrently, so they can share batches
+                task = asyncio.ensure_future(answer(query))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            writer.close()
+
+
+class GradientClient:
+    """An asyncio client of a GradientService.
+
+    Queries are pipelined over one connection: every query gets an id, and replies are matched to
+    waiting queries by their id, in whatever order they arrive.
+
+    Methods
+    ======
+        connect(host, port, path)
+            Connects to a service over TCP, or over a Unix socket if a path is given
+        grad(name, x)
+            Returns the values and the Jacobian of function(s) at a point
+        values(name, x)
+            Returns the values of function(s) at a point
+        stats()
+            Returns the statistics of the service
+        close()
+            Closes the connection
+    """
+
+    def __init__(self):
+        """Constructor for the GradientClient class."""
+        self._reader = None
+        self._writer = None
+        self._ids = itertools.count()
+        self._waiting = {}
+        self._listener = None
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=None, path=None):
+        """Connects to a service.
+
+        Parameters
+        ======
+        host : str
+            The host of the TCP socket
+        port : int
+            The port of the TCP socket
+        path : str, optional
+            Connect to a Unix socket at this path instead of TCP
+
+        Returns
+        =======
+        GradientClient
+            The connected client
+
+        Examples
+        =======
+        >>> service = GradientService()
+        >>> service.register('product', lambda x, y: x * y)
+        >>> await service.start()
+        >>> client = await GradientClient.connect(*service.address)
+        >>> print(await client.grad('product', [2, 3]))
+        (array([6.]), array([[3., 2.]]))
+        """
+        client = cls()
+        if path is not None:
+            client._reader, client._writer = await asyncio.open_unix_connection(path)
+        else:
+            client._reader, client._writer = await asyncio.open_connection(host, port)
+        client._listener = asyncio.ensure_future(client._listen())
+        return client
+
+    async def _listen(self):
+        """Hands every reply to the query waiting for its id."""
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                future = self._waiting.pop(message.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("The service closed the connection"))
+            self._waiting.clear()
+
+    async def _query(self, **query):
+        """Sends a query and waits for its reply.
+
+        Raises
+        =======
+        RuntimeError: The error the service replied with
+        """
+        query['id'] = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[query['id']] = future
+        self._writer.write(json.dumps(query).encode() + b'\n')
+        await self._writer.drain()
+        message = await future
+        if 'error' in message:
+            raise RuntimeError(message['error'])
+        return message
+
+    async def grad(self, name, x):
+        """Returns the values and the Jacobian of the function(s) registered under a name.
+
+        Parameters
+        ======
+        name : str
+            The name the function(s) were registered under
+        x : list of int, float
+            The point
+
+        Returns
+        =======
+        tuple of numpy arrays
+            The values, of shape (n_outputs,), and the Jacobian, of shape (n_outputs, n_inputs)
+        """
+        message = await self._query(fn=name, x=list(map(float, x)))
+        return np.array(message['values']), np.array(message['jacobian'])
+
+    async def values(self, name, x):
+        """Returns the values of the function(s) registered under a name at a point."""
+        message = await self._query(fn=name, x=list(map(float, x)), op='values')
+        return np.array(message['values'])
+
+    async def stats(self):
+        """Returns the statistics of the service, see GradientService.stats."""
+        return (await self._query(op='stats'))['stats']
+
+    async def close(self):
+        """Closes the connection."""
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._listener
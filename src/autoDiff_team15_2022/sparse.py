@@ -0,0 +1,243 @@
+import numpy as np
+from .dualNum import DualNumber
+from .node import Node, Trace, _topological_order
+from .differentiation import _outputs, _fns
+
+class SparseJacobian:
+    """A Jacobian stored in compressed sparse row (CSR) format.
+
+    The column indices and values of row r are indices[indptr[r]:indptr[r + 1]] and
+    data[indptr[r]:indptr[r + 1]], with the columns of every row in increasing order. The arrays
+    follow the layout of scipy.sparse.csr_matrix, so csr_matrix((data, indices, indptr), shape)
+    converts it without copying when scipy is available.
+
+    Attributes
+    ======
+        data : numpy array
+            The stored entries, row by row
+        indices : numpy array
+            The column of every stored entry
+        indptr : numpy array
+            The position of the first stored entry of every row, and the number of entries at the end
+        shape : tuple
+            The number of outputs and inputs
+        colors : numpy array or None
+            The color of every column, i.e. the forward pass that computed it
+        passes : int
+            The number of forward passes the Jacobian took
+
+    Methods
+    ======
+        nnz
+            The number of stored entries
+        toarray()
+            Returns the Jacobian as a dense numpy array
+        tocoo()
+            Returns the row, column and value of every stored entry
+    """
+
+    def __init__(self, data, indices, indptr, shape, colors=None):
+        """Constructor for the SparseJacobian class.
+
+        Parameters
+        ======
+        data : array-like
+            The stored entries, row by row
+        indices : array-like
+            The column of every stored entry
+        indptr : array-like
+            The position of the first stored entry of every row, followed by the number of entries
+        shape : tuple
+            The number of outputs and inputs
+        colors : array-like, optional
+            The color of every column
+        """
+        self.data = np.asarray(data, dtype=float)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.shape = tuple(shape)
+        self.colors = None if colors is None else np.asarray(colors, dtype=np.int64)
+        self.passes = 0 if colors is None or len(self.colors) == 0 else int(self.colors.max()) + 1
+
+    @property
+    def nnz(self):
+        """Returns the number of stored entries."""
+        return len(self.data)
+
+    def toarray(self):
+        """Returns the Jacobian as a dense numpy array.
+
+        Examples
+        =======
+        >>> jac = SparseJacobian([1., 2.], [0, 1], [0, 1, 2], (2, 2))
+        >>> print(jac.toarray())
+        [[1. 0.]
+         [0. 2.]]
+        """
+        dense = np.zeros(self.shape)
+        rows, cols, data = self.tocoo()
+        dense[rows, cols] = data
+        return dense
+
+    def tocoo(self):
+        """Returns the stored entries in coordinate (COO) format.
+
+        Returns
+        =======
+        tuple of numpy arrays
+            The row, the column and the value of every stored entry
+        """
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        return rows, self.indices.copy(), self.data.copy()
+
+
+def sparsity_pattern(fn, args):
+    """Returns which inputs every output of function(s) depends on.
+
+    The functions are traced once with Node inputs, and every Node is given the set of inputs it
+    depends on, stored as the bits of an integer, as the union of the sets of its parents. The
+    pattern is that of the operations taken at args, so functions that branch on their inputs
+    may have a different pattern at other points.
+
+    Parameters
+    ==========
+    fn : function or list of functions
+        Defined mulivariable function(s)
+    args : list of int, float, np.int32, np.int64
+        Point at which the functions are traced
+
+    Returns
+    ==========
+    SparseJacobian
+        The pattern, with a stored entry of 1 wherever an output depends on an input
+
+    Examples
+    ==========
+    >>> def fn(x, y, z):
+    >>>     return [x * y, sin(z)]
+    >>> print(sparsity_pattern(fn, [1, 2, 3]).toarray())
+    [[1. 1. 0.]
+     [0. 0. 1.]]
+    """
+    with Trace() as trace:
+        inputs = trace.variables(args)
+        outputs = []
+        for f in _fns(fn):
+            outputs.extend(_outputs(f(*inputs)))
+        nodes = [out for out in outputs if isinstance(out, Node)]
+        masks = {id(node): 1 << i for i, node in enumerate(inputs)}
+        # Parents come first in topological order, so their sets are complete when a child is reached
+        for node in _topological_order(nodes):
+            if id(node) not in masks:
+                mask = 0
+                for parent in node._parents[1::2]:
+                    mask |= masks[id(parent)]
+                masks[id(node)] = mask
+    indices = []
+    indptr = [0]
+    for out in outputs:
+        mask = masks[id(out)] if isinstance(out, Node) else 0
+        # Read the set bits from the lowest up, so the columns of a row are sorted
+        while mask:
+            low = mask & -mask
+            indices.append(low.bit_length() - 1)
+            mask ^= low
+        indptr.append(len(indices))
+    return SparseJacobian(np.ones(len(indices)), indices, indptr, (len(outputs), len(args)))
+
+def color_columns(pattern):
+    """Colors the columns of a sparsity pattern so that columns of the same color share no row.
+
+    Columns of one color are structurally orthogonal, so a single forward pass seeded with the sum
+    of their unit vectors gives all of them: every nonzero of the compressed column belongs to
+    exactly one of them. Columns are colored greedily, those with the most nonzeros first, each
+    with the smallest color none of its neighbours has. A banded pattern of bandwidth b takes b
+    colors.
+
+    Parameters
+    ==========
+    pattern : SparseJacobian
+        The sparsity pattern, e.g. from sparsity_pattern()
+
+    Returns
+    ==========
+    numpy array
+        The color of every column, from 0 to the number of colors minus one
+
+    Examples
+    ==========
+    >>> pattern = SparseJacobian(np.ones(4), [0, 1, 1, 2], [0, 2, 4], (2, 3))
+    >>> print(color_columns(pattern))
+    [1 0 1]
+    """
+    n = pattern.shape[1]
+    rows, cols, _ = pattern.tocoo()
+    # The rows of every column, and the columns of every row
+    column_rows = [[] for _ in range(n)]
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        column_rows[c].append(r)
+    row_columns = np.split(pattern.indices, pattern.indptr[1:-1])
+    row_columns = [row.tolist() for row in row_columns]
+    colors = [-1] * n
+    order = sorted(range(n), key=lambda c: -len(column_rows[c]))
+    for c in order:
+        taken = {colors[other] for r in column_rows[c] for other in row_columns[r]}
+        color = 0
+        while color in taken:
+            color += 1
+        colors[c] = color
+    return np.array(colors, dtype=np.int64)
+
+def sparse_jacobian(fn, args, pattern=None, colors=None):
+    """Returns the Jacobian of function(s) with a sparse structure in compressed sparse row format.
+
+    Each function is evaluated once, with every input carrying as its dual part the unit vector of
+    its color, so the number of tangents is the number of colors rather than the number of inputs.
+    Every nonzero is read from the tangent of its column's color.
+
+    Parameters
+    ==========
+    fn : function or list of functions
+        Defined mulivariable function(s)
+    args : list of int, float, np.int32, np.int64
+        Values at which the partial derivatives are evalauted at
+    pattern : SparseJacobian, optional
+        The sparsity pattern, traced at args by default. Passing the pattern of an earlier call
+        skips the trace when the pattern does not depend on the point.
+    colors : array-like, optional
+        The color of every column, computed from the pattern by default
+
+    Returns
+    ==========
+    SparseJacobian
+        The first order partial derivatives, with the colors used to compute them
+
+    Examples
+    ==========
+    >>> def fn(x, y, z):
+    >>>     return [x * y, y + z, z ** 2]
+    >>> jac = sparse_jacobian(fn, [1, 2, 3])
+    >>> print(jac.toarray(), jac.passes)
+    [[2. 1. 0.]
+     [0. 1. 1.]
+     [0. 0. 6.]] 2
+    """
+    if pattern is None:
+        pattern = sparsity_pattern(fn, args)
+    if colors is None:
+        colors = color_columns(pattern)
+    colors = np.asarray(colors, dtype=np.int64)
+    passes = int(colors.max()) + 1 if len(colors) else 0
+    seeds = np.eye(max(passes, 1))
+    inputs = [DualNumber(arg, seeds[color]) for arg, color in zip(args, colors.tolist())]
+    outputs = []
+    for f in _fns(fn):
+        outputs.extend(_outputs(f(*inputs)))
+    # The compressed Jacobian has one row per output and one column per color
+    compressed = np.zeros((len(outputs), max(passes, 1)))
+    for k, out in enumerate(outputs):
+        if isinstance(out, DualNumber):
+            compressed[k] = out.dual
+    rows, cols, _ = pattern.tocoo()
+    data = compressed[rows, colors[cols]]
+    return SparseJacobian(data, pattern.indices.copy(), pattern.indptr.copy(), pattern.shape, colors)
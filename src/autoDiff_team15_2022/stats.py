@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import Counter, deque
+import numpy as np
+from . import hooks
+from .dualNum import DualNumber
+from .node import Node, _topological_order
+from .tape import TapeNode
+
+class DriverStats:
+    """Counters, graph statistics and latencies of the calls of one driver.
+
+    While a driver's stats are enabled, every elementary function and operator is hooked (see
+    hooks.register) and counted during the driver's calls, in the thread making the call, and the
+    function(s) it differentiates are wrapped to count their evaluations. Only the outermost
+    operations are hooked, so allocations made inside an operation are not counted. Every counter is kept for the last call and summed over all
+    calls.
+
+    Attributes
+    ======
+        calls : int
+            The number of driver calls measured
+        function_calls : int
+            The number of evaluations of the function(s)
+        ops : collections.Counter
+            The number of calls of every elementary function and operator, e.g. 'sin' or 'mul'
+        allocations : collections.Counter
+            The number of DualNumbers, Nodes and TapeNodes returned by the outermost operations
+        nodes, edges : int
+            The number of nodes and edges of the graphs traced in reverse mode
+        max_depth : int
+            The length of the longest path from an input to an output of any traced graph
+        phases : dict
+            Seconds spent in every phase: 'forward', 'trace', 'backward' and 'other'
+        last : dict
+            The same counters for the last call alone, and its latency in seconds
+
+    Methods
+    ======
+        summary()
+            Returns every counter, the latency percentiles and the latency histogram as a dict
+        reset()
+            Sets every counter back to zero
+    """
+    _counters = ('function_calls', 'nodes', 'edges')
+
+    def __init__(self, max_latencies=10000):
+        """Constructor for the DriverStats class.
+
+        Parameters
+        ======
+        max_latencies : int
+            The number of recent call latencies the percentiles are computed from
+        """
+        self._latencies = deque(maxlen=max_latencies)
+        self._active = False
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        """Sets every counter back to zero and forgets the latencies."""
+        self.calls = 0
+        self.function_calls = 0
+        self.ops = Counter()
+        self.allocations = Counter()
+        self.nodes = 0
+        self.edges = 0
+        self.max_depth = 0
+        self.phases = {}
+        self.last = self._empty()
+        self._latencies.clear()
+
+    @staticmethod
+    def _empty():
+        """Returns the counters of a call that has not done anything yet."""
+        return {'function_calls': 0, 'ops': Counter(), 'allocations': Counter(), 'nodes': 0, 'edges': 0,
+                'max_depth': 0, 'phases': {}, 'latency': 0.0}
+
+    def _attach(self):
+        """Starts hooking the elementary functions and operators for these stats."""
+        hooks.register(self)
+
+    def _detach(self):
+        """Stops hooking the elementary functions and operators for these stats."""
+        hooks.unregister(self)
+
+    def _op(self, op, kind, result, elapsed):
+        """Counts one elementary function or operator call, during a call of the driver."""
+        if self._active and threading.get_ident() == self._thread:
+            last = self.last
+            last['ops'][op] += 1
+            kind = type(result)
+            if kind is DualNumber or kind is Node or kind is TapeNode:
+                last['allocations'][kind.__name__] += 1
+
+    def _counting(self, fns):
+        """Returns the function(s) wrapped to count their evaluations."""
+        def counted(f):
+            def fn(*args):
+                self.last['function_calls'] += 1
+                return f(*args)
+            fn.__wrapped__ = f
+            return fn
+        return [counted(f) for f in fns]
+
+    def _measure(self, method, *args):
+        """Calls a driver method, recording its counters, phases and latency as one call."""
+        self.last = self._empty()
+        self._thread = threading.get_ident()
+        self._active = True
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            latency = time.perf_counter() - start
+            self._active = False
+            self._finish(latency)
+
+    def _phase(self, name, seconds):
+        """Adds the seconds spent in one phase of the current call."""
+        phases = self.last['phases']
+        phases[name] = phases.get(name, 0.0) + seconds
+
+    def _graph(self, outputs):
+        """Counts the nodes, edges and depth of the graph traced for the current call."""
+        nodes = [z for z in outputs if isinstance(z, Node)]
+        entries = [z for z in outputs if isinstance(z, TapeNode)]
+        n_nodes = n_edges = max_depth = 0
+        if nodes:
+            depth = {}
+            # Parents come first in topological order, so the depth of a node is one more than theirs
+            for node in _topological_order(nodes):
+                parents = node._parents[1::2]
+                depth[id(node)] = 1 + max([depth[id(p)] for p in parents]) if parents else 0
+                n_edges += len(parents)
+            n_nodes = len(depth)
+            max_depth = max(depth.values())
+        if entries:
+            tape = entries[0].tape
+            size = max(z.index for z in entries) + 1
+            parents = tape._parents[:size].tolist()
+            depth = [0] * size
+            for i, (a, b) in enumerate(parents):
+                if a >= 0:
+                    depth[i] = 1 + max(depth[a], depth[b] if b >= 0 else 0)
+            n_nodes = size
+            n_edges = int((tape._parents[:size] >= 0).sum())
+            max_depth = max(depth)
+        self.last.update(nodes=n_nodes, edges=n_edges, max_depth=max_depth)
+
+    def _finish(self, latency):
+        """Adds the counters of the call that just ended to the totals."""
+        last = self.last
+        last['latency'] = latency
+        # Time outside the measured phases is driver overhead
+        last['phases']['other'] = max(latency - sum(last['phases'].values()), 0.0)
+        self.calls += 1
+        for name in self._counters:
+            setattr(self, name, getattr(self, name) + last[name])
+        self.ops.update(last['ops'])
+        self.allocations.update(last['allocations'])
+        self.max_depth = max(self.max_depth, last['max_depth'])
+        for name, seconds in last['phases'].items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+        self._latencies.append(latency)
+
+    def percentile(self, q):
+        """Returns a percentile of the recent call latencies in seconds, or None before any call."""
+        if not self._latencies:
+            return None
+        return float(np.percentile(self._latencies, q))
+
+    def histogram(self):
+        """Returns the number of recent calls in every power of two bucket of latencies.
+
+        Returns
+        =======
+        dict
+            Maps the lower bound of every bucket in microseconds, 1, 2, 4, ..., to its number of calls
+        """
+        counts = Counter()
+        for latency in self._latencies:
+            micros = int(latency * 1e6)
+            counts[1 << (micros.bit_length() - 1) if micros else 0] += 1
+        return dict(sorted(counts.items()))
+
+    def summary(self):
+        """Returns every counter of the driver as a dict.
+
+        Returns
+        =======
+        dict
+            The cumulative counters, the p50 and p99 latencies in seconds, the latency histogram and
+            the counters of the last call under 'last'
+
+        Examples
+        =======
+        >>> ad = Reverse_AD(lambda x, y: x * sin(y), stats=True)
+        >>> der = ad.grad([1, 2])
+        >>> summary = ad.stats.summary()
+        >>> print(summary['function_calls'], dict(summary['ops']), summary['nodes'], summary['edges'])
+        1 {'sin': 1, 'mul': 1} 4 3
+        """
+        return {
+            'calls': self.calls,
+            'function_calls': self.function_calls,
+            'ops': dict(self.ops),
+            'allocations': dict(self.allocations),
+            'nodes': self.nodes,
+            'edges': self.edges,
+            'max_depth': self.max_depth,
+            'phases': dict(self.phases),
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'histogram': self.histogram(),
+            'last': {**self.last, 'ops': dict(self.last['ops']), 'allocations': dict(self.last['allocations'])},
+        }
@@ -0,0 +1,371 @@
+import numpy as np
+from .node import _rpow_partial
+
+# Operations that can be recorded on a tape, indexed by their op code
+_OPS = ('input', 'add', 'sub', 'mul', 'div', 'pow', 'neg', 'pos',
+        'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan',
+        'sinh', 'cosh', 'tanh', 'exp', 'log', 'logistic')
+_OP_CODES = {op: code for code, op in enumerate(_OPS)}
+
+class Tape:
+    """A flat, array-backed record of operations for reverse mode automatic differentiation.
+
+    Every operation occupies one entry of preallocated numpy buffers holding its op code, its value,
+    the indices of up to two parent entries and the local partial derivatives with respect to them.
+    A single sweep over the entries in reverse order accumulates the adjoints of every entry.
+
+    Attributes
+    ======
+        size : int
+            The number of entries recorded on the tape
+        capacity : int
+            The number of entries the buffers can hold before growing
+
+    Methods
+    ======
+        variable(value)
+            Records an input entry and returns the TapeNode referring to it
+        backward(output, seed)
+            Sweeps the tape in reverse order and returns the adjoint of every entry
+        backward_many(outputs, seeds)
+            Sweeps the tape once for several seeded outputs and returns the adjoint of every entry
+        jacobian(outputs, indices, out)
+            Sweeps the tape once per output and returns the adjoints of the given entries
+        clear()
+            Discards every recorded entry while keeping the buffers
+    """
+
+    def __init__(self, capacity=1024):
+        """Constructor for the Tape class.
+
+        Parameters
+        ======
+        capacity : int
+            The number of entries to preallocate. The buffers double in size whenever they fill up.
+        """
+        self.capacity = max(int(capacity), 1)
+        self.size = 0
+        self._ops = np.empty(self.capacity, dtype=np.int8)
+        self._values = np.empty(self.capacity)
+        self._parents = np.empty((self.capacity, 2), dtype=np.int64)
+        self._partials = np.empty((self.capacity, 2))
+
+    def __len__(self):
+        """Returns the number of entries recorded on the tape."""
+        return self.size
+
+    def _grow(self):
+        """Doubles the capacity of every buffer, keeping the recorded entries."""
+        self.capacity *= 2
+        for name in ('_ops', '_values', '_parents', '_partials'):
+            old = getattr(self, name)
+            new = np.empty((self.capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _push(self, op, value, parent=-1, partial=0.0, other=-1, other_partial=0.0):
+        """Records one operation and returns the TapeNode referring to it.
+
+        Parameters
+        ======
+        op : str
+            Name of the recorded operation
+        value : int, float
+            Value of the operation
+        parent, other : int
+            Tape indices of the operands, -1 when absent
+        partial, other_partial : int, float
+            Local partial derivatives of the value with respect to the operands
+
+        Returns
+        =======
+        TapeNode
+            The recorded entry
+        """
+        if self.size == self.capacity:
+            self._grow()
+        i = self.size
+        self._ops[i] = _OP_CODES[op]
+        self._values[i] = value
+        self._parents[i, 0] = parent
+        self._parents[i, 1] = other
+        self._partials[i, 0] = partial
+        self._partials[i, 1] = other_partial
+        self.size = i + 1
+        return TapeNode(self, i, value)
+
+    def variable(self, value):
+        """Records an input entry.
+
+        Parameters
+        ======
+        value : int, float, np.int32, np.int64
+            The value of the input
+
+        Returns
+        =======
+        TapeNode
+            The input entry
+
+        Examples
+        =======
+        >>> tape = Tape()
+        >>> x = tape.variable(3)
+        >>> y = x * x
+        >>> print(tape.backward(y)[x.index])
+        6.0
+        """
+        return self._push('input', value)
+
+    def backward(self, output, seed=1.0):
+        """Sweeps the tape once in reverse order, starting from an output entry.
+
+        Parameters
+        ======
+        output : TapeNode
+            The entry whose derivatives are computed
+        seed : int, float
+            The adjoint of the output entry
+
+        Returns
+        =======
+        numpy array
+            The adjoint of every entry on the tape, i.e. the derivative of the output with respect to it
+
+        Raises
+        =======
+        ValueError: The output was recorded on a different tape
+        """
+        return self.backward_many([output], [seed])
+
+    def backward_many(self, outputs, seeds):
+        """Sweeps the tape once in reverse order, starting from several seeded output entries.
+
+        Parameters
+        ======
+        outputs : list of TapeNodes
+            The entries whose derivatives are combined
+        seeds : list of int, float
+            The adjoint of each output entry
+
+        Returns
+        =======
+        numpy array
+            The adjoint of every entry on the tape, i.e. the derivative of the sum of the outputs
+            weighted by their seeds with respect to it
+
+        Raises
+        =======
+        ValueError: An output was recorded on a different tape
+        """
+        adjoint = [0.0] * self.size
+        last = self._last(outputs)
+        for output, seed in zip(outputs, seeds):
+            adjoint[output.index] += seed
+        parents, partials = self._edges(last)
+        _sweep(adjoint, last, parents, partials)
+        return np.array(adjoint)
+
+    def jacobian(self, outputs, indices, out=None):
+        """Sweeps the tape once per output entry, converting the recorded edges only once.
+
+        Parameters
+        ======
+        outputs : list of TapeNodes
+            The entries differentiated, one row each
+        indices : list of int
+            The tape indices of the entries they are differentiated with respect to, one column each
+        out : numpy array, optional
+            Float64 array of shape (len(outputs), len(indices)) the adjoints are written into
+
+        Returns
+        =======
+        numpy array
+            The adjoint of every given entry for every output, out itself if given
+
+        Raises
+        =======
+        ValueError: An output was recorded on a different tape
+
+        Examples
+        =======
+        >>> tape = Tape()
+        >>> x, y = tape.variable(2), tape.variable(3)
+        >>> print(tape.jacobian([x * y, x + y], [x.index, y.index]))
+        [[3. 2.]
+         [1. 1.]]
+        """
+        jacobian = np.empty((len(outputs), len(indices))) if out is None else out
+        if not outputs:
+            return jacobian
+        last = self._last(outputs)
+        parents, partials = self._edges(last)
+        for row, output in enumerate(outputs):
+            adjoint = [0.0] * (last + 1)
+            adjoint[output.index] = 1.0
+            _sweep(adjoint, output.index, parents, partials)
+            jacobian[row] = [adjoint[j] for j in indices]
+        return jacobian
+
+    def _last(self, outputs):
+        """Returns the largest index of the output entries, checking they were recorded on this tape."""
+        last = -1
+        for output in outputs:
+            if output.tape is not self:
+                raise ValueError("Output was not recorded on this tape")
+            last = max(last, output.index)
+        return last
+
+    def _edges(self, last):
+        """Returns the parents and partials of the entries up to last as python lists.
+
+        Indexing numpy buffers element-wise is much slower than indexing lists, so the sweeps work
+        on lists converted once.
+        """
+        return self._parents[:last + 1].tolist(), self._partials[:last + 1].tolist()
+
+    def ops(self):
+        """Returns the names of the recorded operations in the order they were recorded."""
+        return [_OPS[code] for code in self._ops[:self.size]]
+
+    def clear(self):
+        """Discards every recorded entry while keeping the buffers for reuse."""
+        self.size = 0
+
+
+def _sweep(adjoint, last, parents, partials):
+    """Accumulates the adjoints of the entries from last down to the first, in place."""
+    for i in range(last, -1, -1):
+        a = adjoint[i]
+        if a == 0.0:
+            continue
+        parent, other = parents[i]
+        if parent >= 0:
+            adjoint[parent] += a * partials[i][0]
+            if other >= 0:
+                adjoint[other] += a * partials[i][1]
+
+
+class TapeNode:
+    """A lightweight handle to one entry of a Tape.
+
+    Attributes
+    ======
+        tape : Tape
+            The tape the entry is recorded on
+        index : int
+            The position of the entry on the tape
+        value : int, float
+            The value of the entry
+
+    Methods
+    ======
+        __add__(other), __radd__(other), __sub__(other), __rsub__(other)
+            Enables addition and subtraction of entries with entries or numbers
+        __mul__(other), __rmul__(other), __truediv__(other), __rtruediv__(other)
+            Enables multiplication and division of entries with entries or numbers
+        __pow__(other), __rpow__(other)
+            Enables powers of entries and numbers
+        __neg__(), __pos__()
+            Enables negating an entry and taking its positive
+    """
+    __slots__ = ('tape', 'index', 'value')
+    _supported_types = (int, float, np.int32, np.int64, np.float32, np.float64)
+
+    def __init__(self, tape, index, value):
+        """Constructor for the TapeNode class.
+
+        Parameters
+        ======
+        tape : Tape
+            The tape the entry is recorded on
+        index : int
+            The position of the entry on the tape
+        value : int, float
+            The value of the entry
+        """
+        self.tape = tape
+        self.index = index
+        self.value = value
+
+    def _unary(self, op, value, partial):
+        """Records an operation with this entry as its only operand."""
+        return self.tape._push(op, value, self.index, partial)
+
+    def _operand(self, other, name):
+        """Returns the value and tape index of another entry, or a number and -1.
+
+        Raises
+        =======
+        TypeError: Type `[input type]` is not supported for [operation]
+        ValueError: Cannot combine entries recorded on different tapes
+        """
+        if isinstance(other, TapeNode):
+            if other.tape is not self.tape:
+                raise ValueError("Cannot combine entries recorded on different tapes")
+            return other.value, other.index
+        elif not isinstance(other, self._supported_types):
+            raise TypeError(
+                f"Type `{type(other)}` is not supported for {name}"
+            )
+        return other, -1
+
+    def __add__(self, other):
+        """Records the sum of an entry and an entry or a number."""
+        b, j = self._operand(other, 'addition')
+        return self.tape._push('add', self.value + b, self.index, 1.0, j, 1.0)
+
+    def __radd__(self, other):
+        """Records the sum of a number and an entry."""
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """Records the difference of an entry and an entry or a number."""
+        b, j = self._operand(other, 'subtraction')
+        return self.tape._push('sub', self.value - b, self.index, 1.0, j, -1.0)
+
+    def __rsub__(self, other):
+        """Records the difference of a number and an entry."""
+        b, _ = self._operand(other, 'subtraction')
+        return self.tape._push('sub', b - self.value, self.index, -1.0)
+
+    def __mul__(self, other):
+        """Records the product of an entry and an entry or a number."""
+        b, j = self._operand(other, 'multiplication')
+        return self.tape._push('mul', self.value * b, self.index, b, j, self.value)
+
+    def __rmul__(self, other):
+        """Records the product of a number and an entry."""
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        """Records the quotient of an entry and an entry or a number."""
+        b, j = self._operand(other, 'division')
+        return self.tape._push('div', self.value / b, self.index, 1 / b, j, -self.value / b ** 2)
+
+    def __rtruediv__(self, other):
+        """Records the quotient of a number and an entry."""
+        b, _ = self._operand(other, 'division')
+        return self.tape._push('div', b / self.value, self.index, -b / self.value ** 2)
+
+    def __pow__(self, other):
+        """Records an entry raised to the power of an entry or a number."""
+        a = self.value
+        b, j = self._operand(other, 'powers')
+        # The log of the base is only needed, and only defined, when the exponent is recorded
+        other_partial = a ** b * np.log(a) if j >= 0 else 0.0
+        return self.tape._push('pow', a ** b, self.index, b * a ** (b - 1), j, other_partial)
+
+    def __rpow__(self, other):
+        """Records a number raised to the power of an entry."""
+        b, _ = self._operand(other, 'powers')
+        power = b ** self.value
+        return self.tape._push('pow', power, self.index, _rpow_partial(b, power))
+
+    def __neg__(self):
+        """Records the negative of an entry."""
+        return self._unary('neg', -self.value, -1.0)
+
+    def __pos__(self):
+        """Records the positive of an entry."""
+        return self._unary('pos', self.value, 1.0)
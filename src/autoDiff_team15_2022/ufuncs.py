@@ -0,0 +1,197 @@
+"""numpy protocol support for DualNumber and Node.
+
+The ufuncs mapped in _ufuncs are differentiated with the package's derivative rules, as are np.sum
+(without an axis) and np.dot of one dimensional operands. Ufuncs without a derivative rule here,
+such as np.abs, np.maximum, np.minimum, np.floor and the comparisons, are not supported and raise
+a TypeError; the traced numbers do not implement abs() or comparisons either.
+"""
+import operator
+import numpy as np
+
+# Built on first use, the elementary functions import the classes that use this module
+_ufunc_table = None
+_function_table = None
+
+def _ufuncs():
+    """Returns the mapping from numpy ufuncs to the package's differentiable implementations."""
+    global _ufunc_table
+    if _ufunc_table is None:
+        from . import elemFunctions as ef
+        _ufunc_table = {
+            np.sin: ef.sin, np.cos: ef.cos, np.tan: ef.tan,
+            np.arcsin: ef.arcsin, np.arccos: ef.arccos, np.arctan: ef.arctan,
+            np.sinh: ef.sinh, np.cosh: ef.cosh, np.tanh: ef.tanh,
+            np.exp: ef.exp,
+            # numpy's log is the natural logarithm, the package's log defaults to base 10
+            np.log: lambda x: ef.log(x, np.e),
+            np.log10: ef.log,
+            np.log2: lambda x: ef.log(x, 2),
+            np.sqrt: lambda x: x ** 0.5,
+            np.square: lambda x: x * x,
+            np.negative: operator.neg,
+            np.positive: operator.pos,
+            np.add: operator.add,
+            np.subtract: operator.sub,
+            np.multiply: operator.mul,
+            np.true_divide: operator.truediv,
+            np.power: operator.pow,
+        }
+    return _ufunc_table
+
+def _functions():
+    """Returns the mapping from numpy functions to implementations for traced numbers."""
+    global _function_table
+    if _function_table is None:
+        _function_table = {np.sum: _sum, np.dot: _dot}
+    return _function_table
+
+def _sum(a, axis=None, **kwargs):
+    """Sums every entry of an array-valued DualNumber or Node into a single traced number."""
+    if axis is not None or kwargs or not isinstance(a, NumpyOperand):
+        return NotImplemented
+    return a._sum()
+
+def _dot(a, b, **kwargs):
+    """Dot product of one dimensional operands, at least one of which is traced."""
+    if kwargs or np.ndim(_primal(a)) > 1 or np.ndim(_primal(b)) > 1:
+        return NotImplemented
+    return np.sum(np.multiply(a, b))
+
+def _primal(x):
+    """Returns the value a traced number carries, or x itself for anything else."""
+    return x._primal() if isinstance(x, NumpyOperand) else x
+
+def _boxed(x):
+    """Returns x as an object array, so numpy's object loop does not hand it back to __array_ufunc__."""
+    if isinstance(x, np.ndarray):
+        return x
+    boxed = np.empty((), dtype=object)
+    boxed[()] = x
+    return boxed
+
+
+class NumpyOperand:
+    """Mixin implementing the numpy ufunc and array function protocols for traced numbers.
+
+    numpy functions such as np.sin or np.add called on a DualNumber or Node are mapped to the
+    derivative rules of elemFunctions and of the operators. Numeric arrays are treated as constants
+    and turned into a single array-valued traced number, so arrays go through the vectorized path.
+    Object arrays of DualNumbers are packed into one array-valued DualNumber in the same way.
+
+    Methods
+    ======
+        __array_ufunc__(ufunc, method, *inputs, **kwargs)
+            Evaluates a numpy ufunc with the package's derivative rules
+        __array_function__(func, types, args, kwargs)
+            Evaluates np.sum and np.dot on traced numbers
+        sin(), cos(), tan(), arcsin(), arccos(), arctan(), sinh(), cosh(), tanh(), exp(), log(), log10(), log2(), sqrt()
+            Called by numpy's object loops, so object arrays of traced numbers work element by element
+    """
+    __slots__ = ()
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Evaluates a numpy ufunc on traced operands.
+
+        Parameters
+        ======
+        ufunc : numpy.ufunc
+            The ufunc called, such as np.sin or np.multiply
+        method : str
+            How the ufunc was called, only direct calls are supported
+        inputs : tuple
+            The operands, traced numbers, numbers or numpy arrays
+        kwargs : dict
+            Keyword arguments of the call, none are supported
+
+        Returns
+        =======
+        DualNumber, Node, numpy array
+            The traced result, or NotImplemented so that numpy raises a TypeError
+
+        Example
+        =======
+        >>> x = DualNumber(0, 1)
+        >>> y = np.exp(x) * np.array([1., 2.])
+        >>> print(y.real, y.dual)
+        [1. 2.] [1. 2.]
+        """
+        if method != '__call__' or kwargs:
+            return NotImplemented
+        impl = _ufuncs().get(ufunc)
+        if impl is None:
+            return NotImplemented
+        kind = type(self)
+        operands = []
+        for x in inputs:
+            if isinstance(x, NumpyOperand) and not isinstance(x, kind):
+                return NotImplemented
+            if isinstance(x, np.ndarray):
+                x = kind._pack(x) if x.dtype == object else kind._constant(x)
+                # Arrays that cannot be packed are evaluated element by element
+                if x is None:
+                    return np.frompyfunc(impl, len(inputs), 1)(*[_boxed(x) for x in inputs])
+            elif isinstance(x, np.generic):
+                # numpy scalars would hand the operator straight back to this ufunc
+                x = x.item()
+            operands.append(x)
+        # The operators broadcast array-valued operands against each other
+        return impl(*operands)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """Evaluates numpy functions on traced numbers.
+
+        np.sum and np.dot are computed with the package's derivative rules. Every other function
+        is called on the traced numbers boxed in object arrays, so numpy's own implementation
+        applies the operators to them. Other types overriding numpy functions are left to handle
+        the call.
+        """
+        if not all(issubclass(t, (NumpyOperand, np.ndarray)) for t in types):
+            return NotImplemented
+        impl = _functions().get(func)
+        if impl is not None:
+            result = impl(*args, **kwargs)
+            if result is not NotImplemented:
+                return result
+        return func(*[_boxed(x) if isinstance(x, NumpyOperand) else x for x in args], **kwargs)
+
+    def sin(self):
+        return np.sin(self)
+
+    def cos(self):
+        return np.cos(self)
+
+    def tan(self):
+        return np.tan(self)
+
+    def arcsin(self):
+        return np.arcsin(self)
+
+    def arccos(self):
+        return np.arccos(self)
+
+    def arctan(self):
+        return np.arctan(self)
+
+    def sinh(self):
+        return np.sinh(self)
+
+    def cosh(self):
+        return np.cosh(self)
+
+    def tanh(self):
+        return np.tanh(self)
+
+    def exp(self):
+        return np.exp(self)
+
+    def log(self):
+        return np.log(self)
+
+    def log10(self):
+        return np.log10(self)
+
+    def log2(self):
+        return np.log2(self)
+
+    def sqrt(self):
+        return np.sqrt(self)
@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from autoDiff_team15_2022.driver import Forward_AD,Reverse_AD
+from autoDiff_team15_2022.driver import Forward_AD,Reverse_AD,Auto_AD,CostModel
 from autoDiff_team15_2022.elemFunctions import *
 
 class Test_forwardAD:
@@ -94,6 +94,18 @@ class Test_forwardAD:
         assert deriv[1][0] == 3*(3**2)
         assert deriv[1][1] == -1/((-2)**2)
 
+    def test_chunk_size(self):
+    #test that chunked forward AD matches the unchunked derivatives
+        def fn(x,y,z):
+            return x*y*z + exp(y)
+        def fn2(x,y,z):
+            return x**3 + 1/y - z
+        z = Forward_AD([fn,fn2], chunk_size=2)
+        deriv = z.grad([3,-2,1])
+        assert z.chunk_size == 2
+        assert np.allclose(deriv, Forward_AD([fn,fn2]).grad([3,-2,1]))
+        assert np.allclose(deriv[0], [-2, 3 + np.exp(-2), -6])
+
 class Test_reverseAD:
     """This class evaluates forward mode class implementation in driver.py.
 
@@ -181,4 +193,200 @@ class Test_reverseAD:
         assert deriv[0][0] == 2**3*np.log(2)
         assert deriv[0][1] == np.exp(-2)
         assert deriv[1][0] == 3*(3**2)
-        assert deriv[1][1] == -1/((-2)**2)
\ No newline at end of file
+        assert deriv[1][1] == -1/((-2)**2)
+    def test_batch(self):
+    #test batched values and gradients agree between forward and reverse AD
+        def fn(x,y):
+            return 2**x + exp(y) * tanh(x)
+        def fn2(x,y):
+            return x**y + 1/y
+        points = [[3,-2],[1,0.5],[0.5,2]]
+        forward = Forward_AD([fn,fn2])
+        reverse = Reverse_AD([fn,fn2])
+        jac = reverse.grad_batch(points)
+        assert jac.shape == (3, 2, 2)
+        assert np.allclose(jac, forward.grad_batch(points))
+        assert np.allclose(reverse.values_batch(points), forward.values_batch(points))
+        for p, point in enumerate(points):
+            assert np.allclose(jac[p], reverse.grad(point))
+            assert np.allclose(forward.values_batch(points)[p], forward.values(point))
+
+    def test_tape_backend(self):
+    #test that the tape backend agrees with the node backend
+        def fn(x,y):
+            return 2**x + exp(y) * sin(x*y)
+        def fn2(x,y):
+            return x**3 + 1/y
+        for fns in ([fn], [fn, fn2]):
+            tape = Reverse_AD(fns, backend='tape')
+            assert np.allclose(tape.grad([3,-2]), Reverse_AD(fns).grad([3,-2]))
+            assert np.allclose(tape.values([3,-2]), Reverse_AD(fns).values([3,-2]))
+        assert tape.inputs[0].value == 3
+
+        with pytest.raises(ValueError):
+            Reverse_AD(fn, backend='stack')
+
+    def test_deep_graph(self):
+    #test reverse AD on a time-stepping loop deeper than the recursion limit
+        def fn(x,y):
+            for _ in range(2000):
+                x = x + 0.001 * sin(y)
+            return x + 0
+        def fn2(x,y):
+            return x
+        deriv = Reverse_AD(fn).grad([1,2])
+        assert np.allclose(deriv, [1, 2000*0.001*np.cos(2)])
+        assert np.allclose(Reverse_AD([fn, fn2]).grad([1,2]), [deriv, [1, 0]])
+
+    def test_vector_function(self):
+    #test that all outputs of a vector valued function are traced by one evaluation
+        calls = []
+        def fn(x,y):
+            calls.append(1)
+            w = x * y
+            return [w + sin(x), w / y, exp(w)]
+        for ad in (Reverse_AD(fn), Reverse_AD(fn, backend='tape'), Forward_AD(fn)):
+            calls.clear()
+            deriv = ad.grad([2,3])
+            assert len(calls) == 1
+            assert deriv.shape == (3, 2)
+            assert np.allclose(deriv, [[3 + np.cos(2), 2], [1, 0], [3*np.exp(6), 2*np.exp(6)]])
+            assert np.allclose(ad.values([2,3]), [6 + np.sin(2), 2, np.exp(6)])
+        assert np.allclose(Reverse_AD([fn, fn]).grad_batch([[2,3],[1,1]])[0], np.vstack([deriv, deriv]))
+
+    def test_value_and_grad(self):
+    #test that values and derivatives come from a single evaluation in both modes
+        calls = []
+        def fn(x,y):
+            calls.append(1)
+            return x * y + sin(x)
+        for ad in (Reverse_AD(fn), Reverse_AD(fn, backend='tape'), Forward_AD(fn)):
+            calls.clear()
+            val, deriv = ad.value_and_grad([2,3])
+            assert len(calls) == 1
+            assert np.allclose(val, [6 + np.sin(2)])
+            assert np.allclose(deriv, [3 + np.cos(2), 2])
+            assert np.array_equal(ad.val, val)
+            assert np.array_equal(ad.der, deriv)
+        val, deriv = Reverse_AD([fn, lambda x,y: [x, y]]).value_and_grad([2,3])
+        assert np.allclose(val, [6 + np.sin(2), 2, 3])
+        assert np.allclose(deriv, [[3 + np.cos(2), 2], [1, 0], [0, 1]])
+
+    def test_jvp_vjp(self):
+    #test that both drivers and both backends compute products with the jacobian
+        def fn(x,y):
+            return [x * y, sin(x) + y, exp(y)]
+        jac = Forward_AD(fn).grad([2,3])
+        v = np.array([1., -1.])
+        u = np.array([2., 0.5, 1.])
+        for ad in (Forward_AD(fn), Reverse_AD(fn), Reverse_AD(fn, backend='tape')):
+            assert np.allclose(ad.jvp([2,3], v), jac @ v)
+            assert np.allclose(ad.vjp([2,3], u), u @ jac)
+        with pytest.raises(ValueError):
+            Reverse_AD(fn, backend='tape').vjp([2,3], [1., 2.])
+
+    def test_jacobian_blocks(self):
+    #test that forward mode streams blocks of columns and reverse mode blocks of rows of the jacobian
+        def fn(x,y,z):
+            return [x * y, sin(x) + z, exp(y) * z]
+        jac = Forward_AD(fn).grad([1,2,3])
+        columns = list(Forward_AD(fn).jacobian_blocks([1,2,3], block_size=2))
+        assert [block.shape for _, _, block in columns] == [(3, 2), (3, 1)]
+        assert np.allclose(np.hstack([block for _, _, block in columns]), jac)
+        rows = Reverse_AD(fn).jacobian_blocks([1,2,3], block_size=2)
+        start, stop, block = next(rows)
+        assert (start, stop) == (0, 2) and np.allclose(block, jac[:2])
+        # closing the generator early releases the trace
+        rows.close()
+
+
+class Test_autoAD:
+    """This class evaluates the mode selection of the Auto_AD class in driver.py."""
+
+    def test_cost_model(self):
+    #test that the cost model prefers forward mode for few inputs and reverse mode for many inputs and one output
+        def fn(*x):
+            return sum(sin(xi) for xi in x)
+        ad = Auto_AD(fn)
+        assert ad.choose(2, 1)[0] == 'forward'
+        assert ad.choose(100000, 1)[0] == 'reverse'
+        assert ad.choose(100000, 1000)[0] == 'forward'
+        x = [0.5] * 1000
+        for _ in range(2):
+            val, deriv = ad.value_and_grad(x)
+            assert np.allclose(deriv, np.cos(x))
+        assert [d['reason'] for d in ad.decisions] == ['number of outputs not known yet', 'cost model']
+        assert ad.decisions[-1]['outputs'] == 1
+        assert ad.mode == 'reverse'
+        ad = Auto_AD(fn, model=CostModel(reverse_base=1000.))
+        ad.grad(x)
+        ad.grad(x)
+        assert ad.mode == 'forward'
+
+    def test_time_first(self):
+    #test that timing both modes gives the same derivatives and remembers the winner per number of inputs
+        def fn(x, y):
+            return [x * y, exp(x) + y]
+        ad = Auto_AD(fn, time_first=True)
+        for _ in range(3):
+            assert np.allclose(ad.grad([1., 2.]), [[2., 1.], [np.e, 1.]])
+        assert [d['reason'] for d in ad.decisions] == ['timed both modes'] + ['timed on the first call'] * 2
+        assert set(ad.decisions[0]['costs']) == {'forward', 'reverse'}
+        assert ad.mode == ad.decisions[0]['mode']
+        ad.set_fn(lambda x, y: x * y)
+        assert np.allclose(ad.grad([1., 2.]), [2., 1.])
+        assert ad.decisions[-1]['reason'] == 'timed both modes'
+
+    def test_calibrate(self):
+    #test that calibration returns a usable model
+        model = CostModel.calibrate(depth=20, repeat=1)
+        costs = model.estimate(10, 1)
+        assert costs['forward'] > 0 and costs['reverse'] > 0
+
+    def test_out(self):
+    #test that every driver writes into a preallocated array, checking it only on its first use
+        def fn(x, y):
+            return [x * y, exp(x) + y]
+        expected = [[3., 2.], [np.exp(2.), 1.]]
+        for ad in (Forward_AD(fn), Reverse_AD(fn), Reverse_AD(fn, backend='tape'), Auto_AD(fn),
+                   Forward_AD(fn, cache_size=4)):
+            out = np.empty((2, 2))
+            values = np.empty(2)
+            for point in ([2., 3.], [1., 1.], [2., 3.]):
+                assert ad.grad(point, out=out) is out
+                assert ad.values(point, out=values) is values
+            assert np.allclose(out, expected)
+            assert np.allclose(values, [6., np.exp(2.) + 3.])
+            assert ad.der is out
+        ad = Reverse_AD(lambda x, y: x * sin(y))
+        out = np.empty(2)
+        ad.grad([1., 2.], out=out)
+        ad.grad([2., 1.], out=out)
+        assert np.allclose(out, [np.sin(1.), 2. * np.cos(1.)])
+        with pytest.raises(ValueError):
+            ad.grad([1., 2.], out=np.empty((1, 2)))
+        with pytest.raises(TypeError):
+            ad.grad([1., 2.], out=np.empty(2, dtype=int))
+        frozen = np.empty(1)
+        frozen.flags.writeable = False
+        with pytest.raises(ValueError):
+            ad.values([1., 2.], out=frozen)
+
+    def test_out_checked_once(self, monkeypatch):
+    #test that an output array is checked on its first use only and values are written straight into it
+        from autoDiff_team15_2022 import driver, differentiation
+        checks = []
+        check_out = differentiation._check_out
+        def counted(out, shape):
+            checks.append(shape)
+            check_out(out, shape)
+        monkeypatch.setattr(driver, '_check_out', counted)
+        monkeypatch.setattr(differentiation, '_check_out', counted)
+        ad = Forward_AD(lambda x, y: [x * y, x + y], chunk_size=1)
+        jac = np.empty((2, 2))
+        values = np.empty(2)
+        for point in ([1., 2.], [2., 3.], [3., 4.]):
+            assert ad.grad(point, out=jac) is jac
+            assert ad.values(point, out=values) is values
+        assert checks == [(2, 2), (2,)]
+        assert np.allclose(jac, [[4., 3.], [1., 1.]]) and np.allclose(values, [12., 7.])
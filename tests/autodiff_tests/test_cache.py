@@ -0,0 +1,93 @@
+import pytest
+import numpy as np
+from autoDiff_team15_2022.cache import ResultCache
+from autoDiff_team15_2022.driver import Forward_AD, Reverse_AD
+from autoDiff_team15_2022.elemFunctions import *
+
+
+class Test_cache():
+
+    """This class evaluates the cache module and the result cache of the drivers.
+
+    Parameters
+    ==========
+    cache: ResultCache object with entry and byte budgets
+    ad: Forward_AD or Reverse_AD object with a cache
+
+    Returns
+    ==========
+    cache.get(key): cached result or None
+
+    assert: assert that results are cached, evicted and invalidated correctly
+
+    """
+
+    def test_lru(self):
+    #Test least recently used results are evicted first
+        cache = ResultCache(max_entries=2)
+        keys = [cache.key('values', [x]) for x in (1, 2, 3)]
+        cache.put(keys[0], np.array([1.]))
+        cache.put(keys[1], np.array([2.]))
+        assert cache.get(keys[0])[0] == 1
+        cache.put(keys[2], np.array([3.]))
+        assert len(cache) == 2
+        assert keys[1] not in cache
+        assert cache.get(keys[1]) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_bytes(self):
+    #Test the byte budget evicts results and skips results larger than the budget
+        cache = ResultCache(max_entries=None, max_bytes=32)
+        cache.put(cache.key('values', [1]), np.zeros(2))
+        cache.put(cache.key('values', [2]), np.zeros(2))
+        assert cache.nbytes == 32
+        cache.put(cache.key('values', [3]), (np.zeros(1), np.zeros(1)))
+        assert len(cache) == 2 and cache.nbytes == 32
+        cache.put(cache.key('values', [4]), np.zeros(5))
+        assert cache.key('values', [4]) not in cache
+        cache.clear()
+        assert len(cache) == 0 and cache.nbytes == 0
+        with pytest.raises(ValueError):
+            ResultCache(max_entries=0)
+
+    def test_keys(self):
+    #Test keys depend on the quantity and the exact inputs, and arrays are not cached
+        assert ResultCache.key('values', [1, 2.5]) == ('values', 1, 2.5)
+        assert ResultCache.key('values', 3) == ('values', 3)
+        assert ResultCache.key('values', [1, 2]) != ResultCache.key('value_and_grad', [1, 2])
+        assert ResultCache.key('values', [np.array([1., 2.])]) is None
+
+    def test_driver(self):
+    #Test drivers answer repeated points from the cache with read-only arrays
+        calls = []
+        def fn(x, y):
+            calls.append(1)
+            return x * y + sin(x)
+        for ad in (Forward_AD(fn, cache_size=4), Reverse_AD(fn, cache_size=4), Reverse_AD(fn, backend='tape', cache_bytes=1024)):
+            calls.clear()
+            deriv = ad.grad([2, 3])
+            assert np.allclose(ad.grad([2, 3]), deriv)
+            val = ad.values([2, 3])
+            assert np.allclose(val, [6 + np.sin(2)])
+            assert len(calls) == 1
+            assert (ad.cache.hits, ad.cache.misses) == (2, 1)
+            with pytest.raises(ValueError):
+                deriv[0] = 0
+            ad.values([1, 1])
+            assert len(calls) == 2
+
+    def test_set_fn(self):
+    #Test changing the function invalidates the cache
+        ad = Reverse_AD(lambda x: x * x, cache_size=4)
+        assert ad.grad([3])[0] == 6
+        ad.set_fn(lambda x: x * x * x)
+        assert len(ad.cache) == 0
+        assert ad.grad([3])[0] == 27
+
+    def test_no_cache(self):
+    #Test drivers without a budget do not cache and return writeable arrays
+        ad = Forward_AD(lambda x: x * x)
+        assert ad.cache is None
+        deriv = ad.grad([3])
+        deriv[0] = 0
+        assert ad.grad([3])[0] == 6
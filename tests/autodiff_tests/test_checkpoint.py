@@ -0,0 +1,98 @@
+import math
+import tracemalloc
+import pytest
+import numpy as np
+from autoDiff_team15_2022.checkpoint import checkpointed_grad
+from autoDiff_team15_2022.driver import Reverse_AD, Forward_AD
+from autoDiff_team15_2022.elemFunctions import *
+
+
+class Test_checkpoint():
+
+    """This class evaluates the checkpoint module.
+    Long loops are differentiated in reverse mode from checkpoints of their state, tracing one segment at a time.
+
+    Parameters
+    ==========
+    step: step function of a pendulum, the state is the angle and the angular velocity
+    x0: initial state
+
+    Returns
+    ==========
+    checkpointed_grad(step, x0, n_steps, loss): value of the loss and its gradient with respect to x0
+
+    assert: assert that every schedule matches reverse mode through the whole loop and stays within its recomputations
+
+    """
+
+    def step(self, x, v):
+        return [x + 0.01 * v, v - 0.01 * sin(x)]
+
+    def loss(self, x, v):
+        return x * x + v
+
+    def unrolled(self, n_steps):
+        def fn(x, v):
+            for _ in range(n_steps):
+                x, v = self.step(x, v)
+            return self.loss(x, v)
+        return fn
+
+    def test_schedules(self):
+    #test that both schedules and any number of slots give the gradient of the whole loop
+        value, grad = Reverse_AD(self.unrolled(300)).value_and_grad([1., 0.])
+        for options in ({}, {'slots': 0}, {'slots': 1}, {'slots': 3}, {'slots': 1000}, {'schedule': 'stride'},
+                        {'schedule': 'stride', 'stride': 7}, {'schedule': 'stride', 'stride': 300}):
+            result = checkpointed_grad(self.step, [1., 0.], 300, loss=self.loss, **options)
+            assert np.isclose(result[0], value[0])
+            assert np.allclose(result[1], grad)
+
+    def test_jacobian(self):
+    #test that without a loss the final state and its Jacobian are returned
+        def final(x, v):
+            for _ in range(50):
+                x, v = self.step(x, v)
+            return [x, v]
+        state, jacob = checkpointed_grad(self.step, [1., 0.], 50, slots=2)
+        assert np.allclose(state, Forward_AD(final).values([1., 0.]))
+        assert np.allclose(jacob, Forward_AD(final).grad([1., 0.]))
+        value, grad = checkpointed_grad(self.step, [1., 0.], 0, loss=self.loss)
+        assert value == 1. and np.allclose(grad, [2., 1.])
+
+    def test_recomputation(self):
+    #test that the binomial schedule evaluates every step at most once per sweep and stride at most twice
+        calls = [0]
+        def step(x, v):
+            calls[0] += 1
+            return self.step(x, v)
+        n_steps, slots = 1000, 10
+        sweeps = next(t for t in range(1, 100) if math.comb(slots + t, slots) >= n_steps)
+        checkpointed_grad(step, [1., 0.], n_steps, loss=self.loss, slots=slots)
+        assert calls[0] <= (sweeps + 1) * n_steps
+        calls[0] = 0
+        checkpointed_grad(step, [1., 0.], n_steps, loss=self.loss, schedule='stride', stride=100)
+        assert calls[0] == 2 * n_steps - 100
+
+    def test_memory(self):
+    #test that checkpointing keeps peak memory far below tracing the whole loop
+        n_steps = 5000
+        tracemalloc.start()
+        try:
+            Reverse_AD(self.unrolled(n_steps)).grad([1., 0.])
+            full = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            _, grad = checkpointed_grad(self.step, [1., 0.], n_steps, loss=self.loss, memory_budget=100000)
+            checkpointed = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert checkpointed < full / 10
+        assert np.allclose(grad, Reverse_AD(self.unrolled(n_steps)).grad([1., 0.]))
+
+    def test_errors(self):
+    #test that unknown schedules and budgets too small for one segment raise ValueError
+        with pytest.raises(ValueError):
+            checkpointed_grad(self.step, [1., 0.], 10, schedule='revolve')
+        with pytest.raises(ValueError):
+            checkpointed_grad(self.step, [1., 0.], 10, loss=self.loss, memory_budget=100)
+        with pytest.raises(ValueError):
+            checkpointed_grad(self.step, [1., 0.], 10000, loss=self.loss, schedule='stride', memory_budget=20000)
@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+from autoDiff_team15_2022.compiler import CompiledFunction, compile_function
+from autoDiff_team15_2022.driver import Reverse_AD
+from autoDiff_team15_2022.elemFunctions import *
+
+
+class Test_compiler():
+
+    """This class evaluates the compiler module.
+    Functions are traced once and compiled into generated code for their values and derivatives.
+
+    Parameters
+    ==========
+    fn: function or list of functions to compile
+    f: CompiledFunction returned by Reverse_AD.compile
+
+    Returns
+    ==========
+    f(inputs): values and gradient or Jacobian of the compiled function(s)
+
+    assert: assert that compiled functions return the values and derivatives of reverse mode
+
+    """
+
+    def test_matches_reverse(self):
+    #Test compiled functions agree with reverse mode on every elementary function
+        fn = lambda x, y: (x * y + sin(x) / y ** 2 - log(x) + exp(2 * y) + 3 ** x - x ** y
+                           - logistic(x) + arctan(y) * cos(x) + tan(x) - tanh(y) / sinh(x) + cosh(y)
+                           + arcsin(x / 4) - arccos(y / 4) + log(y, np.e) - 1 / x + (-x) ** 2)
+        reverse = Reverse_AD(fn)
+        f = reverse.compile([1.5, 2.0])
+        assert isinstance(f, CompiledFunction)
+        value, grad = f([1.5, 2.0])
+        assert value == pytest.approx(reverse.values([1.5, 2.0])[0])
+        assert np.allclose(grad, reverse.grad([1.5, 2.0]))
+
+    def test_jacobian(self):
+    #Test compiled lists of functions and vector-valued functions return the Jacobian
+        f = Reverse_AD([lambda x, y: [x * y, tanh(x)], lambda x, y: 3.0]).compile([1, 2])
+        values, jacobian = f([1.0, 2.0])
+        assert np.allclose(values, [2, np.tanh(1), 3])
+        assert np.allclose(jacobian, [[2, 1], [1 - np.tanh(1) ** 2, 0], [0, 0]])
+
+    def test_arrays(self):
+    #Test compiled functions evaluate arrays of input points in one call
+        fn = lambda x, y: exp(x) * y - x ** 0.5
+        f = Reverse_AD(fn).compile([1, 1])
+        x = np.array([1., 2., 3.])
+        y = np.array([4., 5., 6.])
+        value, grad = f([x, y])
+        assert value.shape == (3,) and grad.shape == (2, 3)
+        assert np.allclose(value, np.exp(x) * y - np.sqrt(x))
+        assert np.allclose(grad, [np.exp(x) * y - 0.5 / np.sqrt(x), np.exp(x)])
+        value, grad = f([x, 2])
+        assert np.allclose(grad[1], np.exp(x))
+
+    def test_folding(self):
+    #Test constants are folded and operations no output depends on are dropped
+        f = compile_function(lambda x, y: [x * 1 + 0, exp(y)][0], 2)
+        assert 'exp' not in f.source
+        f = compile_function(lambda x, y: x * 1 + 0, 2)
+        assert f.source.count('=') == 2
+        value, grad = f([3, 4])
+        assert value == 3 and np.array_equal(grad, [1, 0])
+        # the log of a negative base is not folded, its power has no derivative in the exponent
+        value, grad = Reverse_AD(lambda x: (-2) ** x).compile([3])([3])
+        assert value == -8 and np.isnan(grad)
+
+    def test_domain(self):
+    #Test inputs outside the domain of the math module fall back to numpy
+        f = Reverse_AD(lambda x: log(x)).compile([1])
+        with pytest.warns(RuntimeWarning):
+            value, grad = f([-1.0])
+        assert np.isnan(value)
+
+    def test_errors(self):
+    #Test operations that cannot be compiled and wrong numbers of inputs raise errors
+        with pytest.raises(TypeError):
+            Reverse_AD(lambda x: x * np.array([1., 2.])).compile([1])
+        with pytest.raises(TypeError):
+            Reverse_AD(lambda x: x * 'a').compile([1])
+        f = Reverse_AD(lambda x, y: x * y).compile([1, 2])
+        with pytest.raises(ValueError):
+            f([1])
@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from autoDiff_team15_2022.differentiation import gradient, derivative, jacobian, get_values
+from autoDiff_team15_2022.differentiation import gradient, derivative, jacobian, get_values, jacobian_batch, values_batch, value_and_jacobian, jacobian_blocks, jvp, vjp
 from autoDiff_team15_2022.elemFunctions import *
 
 class Test_diff:
@@ -95,4 +95,137 @@ class Test_diff:
         with pytest.raises(TypeError):
         #raise type erorors for get_values method
             get_values(None)
-  
\ No newline at end of file
+  
+    def test_vector_mode_grad(self): #test that all partials come from one evaluation
+        calls = []
+        def fn(x, y, z):
+            calls.append(1)
+            return x * y + sin(z) + logistic(x)
+        val = gradient(fn, [1, 2, 0])
+        assert len(calls) == 1
+        assert np.allclose(val, [2 + np.exp(1)/(1 + np.exp(1))**2, 1, 1])
+
+    def test_chunked_grad(self): #test chunked tangent propagation
+        calls = []
+        def fn(*args):
+            calls.append(1)
+            return sum(a**2 for a in args)
+        args = list(range(7))
+        val = gradient(fn, args, chunk_size=3)
+        assert len(calls) == 3
+        assert np.allclose(val, [2 * a for a in args])
+        assert np.allclose(jacobian([fn, fn], args, chunk_size=2), [val, val])
+
+        with pytest.raises(ValueError):
+            gradient(fn, args, chunk_size=0)
+
+    def test_batch(self): #test vectorized evaluation over many points
+        def fn(x, y):
+            return sin(x) * y + exp(y) / x
+        def fn2(x, y):
+            return x**2 - 3*y
+        points = np.array([[1.0, 2.0], [0.5, -1.0], [2.0, 0.0]])
+        vals = values_batch([fn, fn2], points)
+        jac = jacobian_batch([fn, fn2], points)
+        assert vals.shape == (3, 2)
+        assert jac.shape == (3, 2, 2)
+        for p, point in enumerate(points):
+            assert np.allclose(vals[p], get_values([fn, fn2], point.tolist()))
+            assert np.allclose(jac[p], jacobian([fn, fn2], point.tolist()))
+        # one dimensional points are one input per point
+        assert jacobian_batch([lambda x: x**3], [1, 2]).shape == (2, 1, 1)
+
+        with pytest.raises(ValueError):
+            jacobian_batch([fn], np.ones((2, 2, 2)))
+
+    def test_value_and_jacobian(self): #test values and jacobian come from the same evaluations
+        calls = []
+        def fn(x, y):
+            calls.append(1)
+            return [x * y, sin(x) + y]
+        for chunk_size in (None, 1):
+            calls.clear()
+            vals, jac = value_and_jacobian([fn], [2, 3], chunk_size)
+            assert len(calls) == (1 if chunk_size is None else 2)
+            assert np.allclose(vals, get_values([fn], [2, 3]))
+            assert np.allclose(jac, jacobian([fn], [2, 3]))
+
+    def test_constant_output(self): #test that outputs not depending on the inputs have rows of zeros
+        fn = lambda x, y: [x * y, 3.0]
+        for chunk_size in (None, 1):
+            vals, jac = value_and_jacobian([fn], [1, 2], chunk_size)
+            assert np.allclose(vals, [2, 3])
+            assert np.allclose(jac, [[2, 1], [0, 0]])
+        assert np.allclose(values_batch([fn], [[1, 2], [3, 4]]), [[2, 3], [12, 3]])
+        assert np.allclose(jacobian_batch([fn], [[1, 2], [3, 4]]), [[[2, 1], [0, 0]], [[4, 3], [0, 0]]])
+
+    def test_jvp_vjp(self): #test jacobian-vector and vector-jacobian products against the jacobian
+        def fn(x, y, z):
+            return [x * y * z, sin(x) + y, exp(z) / y]
+        args = [0.5, 2.0, -1.0]
+        jac = jacobian([fn], args)
+        v = np.array([1.0, -2.0, 0.5])
+        u = np.array([0.5, 3.0, -1.0])
+        assert np.allclose(jvp(fn, args, v), jac @ v)
+        assert np.allclose(vjp(fn, args, u), u @ jac)
+        assert np.allclose(jvp([fn, lambda x, y, z: 4.0], args, v), np.append(jac @ v, 0))
+        # a single scalar function gives a directional derivative
+        assert jvp(lambda x, y: x * y, [2, 3], [1, 1]) == pytest.approx(5)
+        assert np.allclose(vjp(lambda x, y: x * y, [2, 3], 2), [6, 4])
+        with pytest.raises(ValueError):
+            jvp(fn, args, [1, 2])
+        with pytest.raises(ValueError):
+            vjp(fn, args, [1, 2])
+
+    def test_jacobian_blocks(self): #test streamed blocks of columns and rows reassemble the jacobian
+        def fn(*x):
+            return [x[i] * sin(x[(i + 1) % len(x)]) for i in range(len(x))] + [3.0]
+        args = np.linspace(0.1, 1, 7).tolist()
+        # the constant output has a row of zeros
+        jac = np.vstack([jacobian([lambda *x: fn(*x)[:-1]], args), np.zeros(7)])
+        for mode, axis in (('forward', 1), ('reverse', 0)):
+            blocks = list(jacobian_blocks(fn, args, block_size=3, mode=mode))
+            assert [(start, stop) for start, stop, _ in blocks] == [(0, 3), (3, 6), (6, jac.shape[axis])]
+            assert np.allclose(np.concatenate([block for _, _, block in blocks], axis=axis), jac)
+        with pytest.raises(ValueError):
+            jacobian_blocks(fn, args, block_size=0)
+        with pytest.raises(ValueError):
+            jacobian_blocks(fn, args, mode='sideways')
+
+    def test_jacobian_blocks_memory(self): #test that peak memory of streaming is about one block, not the matrix
+        import tracemalloc
+        n = 1000
+        def fn(*x):
+            return [xi * xi for xi in x]
+        args = np.linspace(0.1, 1, n).tolist()
+        tracemalloc.start()
+        try:
+            diagonal = jacobian([fn], args).diagonal().copy()
+            full = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            streamed = np.zeros(n)
+            for start, stop, block in jacobian_blocks(fn, args, block_size=10):
+                streamed[start:stop] = block[start:stop].diagonal()
+            blocks = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert np.allclose(streamed, diagonal)
+        assert blocks < full / 5
+
+    def test_out(self): #test that gradient and jacobian write into preallocated arrays and check them
+        def f1(x, y):
+            return x * y
+        def f2(x, y):
+            return sin(x) + y
+        out = np.empty(2)
+        assert gradient(f1, [2., 3.], out=out) is out
+        assert np.allclose(out, [3., 2.])
+        out = np.empty((2, 2))
+        assert jacobian([f1, f2], [2., 3.], chunk_size=1, out=out) is out
+        assert np.allclose(out, [[3., 2.], [np.cos(2.), 1.]])
+        with pytest.raises(ValueError):
+            jacobian([f1, f2], [2., 3.], out=np.empty((2, 3)))
+        with pytest.raises(TypeError):
+            gradient(f1, [2., 3.], out=np.empty(2, dtype=np.float32))
+        with pytest.raises(TypeError):
+            gradient(f1, [2., 3.], out=[0., 0.])
@@ -185,3 +185,22 @@ class Test_dual:
         assert(z2.dual == -2)
 
 
+
+    def test_vector_dual(self):
+        # Testing propagation of a vector of tangents through every operator
+        x = DualNumber(2, np.array([1.0, 0.0]))
+        y = DualNumber(3, np.array([0.0, 1.0]))
+        z = (x * y + x / y - 2 ** x) ** 2 - (-y)
+        f = x * y + x / y - 2 ** x
+        assert z.real == f.real ** 2 + 3
+        assert np.allclose(z.dual, 2 * f.real * np.array([3 + 1/3 - 4*np.log(2), 2 - 2/9]) + np.array([0, 1]))
+        # Testing a dual number raised to a dual number in vector mode
+        z2 = x ** y
+        assert np.allclose(z2.dual, [3 * 2**2, np.log(2) * 2**3])
+
+    def test_slots(self):
+        # Testing that dual numbers carry no per-instance dictionary
+        z = DualNumber(1, 2)
+        assert not hasattr(z, '__dict__')
+        with pytest.raises(AttributeError):
+            z.other = 3
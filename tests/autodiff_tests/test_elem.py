@@ -347,3 +347,22 @@ class Test_elem():
         assert val.dual ==  np.exp(2) * 3
 
 
+
+    def test_numpy_scalar_support(x):
+    #test numpy float scalars are accepted by every elementary function
+        for fn in (sin, cos, tan, arcsin, arccos, arctan, sinh, cosh, tanh, exp, log, logistic):
+            assert np.isclose(fn(np.float64(0.5)), fn(0.5))
+            assert np.isclose(fn(np.float32(0.5)), fn(0.5))
+        val = derivative(lambda x: sin(x) * np.float32(2), np.float64(0))
+        assert val == 2
+
+    def test_python_scalar_fast_path(x):
+    #test python scalars return python floats and fall back to numpy outside the math domain
+        assert type(sin(1)) is float
+        assert type(sin(DualNumber(1.0, 1.0)).real) is float
+        assert sin(True) == np.sin(1)
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            assert np.isnan(arcsin(2.0))
+            assert log(0.0) == -np.inf
+            assert exp(1000.0) == np.inf
+            assert np.isnan(arcsin(DualNumber(2.0, 1.0)).real)
@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+from autoDiff_team15_2022.hessian import hvp, hvp_batch, hessian
+from autoDiff_team15_2022.driver import Reverse_AD
+from autoDiff_team15_2022.elemFunctions import *
+
+
+class Test_hessian():
+
+    """This class evaluates the hessian module.
+    Hessian-vector products are computed forward-over-reverse, by Nodes whose values are DualNumbers.
+
+    Parameters
+    ==========
+    fn: scalar function to differentiate twice
+    x: point at which the Hessian is evaluated
+    v: vector or vectors multiplied with the Hessian
+
+    Returns
+    ==========
+    hvp(fn, x, v): Hessian of fn at x times v
+
+    assert: assert that products and Hessians match the analytic or finite difference values
+
+    """
+
+    def fn(self, x, y, z):
+        return sin(x) * y ** 3 + log(x) * exp(y) + x ** y + 2 ** x + tan(x / y) + logistic(x) * z + arctan(z * x)
+
+    def finite_difference(self, x, step=1e-5):
+        ad = Reverse_AD(self.fn)
+        x = np.asarray(x, dtype=float)
+        return np.array([(ad.grad((x + step * e).tolist()) - ad.grad((x - step * e).tolist())) / (2 * step)
+                         for e in np.eye(len(x))])
+
+    def test_hvp(self):
+    #Test Hessian-vector products of a polynomial
+        fn = lambda x, y: x ** 2 * y + y ** 3
+        assert np.allclose(hvp(fn, [1, 2], [1, 0]), [4, 2])
+        assert np.allclose(hvp(fn, [1, 2], [0, 1]), [2, 12])
+        assert np.allclose(hvp(fn, [1, 2], [1, 1]), [6, 14])
+
+    def test_hessian(self):
+    #Test the Hessian of every elementary function against finite differences of reverse mode
+        x = [1.0, 2.0, 0.5]
+        hess = hessian(self.fn, x)
+        assert np.allclose(hess, hess.T)
+        assert np.allclose(hess, self.finite_difference(x), atol=1e-6)
+        assert np.allclose(hessian(self.fn, x, chunk_size=1), hess)
+        with pytest.raises(ValueError):
+            hessian(self.fn, x, chunk_size=0)
+
+    def test_batch(self):
+    #Test several directions at once match one product at a time
+        x = [1.0, 2.0, 0.5]
+        vs = np.array([[1., 0., 2.], [0.5, -1., 0.], [0., 0., 0.]])
+        products = hvp_batch(self.fn, x, vs)
+        assert products.shape == (3, 3)
+        for v, product in zip(vs, products):
+            assert np.allclose(product, hvp(self.fn, x, v))
+        with pytest.raises(ValueError):
+            hvp_batch(self.fn, x, [1., 0., 2.])
+        with pytest.raises(ValueError):
+            hvp(self.fn, x, [1., 0.])
+
+    def test_constant(self):
+    #Test inputs the function does not depend on, and functions that are not scalar
+        assert np.array_equal(hessian(lambda x, y: x * 3 + 1, [1, 2]), np.zeros((2, 2)))
+        assert np.array_equal(hessian(lambda x, y: 5.0, [1, 2]), np.zeros((2, 2)))
+        with pytest.raises(TypeError):
+            hvp(lambda x, y: [x * y, x], [1, 2], [1, 0])
@@ -3,6 +3,7 @@
 import pytest
 import numpy as np
 from autoDiff_team15_2022.node import *
+from autoDiff_team15_2022.elemFunctions import sin
 
 
 class Test_node():
@@ -129,6 +130,19 @@ class Test_node():
         assert x.grad() == np.log(16)
         assert z.children == []
 
+    def test_rpow_negative_base(self):
+    #Test a negative base to an integer power has a value but no derivative, without warnings
+        x = Node(3)
+        with np.errstate(all='raise'):
+            z = (-2) ** x
+        z.gradient = 1.0
+        assert z.value == -8
+        assert np.isnan(x.grad())
+        x = Node(3)
+        z = 0 ** x
+        z.gradient = 1.0
+        assert z.value == 0 and x.grad() == 0
+
     def test_div(self):
     #Test for Node division operation
         x = Node(2) 
@@ -209,4 +223,149 @@ class Test_node():
         assert z.value == 16
 
 
-   
\ No newline at end of file
+   
+    def test_backward(self):
+    #Test the iterative backward pass populates every input at once
+        x = Node(2)
+        y = Node(3)
+        w = x * y
+        z = sin(w) + w * x - y / x
+        z.backward()
+
+        assert x.gradient == pytest.approx(np.cos(6) * 3 + 2 * 2 * 3 + 3 / 4)
+        assert y.gradient == pytest.approx(np.cos(6) * 2 + 2 * 2 - 1 / 2)
+        assert w.gradient == pytest.approx(np.cos(6) + 2)
+        assert z.parents[0][1].value == np.sin(6) + 12
+
+    def test_backward_deep(self):
+    #Test the backward pass on a graph far deeper than the recursion limit
+        x = Node(1.0)
+        z = x
+        for _ in range(5000):
+            z = z * 1.0001 + 0.0
+        z.backward()
+
+        assert x.gradient == pytest.approx(1.0001 ** 5000)
+        x.clear()
+        assert x.parents == [] and x.children == []
+
+    def test_backward_jacobian(self):
+    #Test the jacobian of several outputs traced into one graph
+        x = Node(2)
+        y = Node(3)
+        unused = Node(5)
+        w = x * y
+        jac = backward_jacobian([w + x, w * y, w], [x, y, unused])
+
+        assert jac.shape == (3, 3)
+        assert np.allclose(jac, [[4, 2, 0], [9, 12, 0], [3, 2, 0]])
+
+    def test_vector_jacobian_product(self):
+    #Test one sweep seeded at several outputs gives the weighted sum of their gradients
+        x = Node(2)
+        y = Node(3)
+        unused = Node(5)
+        w = x * y
+        outputs = [w + x, w * y, w]
+        vjp = vector_jacobian_product(outputs, [x, y, unused], [1, -1, 2])
+
+        assert np.allclose(vjp, np.array([1, -1, 2]) @ backward_jacobian(outputs, [x, y, unused]))
+        assert np.allclose(vector_jacobian_product([w, w], [x, y], [1, 1]), [6, 4])
+
+    def test_compact(self):
+    #Test the slotted Node keeps edges compactly and still exposes them as tuples
+        x = Node(2)
+        assert not hasattr(x, '__dict__')
+        assert x.children == [] and x.parents == []
+        y = x * 3
+        z = x + y
+
+        assert x.children == [(3, y), (1, z)]
+        assert z.parents == [(1, x), (1, y)]
+
+    def test_trace_release(self):
+    #Test that releasing a trace cuts every edge of its graph but keeps values and gradients
+        outside = Node(4)
+        with Trace() as trace:
+            x, y = trace.variables([2, 3])
+            w = x * y
+            z = w + x
+            unused = sin(y) * y
+            kept = outside * x
+            z.backward()
+        assert (x.gradient, y.gradient, z.value) == (4, 2, 8)
+        for node in (x, y, w, z, unused, kept):
+            assert node.children == [] and node.parents == []
+        assert trace.inputs == []
+        # Watched Nodes from outside are released with the trace
+        trace = Trace()
+        a, = trace.variables([1.0])
+        trace.watch([outside])
+        b = a * outside
+        trace.release()
+        assert outside.children == [] and b.parents == []
+
+    def test_trace_memory(self):
+    #Test that repeated gradients keep traced memory flat without the garbage collector
+        import gc
+        import tracemalloc
+        from autoDiff_team15_2022.driver import Reverse_AD
+        from autoDiff_team15_2022.elemFunctions import exp
+        ad = Reverse_AD(lambda x, y: [x * sin(y) + exp(x * y), x ** 2 / y])
+        enabled = gc.isenabled()
+        gc.disable()
+        tracemalloc.start()
+        try:
+            for _ in range(100):
+                ad.grad([1., 2.])
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            for _ in range(10000):
+                ad.grad([1., 2.])
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            if enabled:
+                gc.enable()
+        assert current - base < 10000
+        assert peak - base < 100000
+
+    def test_edges_read_only(self):
+    #Test that modifying the edges of a Node fails instead of being silently lost
+        x = Node(2)
+        z = x * 3
+        for edges in (x.children, z.parents):
+            with pytest.raises(TypeError):
+                edges.append((1, Node(1)))
+            with pytest.raises(TypeError):
+                edges[0] = (1, Node(1))
+            with pytest.raises(TypeError):
+                edges.extend([(1, Node(1))])
+        with pytest.raises(TypeError):
+            x.children += [(1, Node(1))]
+        with pytest.raises(AttributeError):
+            x.children = []
+        assert x.children == [(3, z)] and z.parents == [(3, x)]
+
+    def test_no_cycles(self):
+    #Test that graphs hold no reference cycles, so dropping their outputs frees them without the garbage collector
+        import gc
+        import weakref
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            x, y = Node(2), Node(3)
+            w = x * y
+            z = sin(w) + x
+            refs = [weakref.ref(w), weakref.ref(z)]
+            del w
+            # The output keeps its ancestors alive, the inputs do not keep the output alive
+            assert refs[0]() is not None
+            z.backward()
+            assert (x.gradient, y.gradient) == (3 * np.cos(6) + 1, 2 * np.cos(6))
+            del z
+            assert all(ref() is None for ref in refs)
+            assert x.children == [] and y.children == []
+        finally:
+            if enabled:
+                gc.enable()
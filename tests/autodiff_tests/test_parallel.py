@@ -0,0 +1,148 @@
+import gc
+import os
+import weakref
+import pytest
+import numpy as np
+from autoDiff_team15_2022.parallel import ParallelJacobian, BatchResult, _SharedBuffer
+from autoDiff_team15_2022.differentiation import jacobian, jacobian_batch, values_batch
+from autoDiff_team15_2022.driver import Forward_AD, Reverse_AD
+from autoDiff_team15_2022.elemFunctions import *
+
+
+def ring(*x):
+    return [sin(x[i]) * x[(i + 1) % len(x)] + exp(x[i - 1]) for i in range(len(x))]
+
+def pid(x):
+    return x * os.getpid()
+
+
+class Test_parallel():
+
+    """This class evaluates the parallel module.
+    Columns (forward mode) or rows (reverse mode) of the Jacobian are computed on a persistent pool of worker processes.
+
+    Parameters
+    ==========
+    fn: function to differentiate
+    x: point at which the Jacobian is evaluated
+
+    Returns
+    ==========
+    value_and_jacobian(x): values and Jacobian of fn at x
+
+    assert: assert that the parallel Jacobians match the serial ones
+
+    """
+
+    x = list(np.linspace(0.1, 1, 7))
+
+    def test_modes(self):
+    #test that both modes assemble the serial jacobian and values
+        for mode in ('forward', 'reverse'):
+            with ParallelJacobian(ring, workers=3, mode=mode) as pool:
+                for _ in range(2):
+                    values, jac, scalar = pool.value_and_jacobian(self.x)
+                    assert np.allclose(jac, jacobian([ring], self.x))
+                    assert np.allclose(values, [v.real for v in ring(*[DualNumber(x, 0) for x in self.x])])
+                    assert not scalar
+        with pytest.raises(ValueError):
+            ParallelJacobian(ring, mode='sideways')
+        with pytest.raises(ValueError):
+            ParallelJacobian(ring, workers=0)
+
+    def test_persistent_workers(self):
+    #test that the same worker processes answer every call
+        with ParallelJacobian(pid, workers=1) as pool:
+            first = pool.value_and_jacobian([1.0])[1]
+            assert first[0, 0] != os.getpid()
+            assert np.array_equal(pool.value_and_jacobian([2.0])[1], first)
+
+    def test_drivers(self):
+    #test that drivers with workers match the serial drivers and restart workers for a new function
+        for cls in (Forward_AD, Reverse_AD):
+            ad = cls(ring, workers=2)
+            assert np.allclose(ad.grad(self.x), cls(ring).grad(self.x))
+            ad.set_fn(lambda x, y: x * y)
+            value, grad = ad.value_and_grad([2, 3])
+            assert np.allclose(value, [6]) and np.allclose(grad, [3, 2])
+            ad.close()
+            ad.close()
+        # outputs that do not depend on the inputs have rows of zeros
+        constant = lambda x, y: [x * y, 3.0]
+        ad = Forward_AD(constant, workers=2)
+        for value, jac in (ad.value_and_grad([1, 2]), Forward_AD(constant).value_and_grad([1, 2])):
+            assert np.allclose(value, [2, 3]) and np.allclose(jac, [[2, 1], [0, 0]])
+        ad.close()
+
+    def test_batch(self):
+    #test that chunks evaluated on threads and processes fill in the values and jacobians of every point
+        fn = lambda x, y: [x * y, sin(x) + exp(y)]
+        points = np.random.default_rng(0).random((1000, 2))
+        for cls in (Forward_AD, Reverse_AD):
+            for executor in ('thread', 'process'):
+                seen = []
+                with cls(fn).evaluate_batch(points, chunk_size=128, workers=2, executor=executor,
+                                            callback=lambda batch: seen.append(batch.completed)) as batch:
+                    batch.wait()
+                    assert batch.done() and batch.progress == 1.0 and batch.completed == 1000
+                    assert batch.points_per_second > 0
+                assert np.allclose(batch.values, values_batch([fn], points))
+                assert np.allclose(batch.jacobians, jacobian_batch([fn], points))
+                assert len(seen) == 8 and max(seen) == 1000
+
+    def test_batch_errors(self):
+    #test that invalid arguments and errors of the function are raised
+        def fn(x):
+            if np.any(x.real > 1.5):
+                raise ValueError("outside the domain")
+            return x * x
+        with pytest.raises(ValueError):
+            BatchResult(fn, [[1.0]], executor='fiber')
+        with pytest.raises(ValueError):
+            BatchResult(fn, [[1.0]], chunk_size=0)
+        with BatchResult(fn, [[1.0], [2.0], [1.2]], chunk_size=1, workers=1) as batch:
+            with pytest.raises(ValueError):
+                batch.wait()
+            assert batch.done() and batch.completed == 2
+        batch = BatchResult(fn, [[1.0], [0.5]], executor='process', workers=1)
+        batch.close(copy=False)
+        assert batch.values is None and batch.jacobians is None
+
+    def test_batch_references(self):
+    #test that arrays taken inside the with block stay valid after the shared memory is released
+        fn = lambda x, y: [x * y, x + y]
+        points = np.random.default_rng(1).random((100, 2))
+        with BatchResult(fn, points, chunk_size=10, workers=2, executor='process') as batch:
+            batch.wait()
+            values, jac, row = batch.values, batch.jacobians, batch.jacobians[3]
+            names = [block.name for block in batch._blocks]
+        assert np.allclose(values, values_batch([fn], points))
+        assert np.allclose(jac, jacobian_batch([fn], points))
+        assert np.allclose(row, jac[3])
+        assert all(not os.path.exists('/dev/shm/' + name) for name in names)
+        # The results are not copied, the views are based on the arrays holding the shared memory
+        assert isinstance(row.base.base, _SharedBuffer)
+        owner = weakref.ref(row.base.base)
+        del batch, values, jac, row
+        gc.collect()
+        assert owner() is None
+
+    def test_finalizers(self):
+    #test that dropped instances shut their workers down and unlink their shared memory
+        pool = ParallelJacobian(ring, workers=1)
+        pool.value_and_jacobian(self.x)
+        finalizer = pool._finalizer
+        executor = pool._pool
+        del pool
+        gc.collect()
+        assert not finalizer.alive
+        with pytest.raises(RuntimeError):
+            executor.submit(pid, 1)
+        batch = BatchResult(lambda x: x * x, [[1.0], [2.0]], workers=1, executor='process')
+        batch.wait()
+        finalizer = batch._finalizer
+        names = [block.name for block in batch._blocks]
+        del batch
+        gc.collect()
+        assert not finalizer.alive
+        assert all(not os.path.exists('/dev/shm/' + name) for name in names)
@@ -0,0 +1,121 @@
+import json
+import pstats
+import pytest
+import numpy as np
+from autoDiff_team15_2022 import hooks
+from autoDiff_team15_2022.profiler import Profiler
+from autoDiff_team15_2022.driver import Forward_AD, Reverse_AD
+from autoDiff_team15_2022.dualNum import DualNumber
+from autoDiff_team15_2022.node import Node
+from autoDiff_team15_2022.elemFunctions import *
+
+
+def fn(x, y):
+    a = x ** y
+    return a * sin(x) + a
+
+
+class Test_profiler():
+
+    """This class evaluates the profiler module.
+    Elementary functions and operators are timed per operation and per call site inside a Profiler.
+
+    Parameters
+    ==========
+    fn: function differentiated inside the profiler
+    x: input point
+
+    Returns
+    ==========
+    prof.by_op(), prof.by_site(): calls and time of every operation and call site
+
+    assert: assert that the calls are attributed to the right operations and lines and exported
+
+    """
+
+    def profile(self):
+        with Profiler() as prof:
+            Reverse_AD(fn).grad([1.5, 2.])
+            Forward_AD(fn).grad([1.5, 2.])
+        return prof
+
+    def test_by_op(self):
+    #test that every operation is counted once per evaluation, with nested operations in the outer one
+        prof = self.profile()
+        calls = {(row['op'], row['kind']): row['calls'] for row in prof.by_op()}
+        assert calls == {(op, kind): 1 for op in ('pow', 'mul', 'sin', 'add') for kind in ('Node', 'DualNumber')}
+        assert 0 < prof.op_time <= prof.total
+        assert not hooks.installed()
+
+    def test_by_site(self):
+    #test that operations are attributed to the lines of the user function calling them
+        prof = self.profile()
+        line = fn.__code__.co_firstlineno
+        sites = {row['line']: row for row in prof.by_site()}
+        assert set(sites) == {line + 1, line + 2}
+        assert set(sites[line + 1]['ops']) == {'pow[Node]', 'pow[DualNumber]'}
+        assert sites[line + 2]['calls'] == 6
+        assert all(row['file'] == __file__ and row['function'] == 'fn' for row in sites.values())
+        assert 'pow[Node]' in prof.report()
+
+    def test_pstats(self, tmp_path):
+    #test that the pstats file loads, with the call sites as callers of every operation
+        prof = self.profile()
+        path = str(tmp_path / 'ops.prof')
+        prof.dump_stats(path)
+        stats = pstats.Stats(path).stats
+        names = {name: value for (_, _, name), value in stats.items()}
+        assert names['pow[Node]'][0] == 1
+        callers = names['sin[DualNumber]'][4]
+        assert [site[1] for site in callers] == [fn.__code__.co_firstlineno + 2]
+        assert any(filename.endswith('node.py') for filename, _, name in stats if name == 'pow[Node]')
+
+    def test_chrome_trace(self, tmp_path):
+    #test that the trace holds one complete event per operation inside the profile event
+        prof = self.profile()
+        path = str(tmp_path / 'trace.json')
+        prof.export_chrome_trace(path)
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+        assert len(events) == 9
+        assert all(event['ph'] == 'X' for event in events)
+        profile = events[0]
+        for event in events[1:]:
+            assert 0 <= event['ts'] <= event['ts'] + event['dur'] <= profile['dur']
+        prof = Profiler(max_events=2)
+        with prof:
+            Forward_AD(fn).grad([1.5, 2.])
+        assert len(prof.events) == 2 and sum(row['calls'] for row in prof.by_op()) == 4
+
+    def test_threads(self):
+    #test that operations of two threads profiled at once are all counted and attributed to their own lines
+        import sys
+        import threading
+        n = 20000
+        barrier = threading.Barrier(2)
+        def dual_loop():
+            barrier.wait()
+            for _ in range(n):
+                sin(DualNumber(1., 1.))
+        def node_loop():
+            barrier.wait()
+            for _ in range(n):
+                Node(1.) * 2.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with Profiler() as prof:
+                threads = [threading.Thread(target=f) for f in (dual_loop, node_loop)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        calls = {(row['op'], row['kind']): row['calls'] for row in prof.by_op()}
+        assert calls == {('sin', 'DualNumber'): n, ('mul', 'Node'): n}
+        sites = {row['function']: row for row in prof.by_site()}
+        assert set(sites) == {'dual_loop', 'node_loop'}
+        assert set(sites['dual_loop']['ops']) == {'sin[DualNumber]'}
+        assert set(sites['node_loop']['ops']) == {'mul[Node]'}
+        assert len({event[5] for event in prof.events}) == 2
@@ -0,0 +1,83 @@
+import os
+import asyncio
+import pytest
+import numpy as np
+from autoDiff_team15_2022.service import GradientService, GradientClient
+from autoDiff_team15_2022.elemFunctions import *
+
+
+class Test_service():
+
+    """This class evaluates the service module.
+    Queries at single points are coalesced into batched evaluations by an asyncio service.
+
+    Parameters
+    ==========
+    fn: function registered with the service
+    x: point of a query
+
+    Returns
+    ==========
+    client.grad(name, x): values and Jacobian of the function at x
+
+    assert: assert that replies match the analytic derivatives and that queries share batches
+
+    """
+
+    def fn(self, x, y):
+        return [x * y, sin(x) + exp(y)]
+
+    def expected(self, x, y):
+        return [[y, x], [np.cos(x), np.exp(y)]]
+
+    def test_batching(self):
+    #test that concurrent queries from several clients are answered correctly by few batches
+        async def run():
+            service = GradientService(window=0.01)
+            service.register('fn', self.fn)
+            await service.start()
+            clients = [await GradientClient.connect(*service.address) for _ in range(4)]
+            points = np.random.default_rng(0).random((200, 2))
+            replies = await asyncio.gather(*[clients[i % 4].grad('fn', p) for i, p in enumerate(points)])
+            stats = await clients[0].stats()
+            for client in clients:
+                await client.close()
+            await service.close()
+            return points, replies, stats
+        points, replies, stats = asyncio.run(run())
+        for (x, y), (values, jacob) in zip(points, replies):
+            assert np.allclose(values, [x * y, np.sin(x) + np.exp(y)])
+            assert np.allclose(jacob, self.expected(x, y))
+        assert stats['requests'] == 200 and stats['queue_depth'] == 0
+        assert stats['batches'] < 20
+        assert sum(stats['batch_sizes'].values()) == stats['batches']
+        assert stats['latency_ms']['p50'] <= stats['latency_ms']['p99']
+
+    def test_unix_socket(self, tmp_path):
+    #test a reverse mode service on a unix socket, values only queries and errors
+        async def run():
+            path = os.path.join(tmp_path, 'service.sock')
+            service = GradientService(mode='reverse', max_batch=2)
+            service.register('fn', self.fn)
+            await service.start(path=path)
+            client = await GradientClient.connect(path=path)
+            replies = await asyncio.gather(*[client.grad('fn', [x, 1.0]) for x in (1.0, 2.0, 3.0)])
+            values = await client.values('fn', [0.0, 0.0])
+            errors = []
+            for name, x in (('missing', [1.0]), ('fn', [1.0])):
+                try:
+                    await client.grad(name, x)
+                except RuntimeError as error:
+                    errors.append(str(error))
+            await client.close()
+            stats = service.stats()
+            await service.close()
+            return replies, values, errors, stats
+        replies, values, errors, stats = asyncio.run(run())
+        for x, (_, jacob) in zip((1.0, 2.0, 3.0), replies):
+            assert np.allclose(jacob, self.expected(x, 1.0))
+        assert np.allclose(values, [0, 1])
+        assert errors[0].startswith('KeyError') and errors[1].startswith('TypeError')
+        assert max(int(size) for size in stats['batch_sizes']) <= 2
+        with pytest.raises(ValueError):
+            GradientService(mode='sideways')
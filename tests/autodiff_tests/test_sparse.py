@@ -0,0 +1,86 @@
+import pytest
+import numpy as np
+from autoDiff_team15_2022.sparse import SparseJacobian, sparsity_pattern, color_columns, sparse_jacobian
+from autoDiff_team15_2022.differentiation import jacobian
+from autoDiff_team15_2022.driver import Forward_AD
+from autoDiff_team15_2022.elemFunctions import *
+
+
+class Test_sparse():
+
+    """This class evaluates the sparse module.
+    Sparsity patterns are traced through Node, columns are colored and the Jacobian is computed by compressed forward passes.
+
+    Parameters
+    ==========
+    fn: function with a sparse Jacobian
+    x: point at which the Jacobian is evaluated
+
+    Returns
+    ==========
+    sparse_jacobian(fn, x): Jacobian of fn at x in CSR format
+
+    assert: assert that sparse Jacobians match the dense Jacobians and take one pass per color
+
+    """
+
+    def band(self, n, width):
+        def fn(*x):
+            return [sum(sin(x[j]) * x[i] for j in range(max(i - width, 0), min(i + width + 1, n))) for i in range(n)]
+        return fn
+
+    def test_pattern(self):
+    #test that the pattern holds exactly the inputs every output depends on
+        def fn(x, y, z):
+            return [x * y, sin(z), 3.0, y ** 2 + exp(y)]
+        pattern = sparsity_pattern(fn, [1, 2, 3])
+        assert pattern.shape == (4, 3)
+        assert np.array_equal(pattern.toarray(), [[1, 1, 0], [0, 0, 1], [0, 0, 0], [0, 1, 0]])
+        assert np.array_equal(pattern.indptr, [0, 2, 3, 3, 4])
+        assert np.array_equal(pattern.indices, [0, 1, 2, 1])
+
+    def test_coloring(self):
+    #test that columns of one color share no row and banded patterns take as many colors as their bandwidth
+        for n, width in [(30, 1), (30, 2), (7, 3)]:
+            pattern = sparsity_pattern(self.band(n, width), np.linspace(0.1, 1, n))
+            colors = color_columns(pattern)
+            dense = pattern.toarray()
+            for color in range(colors.max() + 1):
+                assert dense[:, colors == color].sum(axis=1).max() <= 1
+            assert colors.max() + 1 == min(2 * width + 1, n)
+
+    def test_sparse_jacobian(self):
+    #test that the compressed passes give the dense jacobian
+        n = 40
+        fn = self.band(n, 2)
+        x = list(np.linspace(0.1, 1, n))
+        jac = sparse_jacobian(fn, x)
+        assert jac.passes == 5
+        assert jac.nnz == np.count_nonzero(jac.toarray())
+        assert np.allclose(jac.toarray(), jacobian([fn], x))
+        rows, cols, data = jac.tocoo()
+        assert np.allclose(jacobian([fn], x)[rows, cols], data)
+        # the pattern of an earlier point is reused
+        y = list(np.linspace(0.5, 2, n))
+        assert np.allclose(sparse_jacobian(fn, y, pattern=jac).toarray(), jacobian([fn], y))
+
+    def test_functions(self):
+    #test a list of functions, constant outputs and functions without inputs reached
+        fns = [lambda x, y: x * y, lambda x, y: [2.0, log(y)]]
+        jac = sparse_jacobian(fns, [2, 3])
+        assert np.allclose(jac.toarray(), [[3, 2], [0, 0], [0, 1 / (3 * np.log(10))]])
+        assert np.allclose(sparse_jacobian(lambda x: 4.0, [1]).toarray(), [[0]])
+
+    def test_driver(self):
+    #test that the driver traces the pattern once per number of inputs
+        calls = []
+        def fn(x, y, z):
+            calls.append(type(x).__name__)
+            return [x * y, z ** 2]
+        ad = Forward_AD(fn)
+        assert np.allclose(ad.sparse_grad([1, 2, 3]).toarray(), [[2, 1, 0], [0, 0, 6]])
+        assert np.allclose(ad.sparse_grad([2, 2, 2]).toarray(), [[2, 2, 0], [0, 0, 4]])
+        assert calls == ['Node', 'DualNumber', 'DualNumber']
+        ad.sparse_grad([2, 2, 2], retrace=True)
+        assert calls[-2:] == ['Node', 'DualNumber']
+        assert isinstance(ad.der, SparseJacobian)
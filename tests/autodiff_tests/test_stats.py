@@ -0,0 +1,146 @@
+import gc
+import pytest
+import numpy as np
+from autoDiff_team15_2022 import hooks
+from autoDiff_team15_2022.stats import DriverStats
+from autoDiff_team15_2022.driver import Forward_AD, Reverse_AD, Auto_AD
+from autoDiff_team15_2022.dualNum import DualNumber
+from autoDiff_team15_2022.node import Node
+from autoDiff_team15_2022 import elemFunctions as ef
+from autoDiff_team15_2022.elemFunctions import *
+
+
+class Test_stats():
+
+    """This class evaluates the stats module and the stats of the drivers.
+    Operations, evaluations, graphs and latencies are counted while the stats of a driver are enabled.
+
+    Parameters
+    ==========
+    fn: function differentiated by the drivers
+    x: input point
+
+    Returns
+    ==========
+    ad.stats: counters of the calls of the driver
+
+    assert: assert that the counters match the operations of the function and that the hooks are removed
+
+    """
+
+    def fn(self, x, y):
+        return x * sin(y) + exp(x)
+
+    def test_forward_counts(self):
+    #test that forward mode counts one evaluation and every operation per call
+        ad = Forward_AD(self.fn, stats=True)
+        for _ in range(3):
+            assert np.allclose(ad.grad([1., 2.]), [np.sin(2.) + np.e, np.cos(2.)])
+        stats = ad.stats
+        assert stats.calls == 3
+        assert stats.function_calls == 3
+        assert dict(stats.ops) == {'mul': 3, 'sin': 3, 'exp': 3, 'add': 3}
+        assert stats.allocations['DualNumber'] == 12
+        assert stats.last['function_calls'] == 1
+        assert set(stats.phases) == {'forward', 'other'}
+        assert stats.nodes == 0
+        ad.disable_stats()
+
+    def test_reverse_graph(self):
+    #test that reverse mode counts the nodes, edges and depth of the traced graph on both backends
+        for backend in ('node', 'tape'):
+            ad = Reverse_AD(self.fn, backend=backend, stats=True)
+            ad.grad([1., 2.])
+            stats = ad.stats
+            assert dict(stats.ops) == {'mul': 1, 'sin': 1, 'exp': 1, 'add': 1}
+            assert (stats.nodes, stats.edges, stats.max_depth) == (6, 6, 3)
+            assert set(stats.phases) == {'trace', 'backward', 'other'}
+            ad.disable_stats()
+
+    def test_summary(self):
+    #test that the summary holds the latency percentiles and histogram of every call
+        ad = Reverse_AD(lambda x, y: x * sin(y), stats=True)
+        for _ in range(10):
+            ad.grad([1., 2.])
+        ad.values([1., 2.])
+        summary = ad.stats.summary()
+        assert summary['calls'] == 11
+        assert summary['function_calls'] == 11
+        assert summary['ops'] == {'sin': 11, 'mul': 11}
+        assert 0 < summary['p50'] <= summary['p99']
+        assert sum(summary['histogram'].values()) == 11
+        assert summary['last']['nodes'] == 0
+        ad.stats.reset()
+        assert ad.stats.calls == 0 and ad.stats.percentile(50) is None
+        ad.disable_stats()
+
+    def test_auto(self):
+    #test that both modes of Auto_AD count into the same stats
+        ad = Auto_AD(self.fn, stats=True)
+        for x in ([1., 2.], [1., 3.]):
+            ad.grad(x)
+        assert ad.stats.calls == 2
+        assert ad.stats.function_calls == 2
+        assert ad.stats.ops['sin'] == 2
+        ad.disable_stats()
+        assert ad._forward.stats is None and ad._reverse.stats is None
+
+    def test_hooks_removed(self):
+    #test that the operations are only hooked while some driver has stats enabled
+        sin_dual = ef._SIN[DualNumber]
+        mul_node = Node.__dict__['__mul__']
+        plain = Forward_AD(self.fn)
+        assert not hooks.installed()
+        first = Forward_AD(self.fn, stats=True)
+        second = Reverse_AD(self.fn, stats=True)
+        assert hooks.installed()
+        assert ef._SIN[DualNumber] is not sin_dual
+        stats = first.disable_stats()
+        assert isinstance(stats, DriverStats) and first.stats is None
+        assert hooks.installed()
+        del second
+        gc.collect()
+        assert not hooks.installed()
+        assert ef._SIN[DualNumber] is sin_dual
+        assert Node.__dict__['__mul__'] is mul_node
+        # A driver without stats is not counted by another one's stats
+        counted = Forward_AD(self.fn, stats=True)
+        plain.grad([1., 2.])
+        assert counted.stats.calls == 0 and not counted.stats.ops
+        counted.disable_stats()
+        assert first.fn[0] is not None and first.grad([1., 2.]) is not None
+        assert not hooks.installed()
+
+    def test_errors(self):
+    #test that a failing call is still measured and leaves the hooks working
+        ad = Forward_AD(lambda x: x + 1 / x, stats=True)
+        with pytest.raises(ZeroDivisionError):
+            ad.grad([0.])
+        assert ad.stats.calls == 1
+        assert ad.stats.last['function_calls'] == 1
+        assert np.isclose(ad.grad([1.]), 0.)
+        ad.disable_stats()
+
+    def test_threads(self):
+    #test that operations of other threads are not counted in a driver's call
+        import threading
+        stop = threading.Event()
+        def busy():
+            while not stop.is_set():
+                Node(1.) * 2.
+        import sys
+        thread = threading.Thread(target=busy)
+        ad = Forward_AD(lambda x: sin(x), stats=True)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        thread.start()
+        try:
+            for _ in range(2000):
+                ad.grad([1.])
+        finally:
+            stop.set()
+            thread.join()
+            sys.setswitchinterval(interval)
+        assert dict(ad.stats.ops) == {'sin': 2000}
+        assert dict(ad.stats.allocations) == {'DualNumber': 2000}
+        ad.disable_stats()
@@ -0,0 +1,131 @@
+import pytest
+import numpy as np
+from autoDiff_team15_2022.tape import Tape, TapeNode
+from autoDiff_team15_2022.elemFunctions import *
+
+
+class Test_tape():
+
+    """This class evaluates the tape module.
+    Operations on TapeNode objects are recorded on a flat Tape and differentiated by one reverse sweep.
+
+    Parameters
+    ==========
+    tape: Tape object recording the operations
+    x, y: TapeNode objects returned by tape.variable
+    z: elementary operation using x and y
+
+    Returns
+    ==========
+    tape.backward(z): adjoint of every entry on the tape
+
+    assert: assert that the recorded operations return the correct values and derivatives
+
+    """
+
+    def test_variable(self):
+    #Test recording of input entries
+        tape = Tape()
+        x = tape.variable(2)
+        y = tape.variable(3.5)
+        assert len(tape) == 2
+        assert (x.index, y.index) == (0, 1)
+        assert y.value == 3.5
+        assert tape.ops() == ['input', 'input']
+
+    def test_arithmetic(self):
+    #Test the operators against hand computed derivatives
+        tape = Tape()
+        x = tape.variable(2)
+        y = tape.variable(4)
+        z = (x * y - x / y + 3 - y) ** 2 / (1 + x) - 2 * (-y) + (+x) - 1 / x
+        f = 2*4 - 2/4 + 3 - 4
+        adjoint = tape.backward(z)
+        assert z.value == pytest.approx(f**2 / 3 + 8 + 2 - 0.5)
+        dfdx = 4 - 1/4
+        dfdy = 2 + 2/16 - 1
+        assert adjoint[x.index] == pytest.approx(2*f*dfdx/3 - f**2/9 + 1 + 1/4)
+        assert adjoint[y.index] == pytest.approx(2*f*dfdy/3 + 2)
+
+    def test_powers(self):
+    #Test powers between entries and numbers
+        tape = Tape()
+        x = tape.variable(2)
+        y = tape.variable(3)
+        z = x ** y + 2 ** x + x ** 2 - 3 - x
+        adjoint = tape.backward(z)
+        assert z.value == 8 + 4 + 4 - 3 - 2
+        assert adjoint[x.index] == pytest.approx(3*4 + 4*np.log(2) + 4 - 1)
+        assert adjoint[y.index] == pytest.approx(8*np.log(2))
+        # a negative base to an integer power has a value but no derivative in the exponent
+        with np.errstate(all='raise'):
+            z = (-2) ** y
+        assert z.value == -8 and np.isnan(tape.backward(z)[y.index])
+
+    def test_elementary(self):
+    #Test that elementary functions are recorded on the tape
+        tape = Tape()
+        x = tape.variable(0.5)
+        z = sin(x) * cos(x) + tan(x) + arcsin(x) + arccos(x) + arctan(x) \
+            + sinh(x) + cosh(x) + tanh(x) + exp(x) + log(x) + logistic(x)
+        v = 0.5
+        dz = (np.cos(2*v) + 1/np.cos(v)**2 + 1/(1 + v**2) + np.cosh(v) + np.sinh(v)
+              + 1/np.cosh(v)**2 + np.exp(v) + 1/(v*np.log(10)) + np.exp(v)/(1 + np.exp(v))**2)
+        assert tape.backward(z)[x.index] == pytest.approx(dz)
+        assert 'logistic' in tape.ops()
+
+    def test_growth(self):
+    #Test that the buffers grow for long traces
+        tape = Tape(capacity=4)
+        x = tape.variable(1.0)
+        z = x
+        for _ in range(3000):
+            z = z * 1.0001 + 0.0
+        assert len(tape) == 6001
+        assert tape.capacity >= len(tape)
+        assert tape.backward(z)[x.index] == pytest.approx(1.0001 ** 3000)
+        tape.clear()
+        assert len(tape) == 0
+
+    def test_backward_many(self):
+    #Test one sweep seeded at several outputs
+        tape = Tape()
+        x = tape.variable(2)
+        y = tape.variable(3)
+        w = x * y
+        u = w + x
+        v = w * y
+        adjoint = tape.backward_many([u, v], [1, -1])
+        assert np.allclose(adjoint[[x.index, y.index]], [4 - 9, 2 - 12])
+        assert np.allclose(tape.backward_many([w, w], [1, 1])[[x.index, y.index]], [6, 4])
+        with pytest.raises(ValueError):
+            tape.backward_many([Tape().variable(1)], [1])
+
+    def test_jacobian(self):
+    #Test that the jacobian of several outputs matches one sweep per output
+        tape = Tape()
+        x = tape.variable(2)
+        y = tape.variable(3)
+        outputs = [x * y, sin(x) + y ** 2, x - y]
+        indices = [x.index, y.index]
+        jacobian = tape.jacobian(outputs, indices)
+        assert np.allclose(jacobian, [tape.backward(z)[indices] for z in outputs])
+        assert np.allclose(jacobian, [[3, 2], [np.cos(2), 6], [1, -1]])
+        out = np.empty((3, 2))
+        assert tape.jacobian(outputs, indices, out=out) is out
+        assert np.allclose(out, jacobian)
+        with pytest.raises(ValueError):
+            tape.jacobian([Tape().variable(1)], [0])
+
+    def test_errors(self):
+    #Test unsupported operand types and mixed tapes
+        tape = Tape()
+        x = tape.variable(1)
+        with pytest.raises(TypeError):
+            x + 'a'
+        with pytest.raises(TypeError):
+            'a' ** x
+        with pytest.raises(ValueError):
+            x * Tape().variable(2)
+        with pytest.raises(ValueError):
+            Tape().backward(x)
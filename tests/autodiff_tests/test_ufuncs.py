@@ -0,0 +1,134 @@
+import pytest
+import numpy as np
+from autoDiff_team15_2022.dualNum import DualNumber
+from autoDiff_team15_2022.node import Node
+from autoDiff_team15_2022.driver import Forward_AD, Reverse_AD
+
+
+class Test_ufuncs():
+
+    """This class evaluates the ufuncs module.
+    numpy ufuncs and the np.sum and np.dot functions are evaluated on DualNumber and Node objects.
+
+    Parameters
+    ==========
+    x, y: DualNumber or Node objects
+    z: numpy function applied to x and y
+
+    Returns
+    ==========
+    z.real and z.dual for DualNumbers, z.value and the gradients of x and y for Nodes
+
+    assert: assert that numpy functions return the correct values and derivatives
+
+    """
+
+    def test_dual_unary(self):
+    #Test numpy ufuncs of one DualNumber
+        x = DualNumber(0.5, 2)
+        for fn, der in [(np.sin, np.cos(0.5)), (np.exp, np.exp(0.5)), (np.log, 1 / 0.5),
+                        (np.sqrt, 0.5 / np.sqrt(0.5)), (np.tanh, 1 - np.tanh(0.5) ** 2)]:
+            z = fn(x)
+            assert isinstance(z, DualNumber)
+            assert z.real == pytest.approx(fn(0.5))
+            assert z.dual == pytest.approx(2 * der)
+
+    def test_dual_numpy_scalar(self):
+    #Test numpy scalars combined with a DualNumber in both orders
+        x = DualNumber(3, 1)
+        for z in [np.float64(2) * x, x * np.float64(2), np.add(x, 3.0) - 3.0 + x]:
+            assert isinstance(z, DualNumber)
+            assert z.real == 6
+            assert z.dual == 2
+
+    def test_dual_array(self):
+    #Test numeric arrays combined with a DualNumber become an array-valued DualNumber
+        x = DualNumber(2, 1)
+        c = np.array([1., 2., 3.])
+        for z in [c * x, x * c]:
+            assert isinstance(z, DualNumber)
+            assert np.array_equal(z.real, [2, 4, 6])
+            assert np.array_equal(z.dual, [1, 2, 3])
+        z = np.sin(x) / c
+        assert np.allclose(z.real, np.sin(2) / c)
+        assert np.allclose(z.dual, np.cos(2) / c)
+
+    def test_dual_sum_dot(self):
+    #Test np.sum and np.dot reduce an array-valued DualNumber
+        x = DualNumber(2, np.array([1., 0.]))
+        y = DualNumber(3, np.array([0., 1.]))
+        c = np.array([1., 2.])
+        z = np.sum(c * x * y)
+        assert z.real == 18
+        assert np.array_equal(z.dual, [9, 6])
+        z = np.dot(c, np.exp(c * x))
+        assert z.real == pytest.approx(np.exp(2) + 2 * np.exp(4))
+        assert z.dual == pytest.approx([np.exp(2) + 4 * np.exp(4), 0])
+
+    def test_dual_object_array(self):
+    #Test object arrays of DualNumbers
+        a = np.array([DualNumber(1, 1), DualNumber(2, 0)], dtype=object)
+        z = np.sin(a)
+        assert z[0].real == np.sin(1) and z[0].dual == np.cos(1)
+        assert z[1].real == np.sin(2) and z[1].dual == 0
+        z = DualNumber(3, 0.5) * a
+        assert isinstance(z, DualNumber)
+        assert np.array_equal(z.real, [3, 6])
+        assert np.array_equal(z.dual, [3.5, 1])
+
+    def test_node_unary(self):
+    #Test numpy ufuncs of one Node
+        x = Node(0.5)
+        z = np.sin(x) * np.exp(x)
+        assert isinstance(z, Node)
+        z.backward()
+        assert z.value == pytest.approx(np.sin(0.5) * np.exp(0.5))
+        assert x.gradient == pytest.approx((np.cos(0.5) + np.sin(0.5)) * np.exp(0.5))
+
+    def test_node_broadcast(self):
+    #Test adjoints of a broadcast Node are summed back to its shape
+        x = Node(2.0)
+        y = Node(3.0)
+        z = np.sum(np.array([1., 2., 3.]) * x * y)
+        assert z.value == 36
+        z.backward()
+        assert x.gradient == 18
+        assert y.gradient == 12
+
+    def test_node_object_array(self):
+    #Test object arrays of Nodes keep one node per entry
+        a = [Node(1.), Node(2.)]
+        x = Node(3.)
+        z = x * np.array(a, dtype=object)
+        assert z[1].value == 6
+        z[1].backward()
+        assert x.gradient == 2
+        assert a[1].gradient == 3
+
+    def test_unsupported(self):
+    #Test ufuncs without a derivative rule and mixed traced types raise errors
+        with pytest.raises(TypeError):
+            np.floor(DualNumber(1, 1))
+        with pytest.raises(TypeError):
+            np.add(DualNumber(1, 1), Node(1))
+        with pytest.raises(TypeError):
+            np.abs(DualNumber(-1, 1))
+        with pytest.raises(TypeError):
+            np.maximum(Node(1), 2)
+
+    def test_function_fallback(self):
+    #Test numpy functions without a rule of their own apply the operators to boxed traced numbers
+        z = np.mean(DualNumber(2, 1) * 3)
+        assert isinstance(z, DualNumber)
+        assert z.real == 6 and z.dual == 3
+        assert np.ndim(Node(1.)) == 0
+
+    def test_drivers(self):
+    #Test forward and reverse mode on functions written with numpy
+        f = lambda x, y: np.log(x) * np.sqrt(y) + np.dot(np.array([1., 2.]), np.sin(x * np.array([1., 2.])))
+        expected = [np.sqrt(4) / 2 + np.cos(2) + 4 * np.cos(4), np.log(2) / 4]
+        assert np.allclose(Forward_AD(f).grad([2, 4]), expected)
+        assert np.allclose(Reverse_AD(f).grad([2, 4]), expected)
+        points = np.array([[1., 2.], [3., 4.]])
+        g = lambda x, y: np.sin(x) * y
+        assert np.allclose(Forward_AD(g).grad_batch(points), Reverse_AD(g).grad_batch(points))
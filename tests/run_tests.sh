@@ -35,6 +35,17 @@ tests=(
     autodiff_tests/test_dual.py
     autodiff_tests/test_differentiation.py
     autodiff_tests/test_node.py
+    autodiff_tests/test_tape.py
+    autodiff_tests/test_ufuncs.py
+    autodiff_tests/test_compiler.py
+    autodiff_tests/test_cache.py
+    autodiff_tests/test_hessian.py
+    autodiff_tests/test_sparse.py
+    autodiff_tests/test_parallel.py
+    autodiff_tests/test_service.py
+    autodiff_tests/test_stats.py
+    autodiff_tests/test_profiler.py
+    autodiff_tests/test_checkpoint.py
 
 )
 